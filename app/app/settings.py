@@ -19,12 +19,17 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/3.0/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'vvslv*_q)_#q@b=&_gvu9hhr=uov=)@r*3y=_7b@^o3d*22)+('
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'vvslv*_q)_#q@b=&_gvu9hhr=uov=)@r*3y=_7b@^o3d*22)+('
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Besides tracebacks, DEBUG keeps every SQL query of a request in memory.
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
-ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+ALLOWED_HOSTS = os.environ.get(
+    'DJANGO_ALLOWED_HOSTS', '127.0.0.1,localhost').split(',')
 
 # Application definition
 
@@ -43,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,13 +81,62 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# The core.backends.postgresql engine adds CONN_HEALTH_CHECKS and an
+# optional in-process connection POOL, see its DatabaseWrapper. Either
+# keep connections open across requests with DB_CONN_MAX_AGE, or pool
+# them with DB_POOL_MAX_SIZE and leave DB_CONN_MAX_AGE at 0.
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS':
+            os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1',
+        'POOL': {
+            'MAX_SIZE': int(os.environ['DB_POOL_MAX_SIZE']),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        } if os.environ.get('DB_POOL_MAX_SIZE') else None,
+    }
+}
+
+# Read replicas, as a comma separated list of hosts sharing the name and
+# credentials of the primary. List and retrieve requests are served from
+# them, except for users pinned to the primary after a write. The pins
+# live in DATABASE_REPLICA_PIN['CACHE'], which must be shared by every
+# process, e.g. Memcached; the core.E001 check enforces it.
+
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(','))):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dict(
+        DATABASES['default'],
+        HOST=host.strip(),
+        TEST={'MIRROR': 'default'}
+    )
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+DATABASE_REPLICA_PIN = {
+    'CACHE': 'default',
+    'SECONDS': int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5)),
+}
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
     }
 }
 
@@ -103,6 +158,52 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing. PASSWORD_HASHER picks the hasher of new hashes, the
+# others remain to check existing hashes, which are upgraded to the
+# preferred hasher and cost on the next login.
+
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'core.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+]
+
+PASSWORD_HASHER_COST = {
+    'ARGON2_TIME_COST': int(os.environ.get('ARGON2_TIME_COST', 2)),
+    'ARGON2_MEMORY_COST': int(os.environ.get('ARGON2_MEMORY_COST', 512)),
+    'ARGON2_PARALLELISM': int(os.environ.get('ARGON2_PARALLELISM', 2)),
+    'BCRYPT_ROUNDS': int(os.environ.get('BCRYPT_ROUNDS', 12)),
+    'PBKDF2_ITERATIONS': int(os.environ.get('PBKDF2_ITERATIONS', 216000)),
+}
+
+AUTHENTICATION_BACKENDS = ['core.auth_backends.PooledModelBackend']
+
+# Threads hashing passwords per process, and how many more hashes may
+# wait for one before logins are turned away with a 503. This caps the
+# CPU spent hashing; the requests still wait for their hash.
+
+PASSWORD_HASH_POOL = {
+    'THREADS': int(os.environ.get(
+        'PASSWORD_HASH_THREADS', os.cpu_count() or 1)),
+    'QUEUE': int(os.environ.get('PASSWORD_HASH_QUEUE', 32)),
+}
+
+# Login attempts allowed per client IP and per email, checked before
+# any password is hashed. The counts live in the default cache, which
+# must be shared for the limits to hold across worker processes.
+
+LOGIN_RATE_LIMITS = {
+    'login_ip': os.environ.get('LOGIN_RATE_LIMIT_IP', '60/min'),
+    'login_email': os.environ.get('LOGIN_RATE_LIMIT_EMAIL', '10/min'),
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.0/topics/i18n/
 
@@ -120,4 +221,110 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
 STATIC_URL = '/static/'
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', '/vol/web/media')
+
+# Serve uploaded media from Django even with DEBUG off, for deployments
+# without a web server or object storage in front of MEDIA_ROOT.
+SERVE_MEDIA = os.environ.get('DJANGO_SERVE_MEDIA', '0') == '1'
+
 AUTH_USER_MODEL = 'core.User'
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+# The JSON renderer and parser use orjson when it is installed, see
+# core.renderers.
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS':
+        'recipe_app.pagination.RecipeCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 100)),
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Reverse proxies in front of the app. Client IPs, e.g. for the login
+    # throttles, are taken from X-Forwarded-For only past that many
+    # proxies, as clients can send the header themselves.
+    'NUM_PROXIES': int(os.environ.get('API_NUM_PROXIES', 0)),
+}
+
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+
+# Threads running the async recipe and user endpoints, see
+# core.asyncviews. Also bounds the database connections they use.
+
+ASYNC_VIEW_THREADS = int(os.environ.get('ASYNC_VIEW_THREADS', 8))
+
+# Per view request metrics, see core.middleware.MetricsMiddleware. Lower
+# the sample rate to measure only a fraction of requests in production.
+
+METRICS = {
+    'ENABLED': os.environ.get('METRICS_ENABLED', '1') == '1',
+    'SAMPLE_RATE': float(os.environ.get('METRICS_SAMPLE_RATE', 1.0)),
+}
+
+# Cache of rendered recipe detail payloads, see recipe_app.caching.
+
+RECIPE_DETAIL_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.environ.get('RECIPE_DETAIL_CACHE_TIMEOUT', 3600)),
+}
+
+# In-process cache of the sorted tag and ingredient names of users
+# hitting the autocomplete endpoints at keystroke rate.
+
+AUTOCOMPLETE_CACHE = {
+    'HOT_THRESHOLD': int(os.environ.get('AUTOCOMPLETE_HOT_THRESHOLD', 5)),
+    'MAX_USERS': int(os.environ.get('AUTOCOMPLETE_CACHE_USERS', 1000)),
+    'MAX_NAMES': int(os.environ.get('AUTOCOMPLETE_CACHE_NAMES', 5000)),
+    'TTL': int(os.environ.get('AUTOCOMPLETE_CACHE_TTL', 30)),
+}
+
+# Default and largest number of autocomplete suggestions.
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Top tags and ingredients returned by the recipe stats endpoint.
+
+RECIPE_STATS_TOP = 5
+RECIPE_STATS_MAX_TOP = 50
+
+# Largest payload accepted by the bulk endpoints, and how many rows are
+# written per INSERT/UPDATE statement.
+
+API_MAX_BULK_ITEMS = int(os.environ.get('API_MAX_BULK_ITEMS', 5000))
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 1000))
+
+# Recipe image uploads, see core.images. Uploads are streamed to disk
+# and rejected past MAX_BYTES, thumbnails no larger than SIZES pixels
+# are generated by a pool of THREADS in each worker process.
+
+RECIPE_IMAGES = {
+    'MAX_BYTES': int(os.environ.get('RECIPE_IMAGE_MAX_BYTES', 10485760)),
+    'MAX_PIXELS': int(os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40000000)),
+    'FORMATS': ('JPEG', 'PNG', 'WEBP', 'GIF'),
+    'SIZES': {'small': 160, 'medium': 480, 'large': 1080},
+    'THREADS': int(os.environ.get('RECIPE_IMAGE_THREADS', 2)),
+}
+
+# Number of recipes read per round trip when streaming an export.
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 2000))
+
+# Token -> user resolution cache used by core.authentication.
+# SHARED_CACHE names an entry in CACHES shared between workers, through
+# which deleted tokens and updated users are invalidated everywhere. Set
+# it whenever more than one process serves requests.
+
+TOKEN_AUTH_CACHE = {
+    'MAX_SIZE': int(os.environ.get('TOKEN_AUTH_CACHE_SIZE', 10000)),
+    'TTL': int(os.environ.get('TOKEN_AUTH_CACHE_TTL', 300)),
+    'SHARED_CACHE': os.environ.get('TOKEN_AUTH_SHARED_CACHE'),
+}
@@ -13,11 +13,27 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+from django.views.static import serve
+
+from core.views import MetricsView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include('user_app.urls')),
-    path('api/recipe/', include('recipe_app.urls'))
+    path('api/recipe/', include('recipe_app.urls')),
+    path('api/metrics/', MetricsView.as_view(), name='metrics')
 ]
+
+# Uploaded media, served by Django when DEBUG or SERVE_MEDIA is on.
+if settings.SERVE_MEDIA and not settings.DEBUG:
+    urlpatterns.append(re_path(
+        r'^%s(?P<path>.*)$' % settings.MEDIA_URL.lstrip('/'), serve,
+        {'document_root': settings.MEDIA_ROOT}
+    ))
+else:
+    urlpatterns += static(
+        settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
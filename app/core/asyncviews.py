@@ -0,0 +1,67 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the thread pool running the blocking part of async views.
+    Each thread holds at most one connection per database, so the pool
+    size also bounds the connections used by async views.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_VIEW_THREADS,
+                thread_name_prefix='async-view'
+            )
+
+        return _executor
+
+
+def run_view(view, request, *args, **kwargs):
+    """
+    Call a sync view and render its response, managing the database
+    connections of the pool thread like a request would.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+
+        return response
+    finally:
+        close_old_connections()
+
+
+def pooled_async_view(view):
+    """
+    Turn a sync view into an async one that runs it on the async view
+    thread pool.
+
+    Under ASGI, Django runs every sync view on one shared thread. Views
+    wrapped here don't queue behind each other, and a request waiting
+    for a free pool thread only holds a coroutine.
+    """
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        loop = asyncio.get_event_loop()
+        # Run in a copy of the request's context, e.g. for its metrics.
+        return await loop.run_in_executor(
+            get_executor(),
+            contextvars.copy_context().run,
+            functools.partial(run_view, view, request, *args, **kwargs)
+        )
+
+    return async_view
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from core.passwords import hash_password, verify_password
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend hashing on the bounded hashing pool, which caps how many
+    hashes run at once; the request thread still waits for each one.
+    Hashes made with an old hasher or cost are upgraded on login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown emails take as long as known ones.
+            hash_password(password)
+            return None
+
+        matches, outdated = verify_password(password, user.password)
+        if not matches or not self.user_can_authenticate(user):
+            return None
+
+        if outdated:
+            user.password = hash_password(password)
+            user.save(update_fields=['password'])
+
+        return user
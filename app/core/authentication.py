@@ -0,0 +1,113 @@
+import copy
+import hashlib
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import LRUCache
+
+_local_cache = None
+_local_cache_lock = threading.Lock()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that remembers which user a token belongs to.
+
+    Resolved tokens are kept in a bounded in-process LRU cache, so most
+    requests never touch the authtoken table. The signal handlers in
+    `core.signals` drop the entry of a token when it is deleted or its
+    user is saved.
+
+    Other processes can only see that through a cache they share: when
+    `TOKEN_AUTH_CACHE['SHARED_CACHE']` names one, it holds a random
+    stamp per valid token, and local entries are only used while their
+    stamp is still the shared one. Invalidating a token deletes its
+    stamp, so every process reloads it on its next request. Only the
+    stamp is shared, never the user.
+    """
+
+    def authenticate_credentials(self, key):
+        """Return the (user, token) pair for key, from cache if possible."""
+        local_cache = get_local_cache()
+        shared_cache = get_shared_cache()
+        stamp = None
+        if shared_cache is not None:
+            stamp = shared_cache.get(shared_cache_key(key))
+
+        cached = local_cache.get(key)
+        if cached is not None and (
+                shared_cache is None or
+                (stamp is not None and cached[0] == stamp)):
+            _, user, token = cached
+        else:
+            user, token = super().authenticate_credentials(key)
+            if shared_cache is not None and stamp is None:
+                stamp = publish_stamp(shared_cache, key)
+            local_cache.set(key, (stamp, user, token))
+
+        # Hand out a copy so that a request modifying its user doesn't
+        # leak the change to other requests sharing the cached instance.
+        return copy.copy(user), token
+
+
+def get_local_cache():
+    """Return the in-process token cache, created from the settings."""
+    global _local_cache
+    with _local_cache_lock:
+        if _local_cache is None:
+            _local_cache = LRUCache(
+                max_size=settings.TOKEN_AUTH_CACHE['MAX_SIZE'],
+                ttl=settings.TOKEN_AUTH_CACHE['TTL']
+            )
+
+        return _local_cache
+
+
+@receiver(setting_changed)
+def reset_local_cache(setting, **kwargs):
+    """Recreate the local cache with the new settings when they change."""
+    global _local_cache
+    if setting == 'TOKEN_AUTH_CACHE':
+        with _local_cache_lock:
+            _local_cache = None
+
+
+def get_shared_cache():
+    """Return the shared token cache, or None if it isn't configured."""
+    alias = settings.TOKEN_AUTH_CACHE.get('SHARED_CACHE')
+    if not alias:
+        return None
+
+    return caches[alias]
+
+
+def shared_cache_key(key):
+    """Return the shared cache key for a token without exposing it."""
+    return 'auth-token:' + hashlib.sha256(key.encode()).hexdigest()
+
+
+def publish_stamp(shared_cache, key):
+    """Return the shared stamp of a token, adding one if there is none."""
+    stamp = uuid.uuid4().hex
+    if shared_cache.add(
+            shared_cache_key(key), stamp, settings.TOKEN_AUTH_CACHE['TTL']):
+        return stamp
+
+    # Another process published one first.
+    return shared_cache.get(shared_cache_key(key))
+
+
+def invalidate_token(key):
+    """Forget the cached user for the token with the given key."""
+    get_local_cache().delete(key)
+
+    shared_cache = get_shared_cache()
+    if shared_cache is not None:
+        shared_cache.delete(shared_cache_key(key))
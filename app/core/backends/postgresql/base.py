@@ -0,0 +1,86 @@
+from django.db.backends.postgresql import base
+
+from core.backends.postgresql.pool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Postgres backend with two extra settings in DATABASES:
+
+    CONN_HEALTH_CHECKS: check that a persistent or pooled connection
+    still works before its first use in a request, reconnecting
+    instead of failing the request if the server dropped it.
+
+    POOL: {'MAX_SIZE': ..., 'TIMEOUT': ...} keeps closed connections
+    open in a per process pool shared by every thread, so requests
+    don't pay for the connection handshake. Use it with CONN_MAX_AGE 0,
+    the connection goes back to the pool at the end of each request.
+    """
+    health_check_done = False
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return super().get_new_connection(conn_params)
+
+        check = (self.connection_is_usable
+                 if self.settings_dict.get('CONN_HEALTH_CHECKS') else None)
+        connection = get_pool(self.alias, options).get(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params),
+            check
+        )
+        # The pooled connection was set up by get_new_connection with
+        # the same OPTIONS, so its session isolation level is the one
+        # Django expects.
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level', connection.isolation_level)
+        # A fresh or just checked connection doesn't need another check.
+        self.health_check_done = True
+
+        return connection
+
+    def _close(self, discard=False):
+        options = self.settings_dict.get('POOL')
+        if not options or self.connection is None:
+            return super()._close()
+
+        get_pool(self.alias, options).put(
+            self.connection, discard=discard or self.errors_occurred)
+
+    def ensure_connection(self):
+        if (self.connection is not None and
+                self.settings_dict.get('CONN_HEALTH_CHECKS') and
+                not self.health_check_done and not self.in_atomic_block):
+            if not self.is_usable():
+                self.discard_connection()
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def discard_connection(self):
+        """
+        Close the connection for good, where close() would hand a pooled
+        one back to the pool. Only called outside atomic blocks.
+        """
+        try:
+            self._close(discard=True)
+        finally:
+            self.connection = None
+
+    def close_if_unusable_or_obsolete(self):
+        # Called at the start and end of every request.
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
+
+    def connection_is_usable(self, connection):
+        """Return whether a raw psycopg2 connection still works."""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if not connection.autocommit:
+                connection.rollback()
+        except base.Database.Error:
+            return False
+
+        return True
@@ -0,0 +1,92 @@
+import os
+import threading
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of at most `max_size` open psycopg2 connections.
+
+    Callers block for up to `timeout` seconds when every connection is
+    in use. Connections are returned outside of any transaction.
+    """
+
+    def __init__(self, max_size=10, timeout=10):
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def get(self, connect, check=None):
+        """
+        Return an idle connection that passes check, or a new one made
+        by calling connect.
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise OperationalError(
+                'Timed out waiting for a pooled database connection.')
+
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection = self._idle.pop()
+                if check is None or check(connection):
+                    return connection
+                connection.close()
+
+            return connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def put(self, connection, discard=False):
+        """Give a connection back, closing it if discard is set."""
+        try:
+            if discard or connection.closed:
+                connection.close()
+                return
+
+            if connection.info.transaction_status != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            with self._lock:
+                self._idle.append(connection)
+        except Exception:
+            connection.close()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+    def __len__(self):
+        return len(self._idle)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """
+    Return the pool of a database alias for this process. Forked
+    workers get their own pool rather than sharing the parent's
+    sockets.
+    """
+    key = (alias, os.getpid())
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 10)
+            )
+
+        return _pools[key]
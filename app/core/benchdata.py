@@ -0,0 +1,216 @@
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, router, transaction
+
+from core.models import (
+    CollectionVersion, Ingredient, Recipe, Tag, normalize_name
+)
+from core.search import build_search_document, refresh_search_vectors
+from core.stats import rebuild_recipe_stats
+
+# Benchmark users are told apart from real ones by their email domain.
+BENCHMARK_EMAIL_DOMAIN = 'benchmark.invalid'
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+WORDS = (
+    'apple', 'basil', 'bean', 'beef', 'butter', 'carrot', 'cheese',
+    'chicken', 'chili', 'coconut', 'corn', 'curry', 'egg', 'fennel',
+    'garlic', 'ginger', 'honey', 'lamb', 'lemon', 'lentil', 'mint',
+    'mushroom', 'noodle', 'onion', 'pepper', 'pork', 'potato', 'rice',
+    'salmon', 'spinach', 'tofu', 'tomato',
+)
+
+
+def benchmark_users():
+    """Return the users created by seed_benchmark_data."""
+    return get_user_model().objects.filter(
+        email__endswith=f'@{BENCHMARK_EMAIL_DOMAIN}')
+
+
+def clear_benchmark_data(batch_size=1000):
+    """
+    Delete the benchmark users and everything they own. Their recipes,
+    tags, ingredients and relations are deleted with plain DELETEs, the
+    ORM would fetch and signal every one of the millions of rows first.
+    Nothing is left to invalidate, their users are deleted last.
+    """
+    user_ids = list(benchmark_users().values_list('id', flat=True))
+    for start in range(0, len(user_ids), batch_size):
+        chunk = user_ids[start:start + batch_size]
+        with transaction.atomic():
+            recipes = Recipe.objects.filter(user_id__in=chunk)
+            for through in (Recipe.tags.through,
+                            Recipe.ingredients.through):
+                delete_rows(through, 'recipe_id', recipes.values('id'))
+            for model in (Recipe, Tag, Ingredient):
+                delete_rows(model, 'user_id', chunk)
+
+    benchmark_users().delete()
+
+
+def seed_benchmark_data(recipes, recipes_per_user=100, tags_per_user=20,
+                        ingredients_per_user=50, tags_per_recipe=3,
+                        ingredients_per_recipe=5, seed=0, batch_size=1000,
+                        progress=None):
+    """
+    Create benchmark users owning recipes in total, with their tags and
+    ingredients, using bulk inserts so a million recipes stay feasible.
+
+    Bulk inserts skip save() and signals, so the normalized names,
+    search documents, collection versions and recipe rollups they
+    maintain are filled in here. progress is called with the recipes
+    created so far.
+    """
+    rng = random.Random(seed)
+    # Hashing is deliberately slow, every benchmark user shares one hash.
+    password = make_password(BENCHMARK_PASSWORD)
+    offset = benchmark_users().count()
+    user_count = -(-recipes // recipes_per_user)
+    users_per_chunk = max(1, batch_size // recipes_per_user)
+    created = 0
+
+    for start in range(0, user_count, users_per_chunk):
+        numbers = range(offset + start,
+                        offset + min(user_count, start + users_per_chunk))
+        chunk_recipes = [
+            min(recipes_per_user, recipes - (number - offset) *
+                recipes_per_user)
+            for number in numbers
+        ]
+        with transaction.atomic():
+            user_ids = create_users(numbers, password, batch_size)
+            tags = create_named(Tag, user_ids, tags_per_user, rng,
+                                batch_size)
+            ingredients = create_named(Ingredient, user_ids,
+                                       ingredients_per_user, rng,
+                                       batch_size)
+            create_recipes(
+                user_ids, chunk_recipes, tags, ingredients,
+                tags_per_recipe, ingredients_per_recipe, rng, batch_size)
+            rebuild_recipe_stats(user_ids)
+
+        created += sum(chunk_recipes)
+        if progress is not None:
+            progress(created)
+
+
+def create_users(numbers, password, batch_size):
+    """Create the numbered benchmark users, return their ids in order."""
+    emails = [f'user{number}@{BENCHMARK_EMAIL_DOMAIN}' for number in numbers]
+    get_user_model().objects.bulk_create(
+        [get_user_model()(email=email, fname='Benchmark', lname='User',
+                          password=password)
+         for email in emails],
+        batch_size=batch_size
+    )
+    ids = dict(get_user_model().objects.filter(
+        email__in=emails).values_list('email', 'id'))
+    CollectionVersion.objects.bulk_create(
+        [CollectionVersion(user_id=user_id) for user_id in ids.values()],
+        batch_size=batch_size
+    )
+
+    return [ids[email] for email in emails]
+
+
+def create_named(model, user_ids, count, rng, batch_size):
+    """Create count tags or ingredients per user, return their names."""
+    objects = []
+    for user_id in user_ids:
+        for number in range(count):
+            name = f'{rng.choice(WORDS)} {number}'
+            objects.append(model(user_id=user_id, name=name,
+                                 normalized_name=normalize_name(name)))
+    model.objects.bulk_create(objects, batch_size=batch_size)
+
+    names = {user_id: {} for user_id in user_ids}
+    for user_id, pk, name in model.objects.filter(
+            user_id__in=user_ids).values_list('user_id', 'id', 'name'):
+        names[user_id][pk] = name
+
+    return names
+
+
+def create_recipes(user_ids, counts, tags, ingredients, tags_per_recipe,
+                   ingredients_per_recipe, rng, batch_size):
+    """Create counts[i] recipes for user_ids[i] with random relations."""
+    recipes = []
+    relations = []
+    for user_id, count in zip(user_ids, counts):
+        user_tags = list(tags[user_id])
+        user_ingredients = list(ingredients[user_id])
+        for number in range(count):
+            tag_ids = rng.sample(
+                user_tags, min(tags_per_recipe, len(user_tags)))
+            ingredient_ids = rng.sample(
+                user_ingredients,
+                min(ingredients_per_recipe, len(user_ingredients)))
+            title = f'{rng.choice(WORDS)} {rng.choice(WORDS)} {number}'
+            # Same order as core.search.refresh_search_documents.
+            names = (sorted(tags[user_id][pk] for pk in tag_ids) +
+                     sorted(ingredients[user_id][pk]
+                            for pk in ingredient_ids))
+            recipes.append(Recipe(
+                user_id=user_id,
+                title=title,
+                time_minutes=rng.randint(5, 180),
+                price=Decimal(rng.randint(100, 5000)) / 100,
+                search_document=build_search_document(title, names)
+            ))
+            relations.append((tag_ids, ingredient_ids))
+
+    Recipe.objects.bulk_create(recipes, batch_size=batch_size)
+    refresh_search_vectors(Recipe.objects.filter(user_id__in=user_ids))
+    # The users are new, so their recipes come back in insertion order.
+    recipe_ids = Recipe.objects.filter(
+        user_id__in=user_ids).order_by('id').values_list('id', flat=True)
+
+    recipe_tags = []
+    recipe_ingredients = []
+    for recipe_id, (tag_ids, ingredient_ids) in zip(recipe_ids, relations):
+        recipe_tags.extend((recipe_id, tag_id) for tag_id in tag_ids)
+        recipe_ingredients.extend(
+            (recipe_id, ingredient_id) for ingredient_id in ingredient_ids)
+    insert_rows(Recipe.tags.through, ('recipe_id', 'tag_id'), recipe_tags,
+                batch_size)
+    insert_rows(Recipe.ingredients.through, ('recipe_id', 'ingredient_id'),
+                recipe_ingredients, batch_size)
+
+
+def insert_rows(model, columns, rows, batch_size):
+    """
+    Insert plain tuples into the table of model. Building a model
+    instance per row makes bulk_create several times slower for the
+    millions of relation rows of the larger scales.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns))
+    )
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(sql, rows[start:start + batch_size])
+
+
+def delete_rows(model, column, values):
+    """Delete the rows of model whose column is in values, skipping the ORM."""
+    connection = connections[router.db_for_write(model)]
+    if hasattr(values, 'query'):
+        subquery, params = values.query.sql_with_params()
+    else:
+        subquery, params = ', '.join(['%s'] * len(values)), values
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'DELETE FROM {} WHERE {} IN ({})'.format(
+                connection.ops.quote_name(model._meta.db_table),
+                connection.ops.quote_name(column),
+                subquery
+            ),
+            params
+        )
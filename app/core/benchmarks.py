@@ -0,0 +1,200 @@
+import statistics
+import random
+import time
+
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.benchdata import BENCHMARK_PASSWORD
+from core.metrics import RequestRecorder, record_queries
+from core.models import Ingredient, Recipe, Tag
+
+
+def summarize(timings):
+    """Return the mean and p50/p95/p99 of latencies in milliseconds."""
+    timings = sorted(timings)
+
+    def percentile(rank):
+        return timings[min(len(timings) - 1, len(timings) * rank // 100)]
+
+    return {
+        'mean': statistics.mean(timings),
+        'p50': percentile(50),
+        'p95': percentile(95),
+        'p99': percentile(99),
+    }
+
+
+def format_summary(label, timings):
+    """Return a one line latency summary for command output."""
+    summary = summarize(timings)
+    return (
+        f"{label:>10}: mean {summary['mean']:.2f}ms, "
+        f"p50 {summary['p50']:.2f}ms, p95 {summary['p95']:.2f}ms, "
+        f"p99 {summary['p99']:.2f}ms"
+    )
+
+
+def recipe_list(context, rng):
+    return 'get', reverse('recipe_app:recipe-list'), None
+
+
+def recipe_retrieve(context, rng):
+    return 'get', reverse('recipe_app:recipe-detail',
+                          args=[rng.choice(context['recipe_ids'])]), None
+
+
+def recipe_create(context, rng):
+    return 'post', reverse('recipe_app:recipe-list'), {
+        'title': 'Benchmark recipe',
+        'time_minutes': 30,
+        'price': '9.99',
+        'tags': rng.sample(context['tag_ids'],
+                           min(3, len(context['tag_ids']))),
+        'ingredients': rng.sample(context['ingredient_ids'],
+                                  min(5, len(context['ingredient_ids']))),
+    }
+
+
+def tag_list(context, rng):
+    return 'get', reverse('recipe_app:tag-list'), None
+
+
+def authenticate(context, rng):
+    return 'post', reverse('user_app:authenticate'), {
+        'email': context['user'].email,
+        'password': BENCHMARK_PASSWORD,
+    }
+
+
+# Request builder and expected status of every benchmarked endpoint.
+SCENARIOS = {
+    'recipe-list': (recipe_list, 200),
+    'recipe-retrieve': (recipe_retrieve, 200),
+    'recipe-create': (recipe_create, 201),
+    'tag-list': (tag_list, 200),
+    'auth': (authenticate, 200),
+}
+
+
+def user_context(user):
+    """Return what the scenarios need to build requests as user."""
+    token, _ = Token.objects.get_or_create(user=user)
+
+    def ids(model):
+        return list(model.objects.filter(user=user).order_by(
+            '-id').values_list('id', flat=True)[:1000])
+
+    return {
+        'user': user,
+        'token': token.key,
+        'recipe_ids': ids(Recipe),
+        'tag_ids': ids(Tag),
+        'ingredient_ids': ids(Ingredient),
+    }
+
+
+def run_benchmarks(users, scenarios, requests, host='localhost', seed=0):
+    """
+    Send requests requests per scenario through the test client, spread
+    over users, and return the throughput, latency and query counts of
+    each scenario. Recipes created by the benchmark are deleted again.
+    """
+    rng = random.Random(seed)
+    contexts = [user_context(user) for user in users]
+    client = Client(HTTP_HOST=host)
+    results = {}
+    created = []
+
+    # Login throttles would reject most of the auth requests.
+    with override_settings(LOGIN_RATE_LIMITS={'login_ip': None,
+                                              'login_email': None}):
+        for name in scenarios:
+            build, expected_status = SCENARIOS[name]
+            timings = []
+            recorders = []
+            errors = 0
+            started = time.perf_counter()
+            for number in range(requests):
+                context = contexts[number % len(contexts)]
+                method, url, data = build(context, rng)
+                recorder = RequestRecorder()
+                request_started = time.perf_counter()
+                with record_queries(recorder):
+                    response = send(client, method, url, data,
+                                    context['token'])
+                timings.append(
+                    (time.perf_counter() - request_started) * 1000)
+                recorders.append(recorder)
+
+                if response.status_code != expected_status:
+                    errors += 1
+                elif name == 'recipe-create':
+                    created.append(response.json()['id'])
+            elapsed = time.perf_counter() - started
+
+            results[name] = scenario_result(
+                timings, recorders, errors, elapsed)
+
+    Recipe.objects.filter(id__in=created).delete()
+    return results
+
+
+def send(client, method, url, data, token):
+    """Send one authenticated request, JSON encoding data if any."""
+    headers = {'HTTP_AUTHORIZATION': f'Token {token}'}
+    if data is None:
+        return getattr(client, method)(url, **headers)
+
+    return getattr(client, method)(
+        url, data, content_type='application/json', **headers)
+
+
+def scenario_result(timings, recorders, errors, elapsed):
+    """Return the JSON serializable result of one scenario."""
+    queries = [recorder.db_queries for recorder in recorders]
+    return {
+        'requests': len(timings),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(timings) / elapsed, 1),
+        'latency_ms': {key: round(value, 3)
+                       for key, value in summarize(timings).items()},
+        'queries': {
+            'mean': round(statistics.mean(queries), 2),
+            'max': max(queries),
+        },
+        'db_ms': round(statistics.mean(
+            recorder.db_seconds for recorder in recorders) * 1000, 3),
+    }
+
+
+def percent_change(current, previous):
+    if not previous:
+        return 'n/a'
+
+    return f'{(current - previous) / previous * 100:+.1f}%'
+
+
+def compare_results(baseline, results):
+    """
+    Return a line per scenario in both results with the change of its
+    throughput, p99 latency and mean query count.
+    """
+    lines = []
+    for name, result in results['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+
+        throughput = percent_change(result['throughput'], before['throughput'])
+        p99 = percent_change(result['latency_ms']['p99'],
+                             before['latency_ms']['p99'])
+        lines.append(
+            f"{name:>16}: throughput {throughput}, p99 {p99}, queries "
+            f"{before['queries']['mean']} -> {result['queries']['mean']}"
+        )
+
+    return lines
@@ -0,0 +1,34 @@
+from django.db import connections, router
+
+
+def bulk_create_with_pks(model, objs, batch_size=None):
+    """
+    Insert objs with as few queries as possible, making sure every
+    object has its primary key set afterwards.
+
+    Backends that can't return ids from a multi row INSERT (SQLite on
+    this Django version) fall back to one INSERT per object. Like
+    bulk_create, neither path calls save() or sends model signals.
+    """
+    db = router.db_for_write(model)
+    if connections[db].features.can_return_rows_from_bulk_insert:
+        return model.objects.using(db).bulk_create(
+            objs, batch_size=batch_size)
+
+    opts = model._meta
+    fields = [field for field in opts.local_concrete_fields
+              if field is not opts.auto_field]
+    returning_fields = opts.db_returning_fields
+    for obj in objs:
+        row = model._base_manager._insert(
+            [obj],
+            fields=fields,
+            returning_fields=returning_fields,
+            using=db
+        )
+        for value, field in zip(row[0], returning_fields):
+            setattr(obj, field.attname, value)
+        obj._state.adding = False
+        obj._state.db = db
+
+    return objs
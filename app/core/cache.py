@@ -0,0 +1,53 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Small thread-safe in-process cache that evicts the least recently
+    used entry once `max_size` is reached and expires entries older
+    than `ttl` seconds.
+    """
+
+    def __init__(self, max_size=1024, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing/expired."""
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                return default
+
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache value under key, evicting the oldest entry if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
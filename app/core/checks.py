@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+# Cache backends that are never shared between processes.
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register()
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Require replica pins to be kept in a cache every process shares."""
+    if not settings.DATABASE_REPLICAS:
+        return []
+
+    alias = settings.DATABASE_REPLICA_PIN['CACHE']
+    if settings.CACHES[alias]['BACKEND'] in LOCAL_CACHE_BACKENDS:
+        return [Error(
+            f"The replica pin cache '{alias}' isn't shared between "
+            f"processes, so users may not see their own writes.",
+            hint='Set CACHE_BACKEND and CACHE_LOCATION to a shared cache '
+                 'such as Memcached when using DB_REPLICA_HOSTS.',
+            id='core.E001',
+        )]
+
+    return []
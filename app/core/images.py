@@ -0,0 +1,264 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import (
+    SkipFile, TemporaryFileUploadHandler
+)
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from PIL import Image, ImageOps
+
+from core.models import Recipe, RecipeImage
+from core.versions import bump_collection_version
+
+# File extension of the originals of each accepted format.
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler streaming each file to a temporary file in chunks,
+    hashing it on the way, so uploads are never held in memory. The
+    hex SHA-256 is set as the sha256 attribute of the uploaded file.
+    Files over max_bytes are skipped and too_large is set.
+    """
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hash = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.max_bytes is not None and self.received > self.max_bytes:
+            self.too_large = True
+            raise SkipFile()
+
+        self.hash.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.hash.hexdigest()
+        return upload
+
+
+def original_name(image):
+    """Return the storage name of the uploaded image."""
+    sha256 = image.sha256
+    return (f'recipes/{image.user_id}/{sha256[:2]}/'
+            f'{sha256}.{EXTENSIONS[image.format]}')
+
+
+def thumbnail_name(image, size):
+    """Return the storage name of one of the thumbnails of the image."""
+    sha256 = image.sha256
+    return f'recipes/{image.user_id}/{sha256[:2]}/{sha256}-{size}.jpg'
+
+
+def delete_image_files(image):
+    """Delete the original and every thumbnail of an image."""
+    default_storage.delete(original_name(image))
+    for size in settings.RECIPE_IMAGES['SIZES']:
+        default_storage.delete(thumbnail_name(image, size))
+
+
+def image_url(image, size='original'):
+    """
+    Return the URL of the image at a size of RECIPE_IMAGES['SIZES'], or
+    of the original until its thumbnails are generated.
+    """
+    if size == 'original' or not image.thumbnails_ready:
+        return default_storage.url(original_name(image))
+
+    return default_storage.url(thumbnail_name(image, size))
+
+
+def inspect_image(upload):
+    """
+    Return the format, width and height of an uploaded image, raising
+    ValidationError unless it is an accepted image within the limits.
+
+    The header is checked first, then images within the limits are fully
+    decoded, as verify() doesn't notice truncated data.
+    """
+    limits = settings.RECIPE_IMAGES
+    try:
+        with Image.open(upload) as image:
+            image_format, (width, height) = image.format, image.size
+            image.verify()
+    except Exception:
+        # Pillow raises many kinds of errors for broken or unknown files.
+        raise ValidationError('Upload a valid image.')
+
+    if image_format not in limits['FORMATS']:
+        raise ValidationError(
+            f"Images must be one of: {', '.join(limits['FORMATS'])}.")
+    if width * height > limits['MAX_PIXELS']:
+        raise ValidationError(
+            f"Images are limited to {limits['MAX_PIXELS']} pixels.")
+
+    upload.seek(0)
+    try:
+        with Image.open(upload) as image:
+            # JPEGs still read every byte when decoded at reduced scale.
+            image.draft('RGB', (1, 1))
+            image.load()
+    except Exception:
+        raise ValidationError('Upload a valid image.')
+
+    return image_format, width, height
+
+
+def store_image(user, upload):
+    """
+    Return the user's RecipeImage of a file uploaded with
+    HashingUploadHandler, creating it unless the user uploaded the same
+    content before. Images are never shared between users.
+
+    New images are moved to storage in the transaction creating them, so
+    a concurrent upload of the same content waiting on that row finds
+    the file written, and their thumbnails enqueued once it commits.
+    """
+    image_format, width, height = inspect_image(upload)
+    with transaction.atomic():
+        image, created = RecipeImage.objects.get_or_create(
+            user=user,
+            sha256=upload.sha256,
+            defaults={
+                'format': image_format,
+                'width': width,
+                'height': height,
+                'size': upload.size,
+            }
+        )
+        if created:
+            name = original_name(image)
+            # Storage would pick another name over a file left behind.
+            default_storage.delete(name)
+            upload.seek(0)
+            default_storage.save(name, upload)
+            transaction.on_commit(lambda: enqueue_thumbnails(image.pk))
+
+    return image
+
+
+def flatten(image):
+    """Return the image in RGB, transparent areas on white."""
+    if image.mode in ('RGBA', 'LA') or (
+            image.mode == 'P' and 'transparency' in image.info):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+
+    return image.convert('RGB')
+
+
+def generate_thumbnails(image_id):
+    """
+    Write the JPEG thumbnails of every size of RECIPE_IMAGES['SIZES'],
+    and mark the image as ready. The recipes using it are marked as
+    changed, as their details now link to the thumbnails.
+    """
+    image = RecipeImage.objects.get(pk=image_id)
+    sizes = sorted(settings.RECIPE_IMAGES['SIZES'].items(),
+                   key=lambda item: item[1], reverse=True)
+
+    with default_storage.open(original_name(image)) as original:
+        with Image.open(original) as source:
+            # Let JPEGs decode at a reduced scale close to the largest
+            # thumbnail instead of at full resolution.
+            source.draft('RGB', (sizes[0][1], sizes[0][1]))
+            thumbnail = flatten(ImageOps.exif_transpose(source))
+
+    # Each size is scaled down from the previous, larger one.
+    for size, pixels in sizes:
+        thumbnail.thumbnail((pixels, pixels))
+        content = BytesIO()
+        thumbnail.save(content, 'JPEG', quality=85, optimize=True)
+
+        name = thumbnail_name(image, size)
+        default_storage.delete(name)
+        default_storage.save(name, ContentFile(content.getvalue()))
+
+    RecipeImage.objects.filter(pk=image_id).update(
+        thumbnails_ready=True, thumbnails_failed=False)
+
+    recipes = Recipe.objects.filter(image_id=image_id)
+    user_ids = set(recipes.values_list('user_id', flat=True))
+    recipes.update(updated_at=timezone.now())
+    for user_id in user_ids:
+        bump_collection_version(user_id)
+
+
+def get_thumbnail_executor():
+    """Return the thread pool generating thumbnails in the background."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECIPE_IMAGES['THREADS'],
+                thread_name_prefix='thumbnails'
+            )
+
+        return _executor
+
+
+def mark_thumbnails_failed(image_id):
+    """Record that the thumbnails of an image couldn't be generated."""
+    RecipeImage.objects.filter(pk=image_id).update(thumbnails_failed=True)
+
+
+def run_thumbnail_task(image_id):
+    """
+    Generate thumbnails on a pool thread, managing its connections.
+    Failures are logged and marked on the image, as nothing waits for
+    the task.
+    """
+    close_old_connections()
+    try:
+        generate_thumbnails(image_id)
+    except Exception:
+        logger.exception(
+            'Generating the thumbnails of image %s failed', image_id)
+        mark_thumbnails_failed(image_id)
+    finally:
+        close_old_connections()
+
+
+def shutdown_thumbnail_executor():
+    """Wait for the queued thumbnails, e.g. before a worker exits."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def enqueue_thumbnails(image_id):
+    """
+    Generate the thumbnails of an image on the thumbnail pool. Images
+    whose thumbnails are lost, e.g. to a crash, stay not ready until
+    the generate_thumbnails command runs.
+    """
+    return get_thumbnail_executor().submit(run_thumbnail_task, image_id)
@@ -0,0 +1,274 @@
+import csv
+import io
+import json
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import connections, router, transaction
+
+from core.bulk import bulk_create_with_pks
+from core.models import Tag, Ingredient, Recipe, normalize_name
+from core.names import get_or_create_named
+from core.search import build_search_document, refresh_search_vectors
+from core.stats import (
+    adjust_recipe_counts, apply_recipe_changes, recipe_values
+)
+from core.versions import bump_collection_version
+
+IMPORT_FORMATS = ('ndjson', 'csv')
+
+# Separator of the tag and ingredient names within a CSV cell, matching
+# the recipe export.
+CSV_NAME_SEPARATOR = '|'
+
+# At most this many row errors are kept in the report.
+MAX_REPORTED_ERRORS = 100
+
+
+def find_undecodable_line(lines, encoding='utf-8'):
+    """
+    Return the number of the first line of bytes that can't be decoded,
+    or None, so files can be rejected before any batch is imported.
+    """
+    for number, line in enumerate(lines, start=1):
+        try:
+            line.decode(encoding)
+        except UnicodeDecodeError:
+            return number
+
+    return None
+
+
+def parse_ndjson(lines):
+    """Yield (line number, record) for every non blank NDJSON line."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, exc
+
+
+def parse_csv(lines):
+    """Yield (line number, record) for every CSV row after the header."""
+    reader = csv.DictReader(lines)
+    for record in reader:
+        for field in ('tags', 'ingredients'):
+            value = record.get(field) or ''
+            record[field] = [name for name in value.split(CSV_NAME_SEPARATOR)
+                             if name]
+        yield reader.line_num, record
+
+
+PARSERS = {
+    'ndjson': parse_ndjson,
+    'csv': parse_csv,
+}
+
+
+class RecipeImporter:
+    """
+    Import recipes for a user from NDJSON or CSV lines, in the format
+    written by the recipe export.
+
+    Records are read incrementally and written one batch at a time, each
+    batch in its own transaction. Tags and ingredients are looked up by
+    normalized name in a per user name -> id map, and missing ones are
+    created once per batch. Recipes are inserted with bulk_create, and
+    their through rows with COPY on Postgres or bulk_create elsewhere.
+    """
+
+    def __init__(self, user, batch_size=1000, progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.progress = progress
+        self.tag_ids = dict(Tag.objects.filter(
+            user=user).values_list('normalized_name', 'id'))
+        self.ingredient_ids = dict(Ingredient.objects.filter(
+            user=user).values_list('normalized_name', 'id'))
+        self.report = {
+            'rows': 0,
+            'recipes': 0,
+            'tags': 0,
+            'ingredients': 0,
+            'errors': [],
+            'seconds': 0.0,
+            'recipes_per_second': 0.0,
+        }
+
+    def run(self, lines, file_format):
+        """Import every record in lines and return the report."""
+        started = time.monotonic()
+        records = PARSERS[file_format](lines)
+
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+
+            self.import_batch(batch)
+            self.report['seconds'] = time.monotonic() - started
+            if self.report['seconds']:
+                self.report['recipes_per_second'] = (
+                    self.report['recipes'] / self.report['seconds'])
+            if self.progress is not None:
+                self.progress(self.report)
+
+        if self.report['recipes']:
+            bump_collection_version(self.user.id)
+
+        return self.report
+
+    def import_batch(self, batch):
+        """Validate and insert one batch of (line number, record) pairs."""
+        recipes, relations = [], []
+        for number, record in batch:
+            self.report['rows'] += 1
+            try:
+                recipe, tags, ingredients = self.build_recipe(record)
+            except ValidationError as exc:
+                self.add_error(number, exc)
+                continue
+            recipes.append(recipe)
+            relations.append((tags, ingredients))
+
+        if not recipes:
+            return
+
+        with transaction.atomic():
+            self.report['tags'] += self.create_missing(
+                Tag, self.tag_ids, [tags for tags, _ in relations])
+            self.report['ingredients'] += self.create_missing(
+                Ingredient, self.ingredient_ids,
+                [ingredients for _, ingredients in relations])
+
+            bulk_create_with_pks(
+                Recipe, recipes, batch_size=self.batch_size)
+            tag_rows = [
+                (recipe.id, self.tag_ids[normalize_name(name)])
+                for recipe, (tags, _) in zip(recipes, relations)
+                for name in tags
+            ]
+            ingredient_rows = [
+                (recipe.id, self.ingredient_ids[normalize_name(name)])
+                for recipe, (_, ingredients) in zip(recipes, relations)
+                for name in ingredients
+            ]
+            copy_rows(Recipe.tags.through, 'tag_id', tag_rows)
+            copy_rows(Recipe.ingredients.through, 'ingredient_id',
+                      ingredient_rows)
+
+            # Bulk inserts skip the signals maintaining the rollups and
+            # search vectors.
+            refresh_search_vectors(Recipe.objects.filter(
+                id__in=[recipe.id for recipe in recipes]))
+            apply_recipe_changes(
+                self.user.id,
+                [(None, recipe_values(recipe)) for recipe in recipes]
+            )
+            adjust_recipe_counts(
+                Tag, Counter(tag_id for _, tag_id in tag_rows))
+            adjust_recipe_counts(
+                Ingredient,
+                Counter(ingredient_id for _, ingredient_id in ingredient_rows)
+            )
+
+        self.report['recipes'] += len(recipes)
+
+    def build_recipe(self, record):
+        """Return an unsaved recipe and its tag and ingredient names."""
+        if isinstance(record, Exception):
+            raise ValidationError(f'Invalid record: {record}')
+        if not isinstance(record, dict):
+            raise ValidationError('Each record must be an object.')
+
+        try:
+            price = Decimal(str(record.get('price')))
+        except InvalidOperation:
+            raise ValidationError('price: A valid number is required.')
+
+        recipe = Recipe(
+            user=self.user,
+            title=record.get('title') or '',
+            time_minutes=record.get('time_minutes'),
+            price=price,
+            link=record.get('link') or ''
+        )
+        recipe.clean_fields(exclude=['user'])
+
+        names = []
+        for field in ('tags', 'ingredients'):
+            value = record.get(field) or []
+            if not isinstance(value, list):
+                raise ValidationError(f'{field}: Must be a list of names.')
+            # Keep the first spelling of each name only, through rows are
+            # unique.
+            unique = {}
+            for name in value:
+                name = str(name).strip()
+                if name:
+                    unique.setdefault(normalize_name(name), name)
+            value = list(unique.values())
+            if any(len(name) > 255 for name in value):
+                raise ValidationError(
+                    f'{field}: Names must be at most 255 characters.')
+            names.append(value)
+
+        recipe.search_document = build_search_document(
+            recipe.title, sorted(names[0]) + sorted(names[1]))
+
+        return recipe, names[0], names[1]
+
+    def create_missing(self, model, ids_by_name, name_lists):
+        """Create the named objects missing from ids_by_name."""
+        missing = [name for names in name_lists for name in names
+                   if normalize_name(name) not in ids_by_name]
+        if not missing:
+            return 0
+
+        objects, created = get_or_create_named(
+            model, self.user, missing, batch_size=self.batch_size)
+        ids_by_name.update((key, obj.id) for key, obj in objects.items())
+
+        return len(created)
+
+    def add_error(self, number, exc):
+        """Record why the record on line number was skipped."""
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({
+                'line': number,
+                'errors': (exc.message_dict if hasattr(exc, 'error_dict')
+                           else exc.messages)
+            })
+
+
+def copy_rows(through, field, rows):
+    """
+    Insert (recipe_id, related_id) rows into a through table, streaming
+    them with COPY on Postgres.
+    """
+    if not rows:
+        return
+
+    connection = connections[router.db_for_write(through)]
+    if connection.vendor != 'postgresql':
+        through.objects.bulk_create(
+            [through(recipe_id=recipe_id, **{field: related_id})
+             for recipe_id, related_id in rows],
+            batch_size=1000
+        )
+        return
+
+    quote = connection.ops.quote_name
+    buffer = io.StringIO(''.join(
+        f'{recipe_id}\t{related_id}\n' for recipe_id, related_id in rows))
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(through._meta.db_table)} '
+            f'({quote("recipe_id")}, {quote(field)}) FROM STDIN',
+            buffer
+        )
@@ -0,0 +1,87 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.benchdata import benchmark_users
+from core.benchmarks import SCENARIOS, compare_results, run_benchmarks
+from core.models import Ingredient, Recipe, Tag
+
+
+class Command(BaseCommand):
+    """Command to benchmark the API against seeded benchmark data"""
+
+    help = ('Drive the list, retrieve, create and auth endpoints through '
+            'the test client and report throughput, p50/p99 latency and '
+            'query counts as JSON. Run seed_benchmark_data first.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per scenario.')
+        parser.add_argument('--users', type=int, default=10,
+                            help='Benchmark users to spread requests over.')
+        parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS,
+                            default=list(SCENARIOS))
+        parser.add_argument('--host', default='localhost',
+                            help='Host header, must be in ALLOWED_HOSTS.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--label', default='',
+                            help='Free text stored with the results.')
+        parser.add_argument('--output', help='File to write the JSON to.')
+        parser.add_argument('--baseline',
+                            help='JSON of an earlier run to compare with.')
+
+    def handle(self, *args, **options):
+        users = list(benchmark_users().order_by('id')[:options['users']])
+        if not users:
+            raise CommandError('No benchmark data, run '
+                               'seed_benchmark_data first.')
+
+        results = {
+            'label': options['label'],
+            'commit': current_commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections[DEFAULT_DB_ALIAS].vendor,
+            'scale': {
+                'users': benchmark_users().count(),
+                'recipes': Recipe.objects.filter(
+                    user__in=benchmark_users()).count(),
+                'tags': Tag.objects.filter(
+                    user__in=benchmark_users()).count(),
+                'ingredients': Ingredient.objects.filter(
+                    user__in=benchmark_users()).count(),
+            },
+            'scenarios': run_benchmarks(
+                users, options['scenarios'], options['requests'],
+                host=options['host'], seed=options['seed']),
+        }
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+        else:
+            self.stdout.write(output)
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            for line in compare_results(baseline, results):
+                self.stderr.write(line)
+
+
+def current_commit():
+    """Return the git commit of the code being benchmarked, if known."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, check=True,
+            text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
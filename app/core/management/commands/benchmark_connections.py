@@ -0,0 +1,83 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.test import Client
+
+from rest_framework.authtoken.models import Token
+
+from core.benchmarks import format_summary
+
+# Connection settings compared by the benchmark.
+MODES = {
+    'none': {'CONN_MAX_AGE': 0, 'POOL': None},
+    'persistent': {'CONN_MAX_AGE': 600, 'POOL': None},
+    'pool': {'CONN_MAX_AGE': 0, 'POOL': {'MAX_SIZE': 4, 'TIMEOUT': 10}},
+}
+
+
+class Command(BaseCommand):
+    """Command to compare request latency across connection settings"""
+
+    help = ('Time requests to an endpoint with new, persistent and pooled '
+            'database connections.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True,
+                            help='Email of the user making the requests.')
+        parser.add_argument('--url', default='/api/recipe/tags/')
+        parser.add_argument('--host', default='localhost',
+                            help='Host header, must be in ALLOWED_HOSTS.')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(
+            HTTP_HOST=options['host'],
+            HTTP_AUTHORIZATION=f'Token {token.key}'
+        )
+        connection = connections[DEFAULT_DB_ALIAS]
+        if ('pool' in options['modes'] and
+                connection.settings_dict['ENGINE'] !=
+                'core.backends.postgresql'):
+            raise CommandError('The pool mode needs the '
+                               'core.backends.postgresql engine.')
+
+        original = {key: connection.settings_dict.get(key) for key in
+                    ('CONN_MAX_AGE', 'POOL')}
+        try:
+            for mode in options['modes']:
+                connection.close()
+                connection.settings_dict.update(MODES[mode])
+                timings = self.time_requests(
+                    client, options['url'], options['requests'])
+                self.stdout.write(format_summary(mode, timings))
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+
+    def time_requests(self, client, url, count):
+        """Return the latency of count requests in milliseconds."""
+        timings = []
+        for _ in range(count):
+            # The test client doesn't close connections between requests
+            # like a WSGI server would, so do it here.
+            close_old_connections()
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            close_old_connections()
+
+            if response.status_code != 200:
+                raise CommandError(
+                    f'{url} returned {response.status_code}')
+
+        return timings
@@ -0,0 +1,78 @@
+import io
+import random
+import time
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import format_summary
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+
+
+class Command(BaseCommand):
+    """Command to compare JSON rendering and parsing throughput"""
+
+    help = ('Time rendering and parsing a page of recipes, shaped like '
+            'the recipe list, with DRF\'s JSON renderer and parser and '
+            'the orjson based ones.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000,
+                            help='Recipes in the payload.')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write('orjson is not installed, the fast renderer '
+                              'and parser fall back to the stdlib.')
+
+        data = sample_recipes(options['recipes'])
+        body = JSONRenderer().render(data)
+        self.stdout.write(
+            f"{options['recipes']} recipes, {len(body) / 1e6:.1f} MB")
+
+        for label, render in (('drf', JSONRenderer().render),
+                              ('fast', FastJSONRenderer().render)):
+            self.report(f'render {label}', lambda: render(data),
+                        options['recipes'], len(body), options['repeat'])
+
+        for label, parser in (('drf', JSONParser()),
+                              ('fast', FastJSONParser())):
+            self.report(f'parse {label}',
+                        lambda: parser.parse(io.BytesIO(body)),
+                        options['recipes'], len(body), options['repeat'])
+
+    def report(self, label, func, recipes, size, repeat):
+        """Time repeat calls of func and write the throughput."""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        seconds = sum(timings) / 1000
+        self.stdout.write(format_summary(label, timings))
+        self.stdout.write(
+            f'{"":>10}  {recipes * repeat / seconds:,.0f} recipes/s, '
+            f'{size * repeat / seconds / 1e6:.1f} MB/s')
+
+
+def sample_recipes(count, seed=0):
+    """Return recipes as RecipeSerializer renders them in lists."""
+    rng = random.Random(seed)
+    return [
+        OrderedDict([
+            ('id', pk),
+            ('title', f'Recipe {pk} with caf\xe9 au lait'),
+            ('time_minutes', rng.randint(5, 180)),
+            ('price', f'{rng.randint(100, 5000) / 100:.2f}'),
+            ('link', f'https://example.com/recipes/{pk}'),
+            ('ingredients', rng.sample(range(1, 500), 5)),
+            ('tags', rng.sample(range(1, 100), 3)),
+        ])
+        for pk in range(count, 0, -1)
+    ]
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import RecipeImage
+
+
+class Command(BaseCommand):
+    """Command to delete the recipe images no recipe uses"""
+
+    help = ('Delete the recipe images no recipe uses any more, e.g. once '
+            'replaced, along with their files.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600,
+                            help='Keep images uploaded less than this many '
+                                 'seconds ago, which may be about to be '
+                                 'used.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options['min_age'])
+        # post_delete is still sent for each image, deleting its files.
+        _, deleted = RecipeImage.objects.filter(
+            recipes__isnull=True, created_at__lt=cutoff).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted.get(RecipeImage._meta.label, 0)} unused "
+            f"images"))
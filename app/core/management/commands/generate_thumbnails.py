@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from core.images import generate_thumbnails, mark_thumbnails_failed
+from core.models import RecipeImage
+
+
+class Command(BaseCommand):
+    """Command to generate missing recipe image thumbnails"""
+
+    help = ('Generate the thumbnails of recipe images that are not ready, '
+            'e.g. when a worker restarted before its pool got to them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Regenerate the thumbnails of every image, '
+                                 'e.g. after changing the sizes.')
+
+    def handle(self, *args, **options):
+        images = RecipeImage.objects.order_by('id')
+        if not options['all']:
+            images = images.filter(thumbnails_ready=False)
+
+        generated = failed = 0
+        for image_id in list(images.values_list('id', flat=True)):
+            # One broken original mustn't keep the others waiting.
+            try:
+                generate_thumbnails(image_id)
+            except Exception as exc:
+                mark_thumbnails_failed(image_id)
+                self.stderr.write(f'Image {image_id} failed: {exc!r}')
+                failed += 1
+            else:
+                generated += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated the thumbnails of {generated} images'))
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'Failed to generate the thumbnails of {failed} images'))
@@ -0,0 +1,61 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importer import (
+    IMPORT_FORMATS, RecipeImporter, find_undecodable_line
+)
+
+
+class Command(BaseCommand):
+    """Command to import a NDJSON or CSV recipe file for a user"""
+
+    help = 'Import recipes, creating missing tags and ingredients by name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='NDJSON or CSV file to import.')
+        parser.add_argument('--email', required=True,
+                            help='Email of the user owning the recipes.')
+        parser.add_argument('--format', choices=IMPORT_FORMATS,
+                            help='File format, guessed from the extension '
+                                 'when not given.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email=options['email'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['email']}")
+
+        file_format = options['format'] or os.path.splitext(
+            options['path'])[1].lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError('Unable to guess the format, use --format')
+
+        with open(options['path'], 'rb') as lines:
+            line = find_undecodable_line(lines)
+        if line is not None:
+            raise CommandError(f'Line {line} is not valid UTF-8')
+
+        importer = RecipeImporter(
+            user,
+            batch_size=options['batch_size'],
+            progress=self.write_progress
+        )
+        with open(options['path'], encoding='utf-8', newline='') as lines:
+            report = importer.run(lines, file_format)
+
+        for error in report['errors']:
+            self.stderr.write(f"Line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['recipes']} recipes, {report['tags']} new "
+            f"tags and {report['ingredients']} new ingredients in "
+            f"{report['seconds']:.1f}s"
+        ))
+
+    def write_progress(self, report):
+        self.stdout.write(
+            f"{report['rows']} rows read, {report['recipes']} recipes "
+            f"imported ({report['recipes_per_second']:.0f} recipes/s)"
+        )
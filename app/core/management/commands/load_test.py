@@ -0,0 +1,86 @@
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import format_summary
+
+
+class Command(BaseCommand):
+    """Command to load test a running server with slow concurrent clients"""
+
+    help = ('Send concurrent GET requests to a running server and report '
+            'throughput and latency. Compare e.g. /api/recipe/recipes/ '
+            'with /api/recipe/async/recipes/ under uvicorn.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help='http:// URL to request.')
+        parser.add_argument('--token', help='API token to authenticate.')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=100)
+        parser.add_argument('--client-delay', type=float, default=0.0,
+                            help='Seconds each client waits between '
+                                 'sending its request line and headers, '
+                                 'like a slow mobile client.')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http':
+            raise CommandError('Only http:// URLs are supported.')
+
+        started = time.perf_counter()
+        results = asyncio.get_event_loop().run_until_complete(
+            self.run_clients(url, options))
+        elapsed = time.perf_counter() - started
+
+        timings = [timing for status, timing in results if status == 200]
+        failures = len(results) - len(timings)
+        self.stdout.write(
+            f'{len(results)} requests in {elapsed:.2f}s, '
+            f'{len(results) / elapsed:.1f} requests/s, {failures} failed')
+        if timings:
+            self.stdout.write(format_summary('latency', timings))
+
+    async def run_clients(self, url, options):
+        """Return (status, milliseconds) of every request."""
+        slots = asyncio.Semaphore(options['concurrency'])
+        head = f'GET {url.path or "/"}'
+        if url.query:
+            head += f'?{url.query}'
+        headers = [f'Host: {url.netloc}', 'Connection: close']
+        if options['token']:
+            headers.append(f"Authorization: Token {options['token']}")
+
+        async def client():
+            async with slots:
+                return await fetch(
+                    url.hostname, url.port or 80, f'{head} HTTP/1.1\r\n',
+                    ''.join(f'{header}\r\n' for header in headers) + '\r\n',
+                    options['client_delay']
+                )
+
+        return await asyncio.gather(
+            *(client() for _ in range(options['requests'])))
+
+
+async def fetch(host, port, request_line, headers, delay):
+    """Send one request over a new connection, return its status and time."""
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(request_line.encode('latin-1'))
+        if delay:
+            await writer.drain()
+            await asyncio.sleep(delay)
+        writer.write(headers.encode('latin-1'))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        await reader.read()
+        writer.close()
+        status = int(status_line.split()[1])
+    except (OSError, IndexError, ValueError):
+        status = None
+
+    return status, (time.perf_counter() - started) * 1000
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe
+from core.names import renormalize_names
+from core.search import refresh_search_documents
+from core.stats import refresh_recipe_counts
+
+NAMED_MODELS = (
+    (Tag, Recipe.tags.through, 'tag_id'),
+    (Ingredient, Recipe.ingredients.through, 'ingredient_id'),
+)
+
+
+class Command(BaseCommand):
+    """Command to merge tags and ingredients sharing a normalized name"""
+
+    help = ('Recompute normalized tag and ingredient names, merging the '
+            'duplicates of each user and moving their recipes over.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of users processed at a time.')
+
+    def handle(self, *args, **options):
+        for model, through, field in NAMED_MODELS:
+            with transaction.atomic():
+                merged, recipe_ids = renormalize_names(
+                    model, through, field, options['batch_size'])
+                # Merging bypasses the relation signals, so refresh the
+                # recipes showing a merged name here.
+                Recipe.objects.filter(id__in=recipe_ids).update(
+                    updated_at=timezone.now())
+                refresh_search_documents(recipe_ids)
+                refresh_recipe_counts(
+                    through, field,
+                    through.objects.filter(
+                        recipe_id__in=recipe_ids).values(field)
+                )
+
+            self.stdout.write(self.style.SUCCESS(
+                f'Merged {merged} duplicate '
+                f'{model._meta.verbose_name_plural}, '
+                f'{len(recipe_ids)} recipes updated'
+            ))
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from core.stats import rebuild_recipe_stats
+
+
+class Command(BaseCommand):
+    """Command to recompute the recipe rollups from the recipes"""
+
+    help = ('Rebuild the recipe statistics of every user and the recipe '
+            'counts of their tags and ingredients, e.g. after writing '
+            'recipes outside of the API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Number of users rebuilt at a time.')
+
+    def handle(self, *args, **options):
+        user_ids = list(get_user_model().objects.order_by(
+            'id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, len(user_ids), batch_size):
+            rebuild_recipe_stats(user_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt the recipe statistics of {len(user_ids)} users'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.benchdata import clear_benchmark_data, seed_benchmark_data
+
+
+class Command(BaseCommand):
+    """Command to create synthetic data for benchmark_api"""
+
+    help = ('Create benchmark users with recipes, tags and ingredients, '
+            'from a thousand up to millions of recipes.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=1000,
+                            help='Total recipes to create.')
+        parser.add_argument('--recipes-per-user', type=int, default=100)
+        parser.add_argument('--tags-per-user', type=int, default=20)
+        parser.add_argument('--ingredients-per-user', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete existing benchmark users first.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            clear_benchmark_data()
+            self.stdout.write('Deleted the existing benchmark data')
+
+        def progress(created):
+            self.stdout.write(f"Created {created}/{options['recipes']} "
+                              f"recipes")
+
+        seed_benchmark_data(
+            options['recipes'],
+            recipes_per_user=options['recipes_per_user'],
+            tags_per_user=options['tags_per_user'],
+            ingredients_per_user=options['ingredients_per_user'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            progress=progress
+        )
+        self.stdout.write(self.style.SUCCESS('Benchmark data created'))
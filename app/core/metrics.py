@@ -0,0 +1,218 @@
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+from rest_framework import serializers
+
+# Upper bounds of the histogram buckets of each per request measurement.
+BUCKETS = {
+    'duration_seconds': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                         2.5, 5.0, 10.0),
+    'db_queries': (0, 1, 2, 5, 10, 20, 50, 100, 200, 500),
+    'db_seconds': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0),
+    'serializer_seconds': (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                           0.5, 1.0, 2.5),
+    'response_bytes': (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                       4194304, 16777216),
+}
+
+HELP = {
+    'duration_seconds': 'Time spent handling the request.',
+    'db_queries': 'Database queries made by the request.',
+    'db_seconds': 'Time spent in database queries.',
+    'serializer_seconds': 'Time spent building serializer data.',
+    'response_bytes': 'Size of the response body.',
+}
+
+# Measurements of the request being handled, if it is sampled.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+class RequestRecorder:
+    """
+    Measurements of one request. Also an execute wrapper counting the
+    queries it runs, see record_current_request and record_queries.
+    """
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.db_queries += 1
+
+
+def record_current_request(execute, sql, params, many, context):
+    """
+    Execute wrapper counting a query towards current_recorder, if set.
+    The recorder follows the request's context into whichever thread
+    runs its view, e.g. through sync_to_async or pooled_async_view.
+    """
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Add record_current_request to a new database connection."""
+    if record_current_request not in connection.execute_wrappers:
+        # First, as execute_wrapper() blocks pop the last wrapper.
+        connection.execute_wrappers.insert(0, record_current_request)
+
+
+@contextmanager
+def record_queries(recorder):
+    """Count the queries the current thread runs on every database."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+@contextmanager
+def record_serializer_time():
+    """Add the time spent in the block to the current request, if any."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.serializer_seconds += time.perf_counter() - started
+
+
+class TimedListSerializer(serializers.ListSerializer):
+    """List serializer recording the time spent building its data."""
+
+    @property
+    def data(self):
+        with record_serializer_time():
+            return super().data
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin recording the time spent building its data. Set
+    Meta.list_serializer_class to TimedListSerializer to time many=True
+    serializers too.
+    """
+
+    @property
+    def data(self):
+        with record_serializer_time():
+            return super().data
+
+
+class Histogram:
+    """Cumulative histogram with fixed bucket upper bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    In-process, thread-safe aggregate of the measurements of every
+    sampled request, per view and method. Each worker process keeps its
+    own registry, so every series is labelled with the pid of the
+    process and a scrape only reflects the worker that answered it;
+    aggregate the series across pids, e.g. sum by (view).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.histograms = {}
+            self.requests = {}
+
+    def observe(self, view, method, status_code, values):
+        """Record the measurements of one request."""
+        labels = (view, method)
+        with self._lock:
+            histograms = self.histograms.get(labels)
+            if histograms is None:
+                histograms = self.histograms[labels] = {
+                    name: Histogram(buckets)
+                    for name, buckets in BUCKETS.items()
+                }
+            for name, value in values.items():
+                histograms[name].observe(value)
+
+            key = labels + (f'{status_code // 100}xx',)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def render(self, sample_rate):
+        """Return the metrics in the Prometheus text exposition format."""
+        pid = f'pid="{os.getpid()}"'
+        lines = [
+            '# HELP api_metrics_sample_rate Fraction of requests measured.',
+            '# TYPE api_metrics_sample_rate gauge',
+            f'api_metrics_sample_rate{{{pid}}} {sample_rate}',
+            '# HELP api_requests_total Sampled requests by status class.',
+            '# TYPE api_requests_total counter',
+        ]
+        with self._lock:
+            for (view, method, status), count in sorted(
+                    self.requests.items()):
+                lines.append(
+                    f'api_requests_total{{{pid},view="{view}",'
+                    f'method="{method}",status="{status}"}} {count}'
+                )
+
+            for name in BUCKETS:
+                metric = f'api_request_{name}'
+                lines.append(f'# HELP {metric} {HELP[name]}')
+                lines.append(f'# TYPE {metric} histogram')
+                for (view, method), histograms in sorted(
+                        self.histograms.items()):
+                    lines.extend(render_histogram(
+                        metric, f'{pid},view="{view}",method="{method}"',
+                        histograms[name]
+                    ))
+
+        return '\n'.join(lines) + '\n'
+
+
+def render_histogram(metric, labels, histogram):
+    """Return the exposition lines of one labelled histogram."""
+    lines = [
+        f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+        for bound, count in zip(histogram.buckets, histogram.counts)
+    ]
+    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum}')
+    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+
+    return lines
+
+
+registry = MetricsRegistry()
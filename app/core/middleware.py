@@ -0,0 +1,113 @@
+import asyncio
+import random
+import time
+
+from django.conf import settings
+
+from core.metrics import RequestRecorder, current_recorder, registry
+
+
+class MetricsMiddleware:
+    """
+    Measure the latency, database queries and time, serializer time and
+    response size of a METRICS['SAMPLE_RATE'] fraction of requests, per
+    view, into core.metrics.registry.
+
+    The middleware runs natively under WSGI and ASGI, so async views
+    aren't forced through the single thread of sync middleware. Queries
+    are counted in whichever thread runs the view, as the recorder is
+    kept in a context variable, see core.metrics.record_current_request.
+
+    Streaming responses are measured once their content is consumed or
+    closed, so their size and the queries run while streaming count.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Mark the instance as a coroutine function for Django.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        if not self.sampled():
+            return self.get_response(request)
+
+        recorder = RequestRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+
+        return self.measure(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        recorder = RequestRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+
+        return self.measure(request, response, recorder, started)
+
+    def sampled(self):
+        options = settings.METRICS
+        return options['ENABLED'] and (
+            random.random() < options['SAMPLE_RATE'])
+
+    def measure(self, request, response, recorder, started):
+        """Record the response, or wrap its stream to record it later."""
+        if response.streaming:
+            response.streaming_content = self.measure_stream(
+                request, response, response.streaming_content, recorder,
+                started)
+        else:
+            self.observe(request, response, recorder, started,
+                         len(response.content))
+
+        return response
+
+    def measure_stream(self, request, response, content, recorder,
+                       started):
+        """Yield the streamed content, recording it once it ends."""
+        size = 0
+        content = iter(content)
+        try:
+            while True:
+                token = current_recorder.set(recorder)
+                try:
+                    chunk = next(content, None)
+                finally:
+                    current_recorder.reset(token)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.observe(request, response, recorder, started, size)
+
+    def observe(self, request, response, recorder, started, size):
+        match = request.resolver_match
+        registry.observe(
+            match.view_name if match else 'unmatched',
+            request.method,
+            response.status_code,
+            {
+                'duration_seconds': time.perf_counter() - started,
+                'db_queries': recorder.db_queries,
+                'db_seconds': recorder.db_seconds,
+                'serializer_seconds': recorder.serializer_seconds,
+                'response_bytes': size,
+            }
+        )
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the recipe through tables by related object first, so that
+    filtering recipes by tag or ingredient is an index-only scan.
+    """
+
+    dependencies = [
+        ('core', '0006_list_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_tags_tag_recipe_idx '
+            'ON core_recipe_tags (tag_id, recipe_id);',
+            'DROP INDEX core_recipe_tags_tag_recipe_idx;'
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX core_recipe_ingredients_ing_recipe_idx '
+            'ON core_recipe_ingredients (ingredient_id, recipe_id);',
+            'DROP INDEX core_recipe_ingredients_ing_recipe_idx;'
+        ),
+    ]
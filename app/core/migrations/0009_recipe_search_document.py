@@ -0,0 +1,70 @@
+# Generated by Django 3.1 on 2026-10-18 03:24
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def populate_search_documents(apps, schema_editor):
+    """Build the search document of every existing recipe."""
+    Recipe = apps.get_model('core', 'Recipe')
+    relations = (
+        (Recipe.tags.through, 'tag__name'),
+        (Recipe.ingredients.through, 'ingredient__name'),
+    )
+    last_id = 0
+
+    while True:
+        titles = dict(Recipe.objects.filter(
+            id__gt=last_id
+        ).order_by('id').values_list('id', 'title')[:1000])
+        if not titles:
+            return
+
+        names = defaultdict(list)
+        for through, name_field in relations:
+            related = through.objects.filter(
+                recipe_id__in=titles
+            ).order_by(name_field).values_list('recipe_id', name_field)
+            for recipe_id, name in related:
+                names[recipe_id].append(name)
+
+        Recipe.objects.bulk_update(
+            [Recipe(id=recipe_id,
+                    search_document=' '.join([title, *names[recipe_id]]))
+             for recipe_id, title in titles.items()],
+            ['search_document']
+        )
+        last_id = max(titles)
+
+
+def create_search_index(apps, schema_editor):
+    """Index the search document for full text search on Postgres."""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX core_recipe_search_idx ON core_recipe '
+            "USING gin (to_tsvector('english', search_document));"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX core_recipe_search_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_collection_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(
+            populate_search_documents, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
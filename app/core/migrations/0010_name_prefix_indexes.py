@@ -0,0 +1,34 @@
+from django.db import migrations
+
+TABLES = ('core_tag', 'core_ingredient')
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """
+    Index (user_id, lower(name)) for case-insensitive prefix lookups.
+    On Postgres the pattern operator class lets LIKE 'abc%' use the
+    index whatever the database collation.
+    """
+    opclass = (' text_pattern_ops'
+               if schema_editor.connection.vendor == 'postgresql' else '')
+    for table in TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX {table}_user_lower_name_idx '
+            f'ON {table} (user_id, lower(name){opclass});'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    for table in TABLES:
+        schema_editor.execute(f'DROP INDEX {table}_user_lower_name_idx;')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
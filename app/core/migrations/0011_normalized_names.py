@@ -0,0 +1,121 @@
+from collections import defaultdict
+
+from django.db import migrations, models
+
+NAMED_MODELS = (
+    ('Tag', 'tags', 'tag_id'),
+    ('Ingredient', 'ingredients', 'ingredient_id'),
+)
+
+
+def normalize_name(name):
+    """Case fold name and collapse its runs of whitespace."""
+    return ' '.join(name.split()).casefold()[:255]
+
+
+def move_through_rows(through, field, targets):
+    """
+    Point the through rows of the related ids in targets at the id they
+    map to, dropping rows the recipe already has.
+    """
+    existing = set(through.objects.filter(
+        **{field + '__in': set(targets.values())}
+    ).values_list('recipe_id', field))
+    moves, dropped = defaultdict(list), []
+
+    for row_id, recipe_id, related_id in through.objects.filter(
+        **{field + '__in': targets}
+    ).values_list('id', 'recipe_id', field):
+        row = (recipe_id, targets[related_id])
+        if row in existing:
+            dropped.append(row_id)
+        else:
+            existing.add(row)
+            moves[row[1]].append(row_id)
+
+    through.objects.filter(id__in=dropped).delete()
+    for target_id, row_ids in moves.items():
+        through.objects.filter(id__in=row_ids).update(**{field: target_id})
+
+
+def merge_duplicates(model, through, field, batch_size=100):
+    """
+    Set the normalized name of every object, merging the objects of a
+    user that share one into the oldest, batch_size users at a time.
+    """
+    last_user_id = 0
+    while True:
+        user_ids = list(model.objects.filter(
+            user_id__gt=last_user_id
+        ).order_by('user_id').values_list(
+            'user_id', flat=True).distinct()[:batch_size])
+        if not user_ids:
+            return
+
+        keep, duplicates, renamed = {}, {}, []
+        for obj_id, user_id, name in model.objects.filter(
+            user_id__in=user_ids
+        ).order_by('id').values_list('id', 'user_id', 'name'):
+            key = normalize_name(name)
+            keep_id = keep.setdefault((user_id, key), obj_id)
+            if keep_id != obj_id:
+                duplicates[obj_id] = keep_id
+            else:
+                renamed.append(model(id=obj_id, normalized_name=key))
+
+        move_through_rows(through, field, duplicates)
+        model.objects.filter(id__in=duplicates).delete()
+        model.objects.bulk_update(
+            renamed, ['normalized_name'], batch_size=1000)
+        last_user_id = user_ids[-1]
+
+
+def normalize_names(apps, schema_editor):
+    """
+    Normalize the name of every existing tag and ingredient, merging
+    the duplicates the unique constraints would reject.
+    """
+    Recipe = apps.get_model('core', 'Recipe')
+    for model_name, relation, field in NAMED_MODELS:
+        merge_duplicates(
+            apps.get_model('core', model_name),
+            getattr(Recipe, relation).through,
+            field
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingredient',
+            name='normalized_name',
+            field=models.CharField(
+                default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='normalized_name',
+            field=models.CharField(
+                default='', editable=False, max_length=255),
+            preserve_default=False,
+        ),
+        migrations.RunPython(normalize_names, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'normalized_name'),
+                name='core_ingredient_user_name_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='tag',
+            constraint=models.UniqueConstraint(
+                fields=('user', 'normalized_name'),
+                name='core_tag_user_name_uniq'),
+        ),
+    ]
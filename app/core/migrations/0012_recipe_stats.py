@@ -0,0 +1,121 @@
+# Generated by Django 3.1 on 2026-10-18 03:58
+
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+# RecipeStats field counting the recipes priced below each bound, the
+# last one counts the rest.
+PRICE_BUCKETS = (
+    ('price_under_5', Decimal('5')),
+    ('price_under_10', Decimal('10')),
+    ('price_under_20', Decimal('20')),
+    ('price_under_50', Decimal('50')),
+    ('price_50_and_over', None),
+)
+
+NAMED_RELATIONS = (
+    ('tags', 'tag_id'),
+    ('ingredients', 'ingredient_id'),
+)
+
+
+def build_user_stats(Recipe, RecipeStats, user_ids):
+    """Create the rollups of the given users from their recipes."""
+    buckets = {}
+    low = None
+    for field, bound in PRICE_BUCKETS:
+        condition = Q()
+        if low is not None:
+            condition &= Q(price__gte=low)
+        if bound is not None:
+            condition &= Q(price__lt=bound)
+        buckets[field] = Count('id', filter=condition)
+        low = bound
+
+    rows = {
+        row.pop('user_id'): row
+        for row in Recipe.objects.filter(
+            user_id__in=user_ids
+        ).order_by().values('user_id').annotate(
+            recipe_count=Count('id'),
+            total_time_minutes=Coalesce(Sum('time_minutes'), 0),
+            total_price=Coalesce(Sum('price'), 0),
+            **buckets
+        )
+    }
+    RecipeStats.objects.bulk_create([
+        RecipeStats(user_id=user_id, **rows.get(user_id, {}))
+        for user_id in user_ids
+    ])
+
+
+def count_recipes(through, field):
+    """Set the recipe count of every tag or ingredient."""
+    counts = through.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(count=Count('*')).values('count')
+    through._meta.get_field(field).related_model.objects.update(
+        recipe_count=Coalesce(
+            Subquery(counts, output_field=IntegerField()), 0))
+
+
+def build_recipe_stats(apps, schema_editor):
+    """Build the rollups of existing users and their recipe counts."""
+    User = apps.get_model('core', 'User')
+    Recipe = apps.get_model('core', 'Recipe')
+    RecipeStats = apps.get_model('core', 'RecipeStats')
+    user_ids = list(User.objects.values_list('id', flat=True))
+    for start in range(0, len(user_ids), 100):
+        build_user_stats(Recipe, RecipeStats, user_ids[start:start + 100])
+
+    for relation, field in NAMED_RELATIONS:
+        count_recipes(getattr(Recipe, relation).through, field)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_normalized_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('recipe_count', models.IntegerField(default=0)),
+                ('total_time_minutes', models.BigIntegerField(default=0)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('price_under_5', models.IntegerField(default=0)),
+                ('price_under_10', models.IntegerField(default=0)),
+                ('price_under_20', models.IntegerField(default=0)),
+                ('price_under_50', models.IntegerField(default=0)),
+                ('price_50_and_over', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='recipe_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['user', '-recipe_count', 'id'], name='core_ingredient_user_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['user', '-recipe_count', 'id'], name='core_tag_user_count_idx'),
+        ),
+        migrations.RunPython(
+            build_recipe_stats, migrations.RunPython.noop),
+    ]
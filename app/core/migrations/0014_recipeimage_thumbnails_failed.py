@@ -0,0 +1,18 @@
+# Generated by Django 3.1 on 2026-10-18 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_recipe_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipeimage',
+            name='thumbnails_failed',
+            field=models.BooleanField(default=False),
+        ),
+    ]
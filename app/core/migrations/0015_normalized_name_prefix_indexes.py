@@ -0,0 +1,45 @@
+from django.db import migrations
+
+TABLES = ('core_tag', 'core_ingredient')
+
+
+def create_prefix_indexes(apps, schema_editor):
+    """
+    Index (user_id, normalized_name) for prefix lookups ordered by code
+    point, the order of the in-process autocomplete cache. On Postgres
+    the "C" collation gives that order and lets LIKE 'abc%' use the
+    index. The old lower(name) index is gone on SQLite already, dropped
+    when a later migration rebuilt the table.
+    """
+    collation = (' COLLATE "C"'
+                 if schema_editor.connection.vendor == 'postgresql' else '')
+    for table in TABLES:
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {table}_user_lower_name_idx;')
+        schema_editor.execute(
+            f'CREATE INDEX {table}_user_normalized_name_idx '
+            f'ON {table} (user_id, normalized_name{collation});'
+        )
+
+
+def drop_prefix_indexes(apps, schema_editor):
+    opclass = (' text_pattern_ops'
+               if schema_editor.connection.vendor == 'postgresql' else '')
+    for table in TABLES:
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {table}_user_normalized_name_idx;')
+        schema_editor.execute(
+            f'CREATE INDEX {table}_user_lower_name_idx '
+            f'ON {table} (user_id, lower(name){opclass});'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_recipeimage_thumbnails_failed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_prefix_indexes, drop_prefix_indexes),
+    ]
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+from django.db.models import F
+import django.db.models.deletion
+from django.utils import timezone
+
+# File extension of the originals of each accepted format.
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}
+
+
+def image_names(image, user_id=None):
+    """
+    Return the storage names of the original and thumbnails of an image,
+    under the directory of user_id or the shared one used before.
+    """
+    sha256 = image.sha256
+    directory = 'recipes/' if user_id is None else f'recipes/{user_id}/'
+    directory += sha256[:2]
+    names = [f'{directory}/{sha256}.{EXTENSIONS[image.format]}']
+    names.extend(f'{directory}/{sha256}-{size}.jpg'
+                 for size in settings.RECIPE_IMAGES['SIZES'])
+    return names
+
+
+def assign_image_users(apps, schema_editor):
+    """
+    Give every user whose recipes use an image their own copy of it,
+    files included, and delete the images no recipe uses.
+    """
+    RecipeImage = apps.get_model('core', 'RecipeImage')
+    Recipe = apps.get_model('core', 'Recipe')
+    CollectionVersion = apps.get_model('core', 'CollectionVersion')
+
+    for image in list(RecipeImage.objects.filter(user__isnull=True)):
+        recipes = Recipe.objects.filter(image_id=image.id)
+        recipe_ids = list(recipes.values_list('id', flat=True))
+        user_ids = sorted(set(recipes.values_list('user_id', flat=True)))
+        for index, user_id in enumerate(user_ids):
+            if index == 0:
+                copy = image
+                RecipeImage.objects.filter(id=image.id).update(
+                    user_id=user_id)
+            else:
+                copy = RecipeImage.objects.create(
+                    user_id=user_id, sha256=image.sha256,
+                    format=image.format, width=image.width,
+                    height=image.height, size=image.size,
+                    thumbnails_ready=image.thumbnails_ready,
+                    thumbnails_failed=image.thumbnails_failed)
+                recipes.filter(user_id=user_id).update(image_id=copy.id)
+
+            for old, new in zip(image_names(image),
+                                image_names(copy, user_id)):
+                if default_storage.exists(old):
+                    default_storage.delete(new)
+                    with default_storage.open(old) as content:
+                        default_storage.save(new, content)
+
+        # The URLs in their details and lists changed.
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            updated_at=timezone.now())
+        CollectionVersion.objects.filter(user_id__in=user_ids).update(
+            version=F('version') + 1)
+
+        if not user_ids:
+            image.delete()
+        for name in image_names(image):
+            default_storage.delete(name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0015_normalized_name_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipeimage',
+            name='user',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='recipeimage',
+            name='sha256',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.RunPython(assign_image_users),
+    ]
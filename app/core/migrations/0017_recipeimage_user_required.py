@@ -0,0 +1,25 @@
+# Generated by Django 3.1.14 on 2026-10-18 16:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0016_recipeimage_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipeimage',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='recipeimage',
+            constraint=models.UniqueConstraint(fields=('user', 'sha256'), name='core_recipeimage_user_sha256_uniq'),
+        ),
+    ]
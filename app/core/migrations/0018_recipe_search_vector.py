@@ -0,0 +1,49 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def populate_search_vectors(apps, schema_editor):
+    """
+    Store the search vector of every recipe and index it in place of the
+    expression index of migration 0009, so matching and ranking don't
+    parse the search documents again.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(
+        "UPDATE core_recipe SET search_vector = "
+        "to_tsvector('english', search_document);"
+    )
+    schema_editor.execute('DROP INDEX core_recipe_search_idx;')
+    schema_editor.execute(
+        'CREATE INDEX core_recipe_search_idx ON core_recipe '
+        'USING gin (search_vector);'
+    )
+
+
+def restore_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('DROP INDEX core_recipe_search_idx;')
+    schema_editor.execute(
+        'CREATE INDEX core_recipe_search_idx ON core_recipe '
+        "USING gin (to_tsvector('english', search_document));"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_recipeimage_user_required'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vectors, restore_search_index),
+    ]
@@ -3,6 +3,9 @@ from django.contrib.auth.models import AbstractBaseUser
 from django.contrib.auth.models import PermissionsMixin
 from django.contrib.auth.models import BaseUserManager
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+
+from core.passwords import hash_password
 
 
 # Create your models here.
@@ -21,7 +24,8 @@ class UserManager(BaseUserManager):
             lname=lname,
             **extra_fields
         )
-        user.set_password(password)
+        # Hashed on the bounded hashing pool, see core.passwords.
+        user.password = hash_password(password)
         user.save(using=self._db)
 
         return user
@@ -50,14 +54,44 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ['fname', 'lname']
 
 
+def normalize_name(name):
+    """
+    Return the form of a tag or ingredient name that must be unique per
+    user: case folded, with runs of whitespace collapsed.
+    """
+    # Case folding may lengthen a name, e.g. 'ß' becomes 'ss'.
+    return ' '.join(name.split()).casefold()[:255]
+
+
 class Tag(models.Model):
     """Tag to be used for a recipe."""
 
     name = models.CharField(max_length=255)
+    # Names are unique per user once normalized, see normalize_name.
+    normalized_name = models.CharField(max_length=255, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Recipes using it, kept up to date by core.signals and core.stats.
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_tag_user_name_idx'),
+            models.Index(fields=['user', '-recipe_count', 'id'],
+                         name='core_tag_user_count_idx')
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'normalized_name'],
+                                    name='core_tag_user_name_uniq')
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -67,10 +101,31 @@ class Ingredient(models.Model):
     """Ingredient to be used in a reciper"""
 
     name = models.CharField(max_length=255)
+    # Names are unique per user once normalized, see normalize_name.
+    normalized_name = models.CharField(max_length=255, editable=False)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Recipes using it, kept up to date by core.signals and core.stats.
+    recipe_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id'],
+                         name='core_ingredient_user_name_idx'),
+            models.Index(fields=['user', '-recipe_count', 'id'],
+                         name='core_ingredient_user_count_idx')
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'normalized_name'],
+                                    name='core_ingredient_user_name_uniq')
+        ]
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
@@ -87,9 +142,106 @@ class Recipe(models.Model):
     time_minutes = models.IntegerField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
+    image = models.ForeignKey(
+        'RecipeImage',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='recipes'
+    )
+
+    updated_at = models.DateTimeField(auto_now=True)
+    # Title, tag and ingredient names, kept up to date by core.signals.
+    # Postgres also stores and indexes its search vector.
+    search_document = models.TextField(blank=True, default='',
+                                       editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id'],
+                         name='core_recipe_user_id_idx')
+        ]
+
     def __str__(self):
         return self.title
+
+
+class RecipeImage(models.Model):
+    """
+    Uploaded recipe image, stored once per distinct content of a user
+    under its SHA-256 and shared by the user's recipes using it. Its
+    thumbnails are generated in the background, see core.images,
+    thumbnails_failed is set when that failed. Images no recipe uses
+    are deleted by the delete_unused_images command.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    sha256 = models.CharField(max_length=64)
+    format = models.CharField(max_length=10)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    thumbnails_ready = models.BooleanField(default=False)
+    thumbnails_failed = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'sha256'],
+                                    name='core_recipeimage_user_sha256_uniq')
+        ]
+
+    def __str__(self):
+        return self.sha256
+
+
+class CollectionVersion(models.Model):
+    """
+    Version of everything a user owns, bumped whenever one of their tags,
+    ingredients or recipes changes, so that conditional GETs can be
+    answered without querying the objects themselves.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.user_id}:{self.version}'
+
+
+class RecipeStats(models.Model):
+    """
+    Rollup of the recipes of a user, updated incrementally as recipes
+    change, so their statistics are read without scanning them. See
+    core.stats for the price buckets.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True
+    )
+    recipe_count = models.IntegerField(default=0)
+    total_time_minutes = models.BigIntegerField(default=0)
+    total_price = models.DecimalField(max_digits=16, decimal_places=2,
+                                      default=0)
+    price_under_5 = models.IntegerField(default=0)
+    price_under_10 = models.IntegerField(default=0)
+    price_under_20 = models.IntegerField(default=0)
+    price_under_50 = models.IntegerField(default=0)
+    price_50_and_over = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user_id}:{self.recipe_count}'
@@ -0,0 +1,102 @@
+from collections import defaultdict
+
+from core.models import normalize_name
+
+
+def get_or_create_named(model, user, names, batch_size=None):
+    """
+    Return ({normalized name: object}, created normalized names) for the
+    user's tags or ingredients with the given names, creating the
+    missing ones.
+
+    Missing objects are inserted with ON CONFLICT DO NOTHING and read
+    back, so concurrent requests creating the same name all end up with
+    the row that won. Like bulk_create, no model signals are sent.
+    """
+    wanted = {}
+    for name in names:
+        wanted.setdefault(normalize_name(name), name)
+
+    objects = {obj.normalized_name: obj for obj in model.objects.filter(
+        user=user, normalized_name__in=wanted)}
+    missing = [key for key in wanted if key not in objects]
+    if missing:
+        model.objects.bulk_create(
+            [model(user=user, name=wanted[key], normalized_name=key)
+             for key in missing],
+            batch_size=batch_size,
+            ignore_conflicts=True
+        )
+        objects.update((obj.normalized_name, obj) for obj in
+                       model.objects.filter(user=user,
+                                            normalized_name__in=missing))
+
+    return objects, set(missing)
+
+
+def renormalize_names(model, through, field, batch_size=100):
+    """
+    Recompute the normalized name of every tag or ingredient, merging
+    the objects of a user that end up sharing one into the oldest and
+    moving their recipe through rows over to it.
+
+    Users are processed batch_size at a time. Returns the number of
+    merged objects and the ids of the recipes whose relations changed.
+    """
+    merged, recipe_ids, last_user_id = 0, set(), 0
+
+    while True:
+        user_ids = list(model.objects.filter(
+            user_id__gt=last_user_id
+        ).order_by('user_id').values_list(
+            'user_id', flat=True).distinct()[:batch_size])
+        if not user_ids:
+            return merged, recipe_ids
+
+        keep, duplicates, renamed = {}, {}, []
+        for obj_id, user_id, name, normalized in model.objects.filter(
+            user_id__in=user_ids
+        ).order_by('id').values_list(
+                'id', 'user_id', 'name', 'normalized_name'):
+            key = normalize_name(name)
+            keep_id = keep.setdefault((user_id, key), obj_id)
+            if keep_id != obj_id:
+                duplicates[obj_id] = keep_id
+            elif key != normalized:
+                renamed.append(model(id=obj_id, normalized_name=key))
+
+        recipe_ids.update(move_through_rows(through, field, duplicates))
+        model.objects.filter(id__in=duplicates).delete()
+        model.objects.bulk_update(
+            renamed, ['normalized_name'], batch_size=1000)
+        merged += len(duplicates)
+        last_user_id = user_ids[-1]
+
+
+def move_through_rows(through, field, targets):
+    """
+    Point the through rows of the related ids in targets at the id they
+    map to, dropping rows the recipe already has. Returns the ids of
+    the recipes whose rows were moved.
+    """
+    existing = set(through.objects.filter(
+        **{field + '__in': set(targets.values())}
+    ).values_list('recipe_id', field))
+    moves, dropped, recipe_ids = defaultdict(list), [], set()
+
+    for row_id, recipe_id, related_id in through.objects.filter(
+        **{field + '__in': targets}
+    ).values_list('id', 'recipe_id', field):
+        row = (recipe_id, targets[related_id])
+        if row in existing:
+            dropped.append(row_id)
+        else:
+            existing.add(row)
+            moves[row[1]].append(row_id)
+        recipe_ids.add(recipe_id)
+
+    through.objects.filter(id__in=dropped).delete()
+    for target_id, row_ids in moves.items():
+        through.objects.filter(id__in=row_ids).update(**{field: target_id})
+
+    return recipe_ids
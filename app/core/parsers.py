@@ -0,0 +1,31 @@
+import io
+
+from django.conf import settings
+
+from rest_framework.parsers import JSONParser
+
+from core.renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser using orjson when it is installed, and DRF's stdlib
+    based parsing otherwise. Like with STRICT_JSON, NaN and Infinity
+    are rejected.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            # Let the stdlib parse what orjson can't, like integers
+            # beyond 64 bits, or report the error the usual way.
+            return super().parse(
+                io.BytesIO(body), media_type, parser_context)
@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class PasswordHashingBusy(Exception):
+    """
+    Raised when the hashing pool is full. The API answers it with a 503,
+    see user_app.views.PasswordHashingMixin.
+    """
+
+
+def run_hasher(func, *args):
+    """
+    Run a password hashing function on the bounded hashing pool.
+
+    This only limits concurrency: the calling thread still waits for
+    the hash. At most THREADS hashes run at once per process, and at
+    most QUEUE more wait for a thread. Beyond that PasswordHashingBusy
+    is raised right away instead of piling up requests behind the CPU.
+    """
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            options = settings.PASSWORD_HASH_POOL
+            _executor = ThreadPoolExecutor(
+                max_workers=options['THREADS'],
+                thread_name_prefix='password-hash'
+            )
+            _slots = threading.BoundedSemaphore(
+                options['THREADS'] + options['QUEUE'])
+
+    if not _slots.acquire(blocking=False):
+        raise PasswordHashingBusy()
+    try:
+        return _executor.submit(func, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    """Return the hash of password, made on the hashing pool."""
+    return run_hasher(make_password, password)
+
+
+def verify_password(password, encoded):
+    """
+    Check password against encoded on the hashing pool. Returns whether
+    it matches and whether the hash should be upgraded to the preferred
+    hasher or cost.
+    """
+    def check():
+        outdated = []
+        matches = check_password(
+            password, encoded, setter=lambda raw: outdated.append(True))
+        return matches, bool(outdated)
+
+    return run_hasher(check)
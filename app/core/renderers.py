@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson when it is installed, and DRF's stdlib
+    based rendering otherwise.
+
+    The output is the same as JSONRenderer's: compact, unescaped UTF-8,
+    with U+2028 and U+2029 escaped. Values orjson doesn't handle the
+    same way, like Decimal and datetime, go through DRF's encoder.
+    Indented output, or settings orjson has no equivalent for, fall
+    back to JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii or
+                not self.compact or
+                self.get_indent(accepted_media_type,
+                                renderer_context or {}) is not None):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=(orjson.OPT_NON_STR_KEYS |
+                        orjson.OPT_PASSTHROUGH_DATETIME)
+            )
+        except orjson.JSONEncodeError:
+            # E.g. integers beyond 64 bits, which the stdlib handles.
+            return super().render(
+                data, accepted_media_type, renderer_context)
+
+        # Like JSONRenderer, keep the output a strict JavaScript subset.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,65 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+# The replica that reads in the current context go to, if any. Only
+# views that opt in, see recipe_app.replicas.ReplicaReadMixin, set it,
+# once per request so that every read of the request sees the same
+# replica.
+replica_reads = ContextVar('replica_reads', default=None)
+
+
+def choose_replica():
+    """Return the alias of a random replica, or None without replicas."""
+    if not settings.DATABASE_REPLICAS:
+        return None
+
+    return random.choice(settings.DATABASE_REPLICAS)
+
+
+def pin_cache_key(user_id):
+    return f'replica-pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    """
+    Read the user's data from the primary for the next few seconds, so
+    they see their own writes while the replicas catch up.
+    """
+    if settings.DATABASE_REPLICAS:
+        caches[settings.DATABASE_REPLICA_PIN['CACHE']].set(
+            pin_cache_key(user_id), True,
+            settings.DATABASE_REPLICA_PIN['SECONDS']
+        )
+
+
+def is_pinned_to_primary(user_id):
+    """Return whether the user wrote something within the pin window."""
+    return bool(caches[settings.DATABASE_REPLICA_PIN['CACHE']].get(
+        pin_cache_key(user_id)))
+
+
+class ReplicaRouter:
+    """
+    Send every write, and reads by default, to the primary database.
+    Reads made while replica_reads is set go to that replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        return replica_reads.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+
+        return None
@@ -0,0 +1,101 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector
+)
+from django.db import connections
+from django.db.models import F
+
+from core.models import Recipe
+
+# Text search configuration of the stored search vectors and queries.
+SEARCH_CONFIG = 'english'
+
+SEARCH_RELATIONS = (
+    (Recipe.tags.through, 'tag__name'),
+    (Recipe.ingredients.through, 'ingredient__name'),
+)
+
+
+def build_search_document(title, names):
+    """Return the text recipes are searched by: title, tags, ingredients."""
+    return ' '.join([title, *names])
+
+
+def refresh_search_vectors(queryset):
+    """
+    Recompute the search vectors of the recipes of queryset from their
+    search documents. Only Postgres stores search vectors.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        queryset.update(search_vector=SearchVector(
+            'search_document', config=SEARCH_CONFIG))
+
+
+def refresh_search_documents(recipe_ids, chunk_size=1000):
+    """Rebuild the search documents and vectors of the given recipes."""
+    recipe_ids = iter(set(recipe_ids))
+    while True:
+        chunk = list(islice(recipe_ids, chunk_size))
+        if not chunk:
+            return
+
+        titles = dict(Recipe.objects.filter(
+            id__in=chunk).values_list('id', 'title'))
+        names = defaultdict(list)
+        for through, name_field in SEARCH_RELATIONS:
+            related = through.objects.filter(
+                recipe_id__in=chunk
+            ).order_by(name_field).values_list('recipe_id', name_field)
+            for recipe_id, name in related:
+                names[recipe_id].append(name)
+
+        Recipe.objects.bulk_update(
+            [Recipe(id=recipe_id,
+                    search_document=build_search_document(
+                        title, names[recipe_id]))
+             for recipe_id, title in titles.items()],
+            ['search_document']
+        )
+        refresh_search_vectors(Recipe.objects.filter(id__in=chunk))
+
+
+def search_recipes(queryset, query, limit, offset=0):
+    """
+    Return up to limit recipes of queryset matching query, best first,
+    skipping the offset best ones.
+
+    Postgres matches and ranks on the stored search vector, which has a
+    GIN index. Other databases, like the SQLite used in tests, fall back
+    to matching every term as a substring and ranking in Python.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        search_query = SearchQuery(query, config=SEARCH_CONFIG)
+        return list(queryset.filter(
+            search_vector=search_query
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-id')[offset:offset + limit])
+
+    terms = query.lower().split()
+    if not terms:
+        return []
+
+    candidates = queryset.order_by()
+    for term in terms:
+        candidates = candidates.filter(search_document__icontains=term)
+
+    ranked = sorted(
+        candidates.values_list('id', 'search_document'),
+        key=lambda row: (
+            -sum(row[1].lower().count(term) for term in terms), -row[0])
+    )
+    top_ids = [recipe_id for recipe_id, _ in ranked[offset:offset + limit]]
+    # The queryset may return values() rows rather than recipes.
+    recipes = {
+        recipe['id'] if isinstance(recipe, dict) else recipe.id: recipe
+        for recipe in queryset.filter(id__in=top_ids)
+    }
+
+    return [recipes[recipe_id] for recipe_id in top_ids]
@@ -0,0 +1,224 @@
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from rest_framework.authtoken.models import Token
+
+from core.authentication import invalidate_token
+from core.images import delete_image_files
+from core.models import (
+    CollectionVersion, Tag, Ingredient, Recipe, RecipeImage, RecipeStats
+)
+from core.search import refresh_search_documents, refresh_search_vectors
+from core.stats import (
+    NAMED_RELATIONS, adjust_recipe_counts, apply_recipe_changes,
+    recipe_values
+)
+from core.versions import bump_collection_version
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop authenticating with a token once it has been deleted."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """
+    Drop cached tokens of a user that has been updated, e.g. deactivated
+    by an admin or edited through UserSerializer.update.
+    """
+    if created:
+        return
+
+    for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True):
+        invalidate_token(key)
+
+
+@receiver(post_save, sender=get_user_model())
+def create_collection_version(sender, instance, created, raw, **kwargs):
+    """Start every new user off with a collection version."""
+    if created and not raw:
+        CollectionVersion.objects.create(user=instance)
+
+
+@receiver(post_save, sender=get_user_model())
+def create_recipe_stats(sender, instance, created, raw, **kwargs):
+    """Start every new user off with an empty recipe rollup."""
+    if created and not raw:
+        RecipeStats.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def bump_owner_version(sender, instance, **kwargs):
+    """Bump the collection version of the owner of a changed object."""
+    bump_collection_version(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def touch_recipes_on_relation_change(sender, instance, action, reverse,
+                                     pk_set, **kwargs):
+    """Mark recipes as updated when their tags or ingredients change."""
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        recipe_ids = [instance.id]
+    elif reverse and action in ('post_add', 'post_remove'):
+        recipe_ids = pk_set
+    elif reverse and action == 'pre_clear':
+        # The recipes losing the tag or ingredient are only known before
+        # the through rows are removed.
+        recipe_ids = list(instance.recipe_set.values_list('id', flat=True))
+    else:
+        return
+
+    Recipe.objects.filter(id__in=recipe_ids).update(updated_at=timezone.now())
+    bump_collection_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_search_document(sender, instance, created, **kwargs):
+    """Keep the search document of a saved recipe up to date."""
+    if created:
+        # A new recipe can't have tags or ingredients yet.
+        recipe = Recipe.objects.filter(id=instance.id)
+        recipe.update(search_document=instance.title)
+        refresh_search_vectors(recipe)
+    else:
+        refresh_search_documents([instance.id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def refresh_search_on_relation_change(sender, instance, action, reverse,
+                                      pk_set, **kwargs):
+    """Rebuild search documents of recipes whose relations changed."""
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        refresh_search_documents([instance.id])
+    elif reverse and action in ('post_add', 'post_remove'):
+        refresh_search_documents(pk_set)
+    elif reverse and action == 'pre_clear':
+        instance._search_recipe_ids = list(
+            instance.recipe_set.values_list('id', flat=True))
+    elif reverse and action == 'post_clear':
+        refresh_search_documents(instance._search_recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def refresh_search_on_rename(sender, instance, created, **kwargs):
+    """Rebuild search documents of recipes showing a changed name."""
+    if not created:
+        refresh_search_documents(
+            instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_before_delete(sender, instance, **kwargs):
+    """Remember the recipes of a tag or ingredient about to be deleted."""
+    instance._search_recipe_ids = list(
+        instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def refresh_search_on_delete(sender, instance, **kwargs):
+    """Rebuild search documents of recipes that lost a deleted name."""
+    refresh_search_documents(getattr(instance, '_search_recipe_ids', ()))
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_recipe_values(sender, instance, raw, update_fields, **kwargs):
+    """Remember the stored values of a recipe about to be updated."""
+    instance._stats_values = None
+    if raw or instance.pk is None or (
+            update_fields is not None and
+            not {'time_minutes', 'price'} & set(update_fields)):
+        return
+
+    instance._stats_values = Recipe.objects.filter(
+        pk=instance.pk).values_list('time_minutes', 'price').first()
+
+
+@receiver(post_save, sender=Recipe)
+def update_stats_on_save(sender, instance, created, raw, **kwargs):
+    """Apply a created or updated recipe to the rollup of its owner."""
+    old = getattr(instance, '_stats_values', None)
+    if raw or (old is None and not created):
+        return
+
+    apply_recipe_changes(instance.user_id, [(old, recipe_values(instance))])
+
+
+@receiver(pre_delete, sender=Recipe)
+def remember_recipe_relations(sender, instance, **kwargs):
+    """
+    Remember the tags and ingredients of a recipe about to be deleted,
+    its through rows are deleted without relation signals.
+    """
+    instance._stats_related = {
+        model: list(through.objects.filter(
+            recipe_id=instance.id).values_list(field, flat=True))
+        for model, (through, field) in NAMED_RELATIONS.items()
+    }
+
+
+@receiver(post_delete, sender=Recipe)
+def update_stats_on_delete(sender, instance, **kwargs):
+    """Remove a deleted recipe from the rollup and recipe counts."""
+    apply_recipe_changes(instance.user_id, [(recipe_values(instance), None)])
+    for model, ids in getattr(instance, '_stats_related', {}).items():
+        adjust_recipe_counts(model, {pk: -1 for pk in ids})
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def update_recipe_counts(sender, instance, action, reverse, model, pk_set,
+                         **kwargs):
+    """Keep the recipe counts of tags and ingredients up to date."""
+    named_model = type(instance) if reverse else model
+    field = NAMED_RELATIONS[named_model][1]
+
+    if action == 'post_add':
+        # Django only reports the rows that were actually added.
+        if reverse:
+            adjust_recipe_counts(named_model, {instance.id: len(pk_set)})
+        else:
+            adjust_recipe_counts(named_model, {pk: 1 for pk in pk_set})
+    elif action in ('pre_remove', 'pre_clear'):
+        # Removals report every id asked for, so count the rows that
+        # exist before they go.
+        if reverse:
+            rows = sender.objects.filter(**{field: instance.id})
+            if action == 'pre_remove':
+                rows = rows.filter(recipe_id__in=pk_set)
+            removed = {instance.id: rows.count()}
+        else:
+            rows = sender.objects.filter(recipe_id=instance.id)
+            if action == 'pre_remove':
+                rows = rows.filter(**{field + '__in': pk_set})
+            removed = Counter(rows.values_list(field, flat=True))
+        instance.__dict__.setdefault('_stats_removed', {})[sender] = removed
+    elif action in ('post_remove', 'post_clear'):
+        removed = instance.__dict__.get('_stats_removed', {}).pop(sender, {})
+        adjust_recipe_counts(
+            named_model, {pk: -count for pk, count in removed.items()})
+
+
+@receiver(post_delete, sender=RecipeImage)
+def delete_files_of_image(sender, instance, **kwargs):
+    """Delete the files of an image once its deletion is committed."""
+    transaction.on_commit(lambda: delete_image_files(instance))
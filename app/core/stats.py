@@ -0,0 +1,152 @@
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+
+# RecipeStats field counting the recipes priced below each bound, the
+# last one counts the rest.
+PRICE_BUCKETS = (
+    ('price_under_5', Decimal('5')),
+    ('price_under_10', Decimal('10')),
+    ('price_under_20', Decimal('20')),
+    ('price_under_50', Decimal('50')),
+    ('price_50_and_over', None),
+)
+
+# Named models along with the through table and column of their recipes.
+NAMED_RELATIONS = {
+    Tag: (Recipe.tags.through, 'tag_id'),
+    Ingredient: (Recipe.ingredients.through, 'ingredient_id'),
+}
+
+
+def price_bucket(price):
+    """Return the RecipeStats field counting recipes of the given price."""
+    for field, bound in PRICE_BUCKETS:
+        if bound is None or price < bound:
+            return field
+
+
+def recipe_values(recipe):
+    """Return the (time_minutes, price) of recipe the rollup depends on."""
+    return (
+        Recipe._meta.get_field('time_minutes').to_python(
+            recipe.time_minutes),
+        Recipe._meta.get_field('price').to_python(recipe.price),
+    )
+
+
+def apply_recipe_changes(user_id, changes):
+    """
+    Update the rollup of user_id for the given (old, new) pairs of
+    recipe_values, old being None for created recipes and new None for
+    deleted ones, with a single UPDATE.
+
+    The row is only ever updated, it is created along with its user or
+    rebuilt on first read, like CollectionVersion.
+    """
+    deltas = defaultdict(int)
+    for old, new in changes:
+        for values, sign in ((old, -1), (new, 1)):
+            if values is None:
+                continue
+            time_minutes, price = values
+            deltas['recipe_count'] += sign
+            deltas['total_time_minutes'] += sign * time_minutes
+            deltas['total_price'] += sign * price
+            deltas[price_bucket(price)] += sign
+
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if deltas:
+        RecipeStats.objects.filter(user_id=user_id).update(
+            **{field: F(field) + delta for field, delta in deltas.items()})
+
+
+def adjust_recipe_counts(model, deltas):
+    """
+    Add deltas[id] to the recipe_count of the tags or ingredients with
+    the given ids, with one UPDATE per distinct delta.
+    """
+    ids_by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            ids_by_delta[delta].append(pk)
+
+    for delta, ids in ids_by_delta.items():
+        model.objects.filter(id__in=ids).update(
+            recipe_count=F('recipe_count') + delta)
+
+
+def count_related(through, field, recipe_ids):
+    """Return a Counter of the related ids of the given recipes."""
+    return Counter(through.objects.filter(
+        recipe_id__in=recipe_ids).values_list(field, flat=True))
+
+
+def refresh_recipe_counts(through, field, ids):
+    """
+    Recount the recipes of the tags or ingredients with the given ids
+    from the through table.
+    """
+    counts = through.objects.filter(
+        **{field: OuterRef('pk')}
+    ).order_by().values(field).annotate(count=Count('*')).values('count')
+    through._meta.get_field(field).related_model.objects.filter(
+        id__in=ids
+    ).update(recipe_count=Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0))
+
+
+def rebuild_recipe_stats(user_ids):
+    """
+    Recompute the rollups of the given users from their recipes, and
+    the recipe counts of their tags and ingredients.
+    """
+    buckets = {}
+    low = None
+    for field, bound in PRICE_BUCKETS:
+        condition = Q()
+        if low is not None:
+            condition &= Q(price__gte=low)
+        if bound is not None:
+            condition &= Q(price__lt=bound)
+        buckets[field] = Count('id', filter=condition)
+        low = bound
+
+    rows = {
+        row.pop('user_id'): row
+        for row in Recipe.objects.filter(
+            user_id__in=user_ids
+        ).order_by().values('user_id').annotate(
+            recipe_count=Count('id'),
+            total_time_minutes=Coalesce(Sum('time_minutes'), 0),
+            total_price=Coalesce(Sum('price'), 0),
+            **buckets
+        )
+    }
+    with transaction.atomic():
+        RecipeStats.objects.filter(user_id__in=user_ids).delete()
+        RecipeStats.objects.bulk_create([
+            RecipeStats(user_id=user_id, **rows.get(user_id, {}))
+            for user_id in user_ids
+        ])
+
+        for model, (through, field) in NAMED_RELATIONS.items():
+            refresh_recipe_counts(
+                through, field,
+                model.objects.filter(user_id__in=user_ids).values('id')
+            )
+
+
+def get_recipe_stats(user):
+    """Return the rollup of user, rebuilding it if it is missing."""
+    try:
+        return RecipeStats.objects.get(user=user)
+    except RecipeStats.DoesNotExist:
+        rebuild_recipe_stats([user.id])
+        return RecipeStats.objects.get(user=user)
@@ -0,0 +1,136 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.authentication import get_local_cache, shared_cache_key
+from core.cache import LRUCache
+
+MANAGE_URL = reverse('user_app:manage')
+
+
+class LRUCacheTests(TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        """Test the oldest entry is evicted once the cache is full."""
+        cache = LRUCache(max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    @patch('core.cache.time.monotonic')
+    def test_entries_expire_after_ttl(self, monotonic):
+        """Test that entries aren't returned once their TTL has passed."""
+        cache = LRUCache(ttl=10)
+        monotonic.return_value = 100
+        cache.set('a', 1)
+
+        monotonic.return_value = 109
+        self.assertEqual(cache.get('a'), 1)
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    def setUp(self):
+        get_local_cache().clear()
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            fname='Test',
+            lname='User',
+            password='testpass'
+        )
+        self.token = Token.objects.create(user=self.user)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_token_lookup_is_cached(self):
+        """Test that a cached token is resolved without any query."""
+        self.client.get(MANAGE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+
+    def test_deleted_token_is_rejected(self):
+        """Test that deleting a token evicts it from the cache."""
+        self.client.get(MANAGE_URL)
+        self.token.delete()
+
+        res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating a user evicts their tokens."""
+        self.client.get(MANAGE_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_update_is_visible_on_next_request(self):
+        """Test updating a user through the API refreshes the cache."""
+        self.client.patch(MANAGE_URL, {'fname': 'Updated'})
+
+        res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.data['fname'], 'Updated')
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'MAX_SIZE': 10, 'TTL': 60, 'SHARED_CACHE': 'default'
+    })
+    def test_shared_stamp_keeps_local_entry_valid(self):
+        """Test a token is resolved locally while its shared stamp holds."""
+        self.addCleanup(caches['default'].clear)
+        self.client.get(MANAGE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        stamp = caches['default'].get(shared_cache_key(self.token.key))
+        self.assertIsInstance(stamp, str)
+
+    @override_settings(TOKEN_AUTH_CACHE={
+        'MAX_SIZE': 10, 'TTL': 60, 'SHARED_CACHE': 'default'
+    })
+    def test_token_invalidated_by_other_process_is_rejected(self):
+        """Test deleting a token in another worker reaches this one."""
+        self.addCleanup(caches['default'].clear)
+        self.client.get(MANAGE_URL)
+        # Delete the token as another worker would, with its own local
+        # cache, leaving the entry of this process in place.
+        with patch('core.authentication.get_local_cache',
+                   return_value=LRUCache()):
+            self.token.delete()
+
+        res = self.client.get(MANAGE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_settings_change_resizes_local_cache(self):
+        """Test the local cache is built from the current settings."""
+        with override_settings(TOKEN_AUTH_CACHE={
+                'MAX_SIZE': 3, 'TTL': 7, 'SHARED_CACHE': None}):
+            cache = get_local_cache()
+
+            self.assertEqual((cache.max_size, cache.ttl), (3, 7))
+        self.assertIsNot(get_local_cache(), cache)
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.benchdata import (
+    benchmark_users, clear_benchmark_data, seed_benchmark_data
+)
+from core.benchmarks import SCENARIOS, compare_results, run_benchmarks
+from core.models import CollectionVersion, Recipe, Tag
+from core.search import refresh_search_documents
+
+
+class BenchmarkTests(TestCase):
+
+    def setUp(self):
+        seed_benchmark_data(25, recipes_per_user=10, tags_per_user=5,
+                            ingredients_per_user=8)
+
+    def test_seed_creates_requested_scale(self):
+        """Test seeding spreads the recipes over benchmark users"""
+        users = benchmark_users()
+
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Recipe.objects.filter(user__in=users).count(), 25)
+        self.assertEqual(Tag.objects.filter(user__in=users).count(), 15)
+        self.assertEqual(
+            CollectionVersion.objects.filter(user__in=users).count(), 3)
+        self.assertFalse(Tag.objects.filter(normalized_name='').exists())
+
+    def test_seeded_search_documents_are_current(self):
+        """Test bulk seeded recipes have the search documents of saves"""
+        seeded = dict(Recipe.objects.values_list('id', 'search_document'))
+
+        refresh_search_documents(seeded)
+
+        self.assertEqual(
+            dict(Recipe.objects.values_list('id', 'search_document')),
+            seeded)
+
+    def test_clear_deletes_benchmark_data_only(self):
+        """Test clearing leaves the data of real users alone"""
+        user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Test', 'User', 'testpass')
+        Tag.objects.create(user=user, name='Vegan')
+
+        clear_benchmark_data()
+
+        self.assertFalse(benchmark_users().exists())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(Recipe.tags.through.objects.exists())
+        self.assertEqual(list(Tag.objects.values_list('name', flat=True)),
+                         ['Vegan'])
+
+    def test_run_benchmarks_reports_every_scenario(self):
+        """Test each scenario succeeds and reports latency and queries"""
+        results = run_benchmarks(benchmark_users(), SCENARIOS, 3,
+                                 host='testserver')
+
+        self.assertEqual(set(results), set(SCENARIOS))
+        for result in results.values():
+            self.assertEqual(result['requests'], 3)
+            self.assertEqual(result['errors'], 0)
+            self.assertGreater(result['queries']['mean'], 0)
+            self.assertIn('p99', result['latency_ms'])
+        # Recipes created by the benchmark are cleaned up.
+        self.assertEqual(Recipe.objects.count(), 25)
+
+    def test_compare_results(self):
+        """Test comparing with a baseline reports relative changes"""
+        def result(throughput, p99, queries):
+            return {'throughput': throughput, 'latency_ms': {'p99': p99},
+                    'queries': {'mean': queries}}
+
+        lines = compare_results(
+            {'scenarios': {'tag-list': result(100, 10, 2)}},
+            {'scenarios': {'tag-list': result(150, 5, 1),
+                           'auth': result(10, 1, 2)}}
+        )
+
+        self.assertEqual(len(lines), 1)
+        self.assertIn('throughput +50.0%, p99 -50.0%, queries 2 -> 1',
+                      lines[0])
+
+    def test_benchmark_api_command_writes_json(self):
+        """Test the command writes the results of the chosen scenarios"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command('benchmark_api', requests=2, host='testserver',
+                         scenarios=['tag-list'], output=path)
+            with open(path) as f:
+                results = json.load(f)
+
+        self.assertEqual(list(results['scenarios']), ['tag-list'])
+        self.assertEqual(results['scale']['recipes'], 25)
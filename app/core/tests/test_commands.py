@@ -1,9 +1,13 @@
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Recipe, Tag
+
 
 class CommandTests(TestCase):
 
@@ -22,3 +26,26 @@ class CommandTests(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command('wait_for_db')
             self.assertEqual(gi.call_count, 6)
+
+    def test_normalize_names_merges_duplicates(self):
+        """Test merging tags whose names only differ in case"""
+        user = get_user_model().objects.create_user(
+            'test@gmail.com', 'Test', 'User', 'testpass')
+        kept = Tag.objects.create(user=user, name='Vegan')
+        duplicate = Tag.objects.create(user=user, name='Other')
+        # Simulate a row normalized under older rules.
+        Tag.objects.filter(id=duplicate.id).update(name='VEGAN')
+        recipe = Recipe.objects.create(
+            user=user, title='Curry', time_minutes=30, price=10)
+        recipe.tags.add(duplicate)
+        both = Recipe.objects.create(
+            user=user, title='Salad', time_minutes=5, price=4)
+        both.tags.add(kept, duplicate)
+
+        call_command('normalize_names', stdout=StringIO())
+
+        self.assertEqual(list(Tag.objects.filter(user=user)), [kept])
+        self.assertEqual(list(recipe.tags.all()), [kept])
+        self.assertEqual(list(both.tags.all()), [kept])
+        kept.refresh_from_db()
+        self.assertEqual(kept.recipe_count, 2)
@@ -0,0 +1,202 @@
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from PIL import Image
+
+from core.images import (
+    enqueue_thumbnails, generate_thumbnails, original_name,
+    run_thumbnail_task, shutdown_thumbnail_executor, thumbnail_name
+)
+from core.models import Recipe, RecipeImage
+
+SIZES = {'small': 160, 'medium': 480, 'large': 1080}
+
+
+def create_user(email='test@gmail.com'):
+    return get_user_model().objects.create_user(
+        email=email, password='testpass', fname='Test', lname='User')
+
+
+def run_on_commit(func):
+    func()
+
+
+def store_original(user, size, mode='RGB', color='red', image_format='PNG',
+                   truncate=False):
+    """Store an original image of the user and return its RecipeImage."""
+    content = BytesIO()
+    Image.new(mode, size, color).save(content, image_format)
+    content = content.getvalue()
+    if truncate:
+        content = content[:len(content) // 2]
+    image = RecipeImage.objects.create(
+        user=user, sha256=f'{RecipeImage.objects.count():064x}',
+        format=image_format, width=size[0], height=size[1],
+        size=len(content))
+    default_storage.save(original_name(image), ContentFile(content))
+    return image
+
+
+class ThumbnailTests(TestCase):
+    """Test generating recipe image thumbnails."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.user = create_user()
+
+    def open_thumbnail(self, image, size):
+        with default_storage.open(thumbnail_name(image, size)) as thumbnail:
+            thumbnail = Image.open(thumbnail)
+            thumbnail.load()
+        return thumbnail
+
+    def test_thumbnails_fit_each_size(self):
+        """Test every size is written within its bounds, keeping ratio."""
+        image = store_original(self.user, (2000, 1000))
+
+        generate_thumbnails(image.id)
+
+        for size, pixels in SIZES.items():
+            thumbnail = self.open_thumbnail(image, size)
+            self.assertEqual(thumbnail.format, 'JPEG')
+            self.assertEqual(thumbnail.size, (pixels, pixels // 2))
+        image.refresh_from_db()
+        self.assertTrue(image.thumbnails_ready)
+
+    def test_small_images_are_not_enlarged(self):
+        image = store_original(self.user, (100, 50))
+
+        generate_thumbnails(image.id)
+
+        self.assertEqual(self.open_thumbnail(image, 'large').size, (100, 50))
+
+    def test_transparency_is_flattened_on_white(self):
+        image = store_original(self.user, (200, 200), mode='RGBA',
+                               color=(0, 0, 0, 0))
+
+        generate_thumbnails(image.id)
+
+        pixel = self.open_thumbnail(image, 'small').getpixel((80, 80))
+        self.assertTrue(all(channel > 250 for channel in pixel))
+
+    def test_shutdown_finishes_queued_thumbnails(self):
+        """Test exiting workers generate what they have queued first."""
+        done = []
+
+        def run_thumbnail_task(image_id):
+            time.sleep(0.01)
+            done.append(image_id)
+
+        with patch('core.images.run_thumbnail_task', run_thumbnail_task):
+            for image_id in range(5):
+                enqueue_thumbnails(image_id)
+            shutdown_thumbnail_executor()
+
+        self.assertEqual(sorted(done), list(range(5)))
+
+    def test_command_generates_pending_thumbnails(self):
+        """Test the command only processes images that aren't ready."""
+        pending = store_original(self.user, (300, 300))
+        ready = store_original(self.user, (300, 300), color='blue')
+        RecipeImage.objects.filter(id=ready.id).update(thumbnails_ready=True)
+
+        call_command('generate_thumbnails', stdout=StringIO())
+
+        self.assertTrue(
+            default_storage.exists(thumbnail_name(pending, 'small')))
+        self.assertFalse(
+            default_storage.exists(thumbnail_name(ready, 'small')))
+
+    def test_failed_task_is_logged_and_marked(self):
+        """Test background failures don't leave images silently pending."""
+        image = store_original(self.user, (300, 300), truncate=True)
+
+        with self.assertLogs('core.images', 'ERROR'):
+            run_thumbnail_task(image.id)
+
+        image.refresh_from_db()
+        self.assertFalse(image.thumbnails_ready)
+        self.assertTrue(image.thumbnails_failed)
+
+    def test_command_continues_past_broken_images(self):
+        """Test a broken original is reported without stopping the rest."""
+        broken = store_original(self.user, (300, 300), truncate=True)
+        pending = store_original(self.user, (300, 300), color='blue')
+        stderr = StringIO()
+
+        call_command('generate_thumbnails', stdout=StringIO(), stderr=stderr)
+
+        self.assertIn(f'Image {broken.id} failed', stderr.getvalue())
+        broken.refresh_from_db()
+        self.assertTrue(broken.thumbnails_failed)
+        self.assertTrue(
+            default_storage.exists(thumbnail_name(pending, 'small')))
+
+
+class ImageCleanupTests(TestCase):
+    """Test deleting recipe images and their files."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        on_commit = patch('core.signals.transaction.on_commit', run_on_commit)
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+
+        self.user = create_user()
+
+    def age(self, image, seconds):
+        RecipeImage.objects.filter(id=image.id).update(
+            created_at=timezone.now() - timedelta(seconds=seconds))
+
+    def test_command_deletes_unused_images(self):
+        """Test only old images no recipe uses are deleted, with files."""
+        unused = store_original(self.user, (300, 300))
+        generate_thumbnails(unused.id)
+        used = store_original(self.user, (300, 300), color='blue')
+        Recipe.objects.create(user=self.user, title='Sample', time_minutes=5,
+                              price=5, image=used)
+        recent = store_original(self.user, (300, 300), color='green')
+        self.age(unused, 7200)
+        self.age(used, 7200)
+        stdout = StringIO()
+
+        call_command('delete_unused_images', stdout=stdout)
+
+        self.assertIn('Deleted 1 unused images', stdout.getvalue())
+        self.assertEqual(
+            set(RecipeImage.objects.values_list('id', flat=True)),
+            {used.id, recent.id})
+        self.assertFalse(default_storage.exists(original_name(unused)))
+        self.assertFalse(
+            default_storage.exists(thumbnail_name(unused, 'small')))
+        self.assertTrue(default_storage.exists(original_name(used)))
+        self.assertTrue(default_storage.exists(original_name(recent)))
+
+    def test_deleting_user_deletes_image_files(self):
+        """Test the files of a deleted user's images are deleted too."""
+        image = store_original(self.user, (300, 300))
+
+        self.user.delete()
+
+        self.assertFalse(RecipeImage.objects.exists())
+        self.assertFalse(default_storage.exists(original_name(image)))
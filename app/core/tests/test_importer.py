@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.importer import RecipeImporter
+from core.models import Tag, Ingredient, Recipe
+
+
+def sample_user(email='test@gmail.com', password='testpass123',
+                fname='Test', lname='User'):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(
+        email=email,
+        fname=fname,
+        lname=lname,
+        password=password
+    )
+
+
+def ndjson_lines(*records):
+    return [json.dumps(record) + '\n' for record in records]
+
+
+class RecipeImporterTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+
+    def test_import_ndjson_creates_recipes_and_relations(self):
+        """Test importing recipes creates missing tags and ingredients."""
+        existing = Tag.objects.create(user=self.user, name='Dinner')
+        lines = ndjson_lines(
+            {'title': 'Curry', 'time_minutes': 30, 'price': '12.50',
+             'tags': ['Dinner', 'Spicy'], 'ingredients': ['Rice']},
+            {'title': 'Rice', 'time_minutes': 20, 'price': 2,
+             'tags': ['Dinner'], 'ingredients': ['Rice', 'Rice']},
+        )
+
+        report = RecipeImporter(self.user, batch_size=1).run(lines, 'ndjson')
+
+        self.assertEqual(report['recipes'], 2)
+        self.assertEqual(report['tags'], 1)
+        self.assertEqual(report['ingredients'], 1)
+        curry = Recipe.objects.get(title='Curry')
+        self.assertIn(existing, curry.tags.all())
+        self.assertEqual(curry.tags.count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 1)
+
+    def test_import_csv(self):
+        """Test importing recipes from CSV in the export format."""
+        lines = [
+            'id,title,time_minutes,price,link,tags,ingredients\n',
+            '1,Curry,30,12.50,,Dinner|Spicy,Rice\n',
+        ]
+
+        report = RecipeImporter(self.user).run(lines, 'csv')
+
+        self.assertEqual(report['recipes'], 1)
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(
+            sorted(recipe.tags.values_list('name', flat=True)),
+            ['Dinner', 'Spicy']
+        )
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        """Test invalid records are skipped with their line numbers."""
+        lines = ndjson_lines(
+            {'title': 'Curry', 'time_minutes': 30, 'price': '12.50'},
+            {'title': 'No time', 'price': '1.00'},
+        ) + ['not json\n']
+
+        report = RecipeImporter(self.user).run(lines, 'ndjson')
+
+        self.assertEqual(report['recipes'], 1)
+        self.assertEqual(
+            [error['line'] for error in report['errors']], [2, 3])
+        self.assertEqual(Recipe.objects.count(), 1)
+
+
+class ImportRecipesCommandTests(TestCase):
+
+    def test_import_recipes_from_file(self):
+        """Test the command imports a file for the given user."""
+        user = sample_user()
+        with tempfile.NamedTemporaryFile(
+                'w', suffix='.ndjson', delete=False) as source:
+            source.writelines(ndjson_lines(
+                {'title': 'Curry', 'time_minutes': 30, 'price': '12.50'}))
+        self.addCleanup(os.remove, source.name)
+
+        out = StringIO()
+        call_command('import_recipes', source.name, email=user.email,
+                     stdout=out)
+
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 1)
+        self.assertIn('Imported 1 recipes', out.getvalue())
+
+    def test_unknown_user_fails(self):
+        """Test the command fails for an unknown user."""
+        with self.assertRaises(CommandError):
+            call_command('import_recipes', 'recipes.ndjson',
+                         email='nobody@gmail.com')
+
+    def test_invalid_utf8_file_fails(self):
+        """Test a file that isn't UTF-8 is rejected naming the line."""
+        user = sample_user()
+        with tempfile.NamedTemporaryFile(
+                'wb', suffix='.ndjson', delete=False) as source:
+            source.write(
+                b'{"title": "Curry", "time_minutes": 30, "price": "12.50"}\n'
+                b'{"title": "Cr\xe8me", "time_minutes": 5, "price": "2"}\n')
+        self.addCleanup(os.remove, source.name)
+
+        with self.assertRaisesMessage(CommandError, 'Line 2'):
+            call_command('import_recipes', source.name, email=user.email,
+                         stdout=StringIO())
+
+        self.assertFalse(Recipe.objects.exists())
@@ -0,0 +1,98 @@
+import os
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.metrics import registry
+from core.models import Recipe, Tag
+
+TAGS_URL = reverse('recipe_app:tag-list')
+METRICS_URL = reverse('metrics')
+EXPORT_URL = reverse('recipe_app:recipe-export')
+
+
+class MetricsTests(TestCase):
+    """Test the per view request metrics"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='test@gmail.com',
+            fname='Test',
+            lname='User',
+            password='testpass'
+        )
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        registry.clear()
+
+    def tearDown(self):
+        registry.clear()
+
+    def histograms(self, view):
+        return registry.histograms[(view, 'GET')]
+
+    def test_request_measurements_are_recorded(self):
+        """Test queries, serializer time and size are recorded per view"""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        histograms = self.histograms('recipe_app:tag-list')
+        self.assertEqual(histograms['duration_seconds'].count, 1)
+        self.assertGreater(histograms['db_queries'].sum, 0)
+        self.assertGreater(histograms['serializer_seconds'].sum, 0)
+        self.assertEqual(
+            histograms['response_bytes'].sum, len(res.content))
+        self.assertEqual(
+            registry.requests[('recipe_app:tag-list', 'GET', '2xx')], 1)
+
+    def test_streaming_response_measured_when_consumed(self):
+        """Test streamed bytes and the queries made streaming count"""
+        Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=10, price=5)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertNotIn(('recipe_app:recipe-export', 'GET'),
+                         registry.histograms)
+        content = b''.join(res.streaming_content)
+        res.close()
+        histograms = self.histograms('recipe_app:recipe-export')
+        self.assertEqual(histograms['duration_seconds'].count, 1)
+        self.assertEqual(histograms['response_bytes'].sum, len(content))
+        self.assertGreater(histograms['db_queries'].sum, 0)
+
+    @override_settings(METRICS={'ENABLED': True, 'SAMPLE_RATE': 0.0})
+    def test_unsampled_requests_are_not_recorded(self):
+        """Test requests outside the sample are not measured"""
+        self.client.get(TAGS_URL)
+
+        self.assertEqual(registry.histograms, {})
+
+    def test_metrics_require_admin(self):
+        """Test regular users can't read the metrics"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_metrics_are_exposed_to_admins(self):
+        """Test admins get the metrics in the Prometheus text format"""
+        self.user.is_staff = True
+        self.user.save()
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        pid = os.getpid()
+        self.assertIn(
+            f'api_requests_total{{pid="{pid}",view="recipe_app:tag-list",'
+            f'method="GET",status="2xx"}} 1', body)
+        self.assertIn(
+            f'api_request_db_queries_bucket{{pid="{pid}",'
+            f'view="recipe_app:tag-list",method="GET",le="+Inf"}} 1', body)
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+from django.test import SimpleTestCase
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import (
+    TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+)
+
+from core.backends.postgresql.pool import ConnectionPool
+
+
+def fake_connection(status=TRANSACTION_STATUS_IDLE):
+    """Return a stand in for an open psycopg2 connection."""
+    connection = MagicMock(closed=0)
+    connection.info.transaction_status = status
+    return connection
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_returned_connection_is_reused(self):
+        """Test a connection given back is handed out again."""
+        pool = ConnectionPool(max_size=2)
+        connection = pool.get(fake_connection)
+        pool.put(connection)
+
+        self.assertIs(pool.get(fake_connection), connection)
+
+    def test_connection_returned_in_transaction_is_rolled_back(self):
+        """Test pooled connections never carry an open transaction."""
+        pool = ConnectionPool(max_size=1)
+        connection = pool.get(
+            lambda: fake_connection(TRANSACTION_STATUS_INTRANS))
+        pool.put(connection)
+
+        connection.rollback.assert_called_once()
+        self.assertEqual(len(pool), 1)
+
+    def test_unusable_connection_is_replaced(self):
+        """Test idle connections failing the check are closed."""
+        pool = ConnectionPool(max_size=1)
+        stale = pool.get(fake_connection)
+        pool.put(stale)
+
+        connection = pool.get(fake_connection, check=lambda conn: False)
+
+        self.assertIsNot(connection, stale)
+        stale.close.assert_called_once()
+
+    def test_discarded_connection_is_closed(self):
+        """Test connections with errors aren't pooled."""
+        pool = ConnectionPool(max_size=1)
+        connection = pool.get(fake_connection)
+        pool.put(connection, discard=True)
+
+        connection.close.assert_called_once()
+        self.assertEqual(len(pool), 0)
+
+    def test_get_times_out_when_exhausted(self):
+        """Test waiting for a connection is bounded by the timeout."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        pool.get(fake_connection)
+
+        with self.assertRaises(OperationalError):
+            pool.get(fake_connection)
+
+    def test_failed_connect_frees_slot(self):
+        """Test a connection error doesn't leak a pool slot."""
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        def fail():
+            raise OperationalError('refused')
+
+        with self.assertRaises(OperationalError):
+            pool.get(fail)
+
+        self.assertIsNotNone(pool.get(fake_connection))
@@ -0,0 +1,148 @@
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.db import connection
+from django.db.backends.postgresql import base
+from django.test import SimpleTestCase, TestCase
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+from core.backends.postgresql import pool
+from core.backends.postgresql.base import DatabaseWrapper
+
+
+def fake_connection():
+    """Return a stand in for an open psycopg2 connection."""
+    raw = MagicMock(closed=0, autocommit=True, isolation_level=None)
+    raw.info.transaction_status = TRANSACTION_STATUS_IDLE
+    return raw
+
+
+def create_wrapper(alias, **settings):
+    """Return a backend wrapper for an alias with the given settings."""
+    settings_dict = {
+        'NAME': 'app', 'USER': '', 'PASSWORD': '', 'HOST': '', 'PORT': '',
+        'OPTIONS': {}, 'CONN_MAX_AGE': 0, 'AUTOCOMMIT': True,
+        'ATOMIC_REQUESTS': False, 'TIME_ZONE': None, 'TEST': {},
+    }
+    settings_dict.update(settings)
+    return DatabaseWrapper(settings_dict, alias)
+
+
+class PooledBackendTests(SimpleTestCase):
+    """Test the backend hands connections to and from its pool."""
+
+    def setUp(self):
+        connect = patch.object(base.DatabaseWrapper, 'get_new_connection',
+                               side_effect=lambda params: fake_connection())
+        self.connect = connect.start()
+        self.addCleanup(connect.stop)
+        self.addCleanup(pool._pools.clear)
+
+    def checkout(self, wrapper):
+        wrapper.connection = wrapper.get_new_connection({})
+        return wrapper.connection
+
+    def test_closed_connection_is_checked_out_again(self):
+        """Test closing returns the connection for the next checkout."""
+        wrapper = create_wrapper('pooled', POOL={'MAX_SIZE': 1})
+        raw = self.checkout(wrapper)
+
+        wrapper._close()
+
+        raw.close.assert_not_called()
+        self.assertIs(self.checkout(wrapper), raw)
+        self.connect.assert_called_once()
+
+    def test_connection_with_errors_is_discarded(self):
+        """Test a connection that had errors isn't pooled."""
+        wrapper = create_wrapper('pooled', POOL={'MAX_SIZE': 1})
+        raw = self.checkout(wrapper)
+        wrapper.errors_occurred = True
+
+        wrapper._close()
+
+        raw.close.assert_called_once()
+        self.assertIsNot(self.checkout(wrapper), raw)
+
+    def test_health_check_replaces_broken_connection(self):
+        """Test CONN_HEALTH_CHECKS skips pooled connections that fail."""
+        wrapper = create_wrapper(
+            'pooled', POOL={'MAX_SIZE': 1}, CONN_HEALTH_CHECKS=True)
+        broken = self.checkout(wrapper)
+        broken.cursor.return_value.__enter__.return_value.execute \
+            .side_effect = base.Database.OperationalError
+        wrapper._close()
+
+        raw = self.checkout(wrapper)
+
+        self.assertIsNot(raw, broken)
+        broken.close.assert_called_once()
+        self.assertTrue(wrapper.health_check_done)
+
+    def test_failed_health_check_discards_pooled_connection(self):
+        """Test a connection failing its check isn't pooled again."""
+        options = {'MAX_SIZE': 1}
+        wrapper = create_wrapper(
+            'pooled', POOL=options, CONN_HEALTH_CHECKS=True)
+        broken = self.checkout(wrapper)
+        wrapper.health_check_done = False
+
+        with patch.object(wrapper, 'is_usable', return_value=False), \
+                patch.object(wrapper, 'connect') as connect:
+            wrapper.ensure_connection()
+
+        broken.close.assert_called_once()
+        self.assertEqual(len(pool.get_pool('pooled', options)), 0)
+        connect.assert_called_once()
+
+    def test_forked_process_gets_own_pool(self):
+        """Test a child process doesn't reuse the parent's connections."""
+        wrapper = create_wrapper('pooled', POOL={'MAX_SIZE': 1})
+        parent = self.checkout(wrapper)
+        wrapper._close()
+
+        with patch.object(pool.os, 'getpid', return_value=-1):
+            child = self.checkout(wrapper)
+
+        self.assertIsNot(child, parent)
+        self.assertEqual(self.connect.call_count, 2)
+
+    def test_health_check_runs_once_per_request(self):
+        """Test a persistent connection is checked only on first use."""
+        wrapper = create_wrapper('persistent', CONN_HEALTH_CHECKS=True)
+        wrapper.connection = fake_connection()
+
+        with patch.object(wrapper, 'is_usable',
+                          return_value=True) as is_usable:
+            wrapper.ensure_connection()
+            wrapper.ensure_connection()
+            self.assertEqual(is_usable.call_count, 1)
+
+            wrapper.close_if_unusable_or_obsolete()
+            wrapper.ensure_connection()
+            self.assertEqual(is_usable.call_count, 2)
+
+    def test_unusable_persistent_connection_reconnects(self):
+        """Test a dropped persistent connection is replaced, not used."""
+        wrapper = create_wrapper('persistent', CONN_HEALTH_CHECKS=True)
+        dropped = wrapper.connection = fake_connection()
+
+        with patch.object(wrapper, 'is_usable', return_value=False), \
+                patch.object(wrapper, 'connect') as connect:
+            wrapper.ensure_connection()
+
+        dropped.close.assert_called_once()
+        connect.assert_called_once()
+
+
+@skipUnless(isinstance(connection, DatabaseWrapper),
+            'Requires the pooled Postgres backend.')
+class PostgresBackendTests(TestCase):
+    """Test the backend against the configured Postgres server."""
+
+    def test_connection_is_usable(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+        self.assertTrue(connection.connection_is_usable(connection.connection))
@@ -0,0 +1,84 @@
+import datetime
+import io
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+
+SAMPLE = OrderedDict([
+    ('id', 1),
+    ('title', 'Jollof \u2028Rice\u2029 caf\xe9 \u2603'),
+    ('price', Decimal('12.50')),
+    ('ratio', 0.1),
+    ('created', datetime.datetime(
+        2020, 5, 24, 12, 31, 5, 123456, tzinfo=timezone.utc)),
+    ('day', datetime.date(2020, 5, 24)),
+    ('uuid', uuid.UUID('12345678123456781234567812345678')),
+    ('label', gettext_lazy('Personal Info')),
+    ('counts', {1: 'one', 'two': None}),
+    ('tags', [1, 2, 3]),
+    ('control', 'tab\there\x01'),
+])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_output_matches_json_renderer(self):
+        """Test orjson renders the same bytes as DRF's renderer"""
+        self.assertEqual(FastJSONRenderer().render(SAMPLE),
+                         JSONRenderer().render(SAMPLE))
+
+    def test_indented_output_matches_json_renderer(self):
+        """Test indented output is left to DRF's renderer"""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            FastJSONRenderer().render(SAMPLE, media_type),
+            JSONRenderer().render(SAMPLE, media_type))
+
+    def test_large_integers_fall_back(self):
+        """Test integers orjson can't encode are still rendered"""
+        data = {'big': 2 ** 70}
+
+        self.assertEqual(FastJSONRenderer().render(data),
+                         JSONRenderer().render(data))
+
+    @patch('core.renderers.orjson', None)
+    def test_stdlib_without_orjson(self):
+        """Test rendering works without orjson installed"""
+        self.assertEqual(FastJSONRenderer().render(SAMPLE),
+                         JSONRenderer().render(SAMPLE))
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def parse(self, body):
+        return FastJSONParser().parse(io.BytesIO(body))
+
+    def test_parses_json(self):
+        """Test JSON bodies are parsed, large integers included"""
+        body = b'{"title": "caf\xc3\xa9", "big": 1180591620717411303424}'
+
+        self.assertEqual(self.parse(body),
+                         {'title': 'caf\xe9', 'big': 2 ** 70})
+
+    def test_rejects_invalid_json(self):
+        """Test invalid bodies and NaN raise a parse error"""
+        for body in (b'{"title": ', b'{"price": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
+
+    @patch('core.parsers.orjson', None)
+    def test_stdlib_without_orjson(self):
+        """Test parsing works without orjson installed"""
+        self.assertEqual(self.parse(b'[1, 2]'), [1, 2])
@@ -0,0 +1,71 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.checks import LOCAL_CACHE_BACKENDS, check_replica_pin_cache
+from core.models import Recipe
+from core.routers import ReplicaRouter, choose_replica, replica_reads
+
+
+@override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self):
+        """Test reads outside of replica views use the primary."""
+        self.assertEqual(self.router.db_for_read(Recipe), 'default')
+
+    def test_replica_reads_go_to_the_chosen_replica(self):
+        """Test every read of a context goes to the same replica."""
+        token = replica_reads.set('replica_1')
+        try:
+            aliases = {self.router.db_for_read(Recipe) for _ in range(10)}
+        finally:
+            replica_reads.reset(token)
+
+        self.assertEqual(aliases, {'replica_1'})
+
+    def test_choose_replica(self):
+        """Test replicas are picked among the configured ones."""
+        self.assertIn(choose_replica(), ['replica_0', 'replica_1'])
+
+    def test_writes_always_go_to_primary(self):
+        """Test writes never go to a replica."""
+        token = replica_reads.set('replica_0')
+        try:
+            alias = self.router.db_for_write(Recipe)
+        finally:
+            replica_reads.reset(token)
+
+        self.assertEqual(alias, 'default')
+
+    def test_replicas_are_never_migrated(self):
+        """Test migrations only run against the primary."""
+        self.assertFalse(self.router.allow_migrate('replica_0', 'core'))
+        self.assertIsNone(self.router.allow_migrate('default', 'core'))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_to_choose(self):
+        """Test no replica is chosen when there are none."""
+        self.assertIsNone(choose_replica())
+
+
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'], CACHES={
+        'default': {'BACKEND': LOCAL_CACHE_BACKENDS[0]}})
+    def test_local_pin_cache_with_replicas_fails(self):
+        """Test replicas require a pin cache shared between processes."""
+        errors = check_replica_pin_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['core.E001'])
+
+    @override_settings(DATABASE_REPLICAS=['replica_0'], CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache'}})
+    def test_shared_pin_cache_with_replicas_passes(self):
+        self.assertEqual(check_replica_pin_cache(None), [])
+
+    @override_settings(DATABASE_REPLICAS=[], CACHES={
+        'default': {'BACKEND': LOCAL_CACHE_BACKENDS[0]}})
+    def test_local_pin_cache_without_replicas_passes(self):
+        self.assertEqual(check_replica_pin_cache(None), [])
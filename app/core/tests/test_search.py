@@ -0,0 +1,110 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from core import models
+from core.search import search_recipes
+
+
+def sample_user(email='test@gmail.com', password='testpass123',
+                fname='Test', lname='User'):
+    """Create a sample user"""
+    return get_user_model().objects.create_user(
+        email=email,
+        fname=fname,
+        lname=lname,
+        password=password
+    )
+
+
+class SearchDocumentTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+        self.recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='Jollof Rice',
+            time_minutes=5,
+            price=5.00
+        )
+
+    def document(self):
+        self.recipe.refresh_from_db()
+        return self.recipe.search_document
+
+    def test_document_contains_title(self):
+        """Test a new recipe is searchable by its title."""
+        self.assertEqual(self.document(), 'Jollof Rice')
+
+    def test_document_follows_title_and_relations(self):
+        """Test the document tracks the title, tags and ingredients."""
+        tag = models.Tag.objects.create(user=self.user, name='Spicy')
+        ingredient = models.Ingredient.objects.create(
+            user=self.user, name='Tomato')
+        self.recipe.tags.add(tag)
+        self.recipe.ingredients.add(ingredient)
+        self.recipe.title = 'Party Jollof'
+        self.recipe.save()
+
+        self.assertEqual(self.document(), 'Party Jollof Spicy Tomato')
+
+        self.recipe.tags.remove(tag)
+        self.assertEqual(self.document(), 'Party Jollof Tomato')
+
+    def test_document_follows_renamed_and_deleted_names(self):
+        """Test renaming or deleting a tag updates recipes using it."""
+        tag = models.Tag.objects.create(user=self.user, name='Spicy')
+        tag.recipe_set.add(self.recipe)
+        tag.name = 'Hot'
+        tag.save()
+
+        self.assertEqual(self.document(), 'Jollof Rice Hot')
+
+        tag.delete()
+        self.assertEqual(self.document(), 'Jollof Rice')
+
+    def test_document_follows_reverse_clear(self):
+        """Test clearing a tag's recipes updates those recipes."""
+        tag = models.Tag.objects.create(user=self.user, name='Spicy')
+        tag.recipe_set.add(self.recipe)
+        tag.recipe_set.clear()
+
+        self.assertEqual(self.document(), 'Jollof Rice')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Requires Postgres.')
+class SearchVectorTests(TestCase):
+
+    def setUp(self):
+        self.user = sample_user()
+        self.recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='Jollof Rice',
+            time_minutes=5,
+            price=5.00
+        )
+
+    def search(self, query):
+        return search_recipes(
+            models.Recipe.objects.filter(user=self.user), query, limit=10)
+
+    def test_vector_follows_title_and_relations(self):
+        """Test the stored vector is updated along with the document."""
+        self.assertEqual(self.search('rice'), [self.recipe])
+
+        tag = models.Tag.objects.create(user=self.user, name='Spicy')
+        self.recipe.tags.add(tag)
+        self.assertEqual(self.search('spicy'), [self.recipe])
+
+        tag.delete()
+        self.assertEqual(self.search('spicy'), [])
+
+    def test_matches_ranked_by_stored_vector(self):
+        """Test recipes matching more often rank first."""
+        other = models.Recipe.objects.create(
+            user=self.user, title='Rice and Rice', time_minutes=5,
+            price=5.00)
+
+        self.assertEqual(self.search('rice'), [other, self.recipe])
@@ -0,0 +1,62 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import CollectionVersion
+
+_deferred = threading.local()
+
+
+def get_collection_version(user):
+    """
+    Return the CollectionVersion of user, creating it for users that
+    signed up before versions were tracked.
+
+    It is read from the database the rest of the request reads from,
+    which may be a replica, and only created on the primary if missing.
+    """
+    version = CollectionVersion.objects.filter(user=user).first()
+    if version is None:
+        version, _ = CollectionVersion.objects.get_or_create(user=user)
+    return version
+
+
+def bump_collection_version(user_id):
+    """
+    Mark everything user_id owns as changed.
+
+    Inside deferred_version_bumps() the bump is postponed until the
+    block exits, so bulk writes bump each user once instead of once per
+    object.
+    """
+    pending = getattr(_deferred, 'user_ids', None)
+    if pending is not None:
+        pending.add(user_id)
+        return
+
+    # Only ever UPDATE here: rows are created along with their user or on
+    # first read, and no client can hold a validator for a version never
+    # read. Creating rows here could race with the user being deleted.
+    CollectionVersion.objects.filter(user_id=user_id).update(
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+
+
+@contextmanager
+def deferred_version_bumps():
+    """Collect version bumps in the block and apply them on exit."""
+    if getattr(_deferred, 'user_ids', None) is not None:
+        yield
+        return
+
+    _deferred.user_ids = set()
+    try:
+        yield
+    finally:
+        user_ids, _deferred.user_ids = _deferred.user_ids, None
+
+    for user_id in user_ids:
+        bump_collection_version(user_id)
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.http import HttpResponse
+
+from rest_framework import permissions
+from rest_framework.views import APIView
+
+from core.authentication import CachedTokenAuthentication
+from core.metrics import registry
+
+
+class MetricsView(APIView):
+    """Expose the request metrics of this process to admins."""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(settings.METRICS['SAMPLE_RATE']),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
@@ -0,0 +1,46 @@
+"""
+Production gunicorn settings, e.g.:
+
+    gunicorn -c gunicorn.conf.py app.wsgi
+
+Every setting can be overridden with the environment variables below.
+Set GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker and serve
+app.asgi to run the async endpoints natively.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# The usual 2 * CPUs + 1 sync workers, one is enough per CPU with the
+# uvicorn worker since it multiplexes requests on an event loop.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'sync')
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY',
+    multiprocessing.cpu_count() * (1 if 'uvicorn' in worker_class else 2) + 1
+))
+
+# Import the app once in the master so workers fork with it loaded.
+# Database connections, pools and thread pools are all created lazily
+# per process, so nothing is shared across the fork.
+preload_app = True
+
+# Recycle workers after a jittered number of requests so slow leaks
+# can't grow unbounded, without every worker restarting at once. See
+# worker_exit for the background work they still hold.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+
+
+def worker_exit(server, worker):
+    """Finish the queued recipe thumbnails before a worker goes away."""
+    from core.images import shutdown_thumbnail_executor
+
+    shutdown_thumbnail_executor()
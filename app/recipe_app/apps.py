@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class RecipeAppConfig(AppConfig):
     name = 'recipe_app'
+
+    def ready(self):
+        from recipe_app import signals  # noqa: F401
@@ -0,0 +1,116 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import CharField, Func
+from django.dispatch import receiver
+
+from core.cache import LRUCache
+from core.models import normalize_name
+
+_name_cache = None
+_name_cache_lock = threading.Lock()
+
+
+class CodePointOrder(Func):
+    """
+    An expression compared by code point, like Python strings. Postgres
+    needs the "C" collation for that; SQLite already compares bytes.
+    """
+    template = '%(expressions)s'
+    output_field = CharField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection,
+                           template='%(expressions)s COLLATE "C"',
+                           **extra_context)
+
+
+class SortedNameCache:
+    """
+    In-process cache of the sorted names of hot users' tags or
+    ingredients, answering prefix lookups with a binary search.
+
+    A user only gets cached after HOT_THRESHOLD lookups in quick
+    succession. Other processes can't see this process' invalidations, so
+    TTL also bounds how stale a name list can get.
+    """
+
+    def __init__(self, options):
+        self.hot_threshold = options['HOT_THRESHOLD']
+        self.max_names = options['MAX_NAMES']
+        self.names = LRUCache(max_size=options['MAX_USERS'],
+                              ttl=options['TTL'])
+        self.lookups = LRUCache(max_size=options['MAX_USERS'] * 10,
+                                ttl=options['TTL'])
+
+    def get(self, model, user_id):
+        """Return the cached sorted names, or None if the user isn't hot."""
+        key = (model._meta.label, user_id)
+        entries = self.names.get(key)
+        if entries is not None:
+            return entries
+
+        lookups = self.lookups.get(key, 0) + 1
+        self.lookups.set(key, lookups)
+        if lookups < self.hot_threshold:
+            return None
+
+        entries = sorted(model.objects.filter(user_id=user_id).values_list(
+            'normalized_name', 'id', 'name')[:self.max_names + 1])
+        if len(entries) > self.max_names:
+            return None
+
+        self.names.set(key, entries)
+        return entries
+
+    def invalidate(self, model, user_id):
+        self.names.delete((model._meta.label, user_id))
+
+
+def get_name_cache():
+    """Return the autocomplete name cache, created from the settings."""
+    global _name_cache
+    with _name_cache_lock:
+        if _name_cache is None:
+            _name_cache = SortedNameCache(settings.AUTOCOMPLETE_CACHE)
+        return _name_cache
+
+
+@receiver(setting_changed)
+def reset_name_cache(setting, **kwargs):
+    """Recreate the name cache with the new settings when they change."""
+    global _name_cache
+    if setting == 'AUTOCOMPLETE_CACHE':
+        with _name_cache_lock:
+            _name_cache = None
+
+
+def autocomplete(queryset, user_id, prefix, limit):
+    """
+    Return up to limit {'id', 'name'} dicts of the user's objects whose
+    normalized name starts with the normalized prefix, ordered by
+    normalized name and id whether or not the names are cached.
+    """
+    prefix = normalize_name(prefix)
+    entries = get_name_cache().get(queryset.model, user_id)
+
+    if entries is None:
+        # Matches the (user_id, normalized_name "C") index of migration
+        # 0015, which orders like the sorted cache entries.
+        rows = queryset.filter(user_id=user_id).annotate(
+            name_key=CodePointOrder('normalized_name')
+        ).filter(
+            name_key__startswith=prefix
+        ).order_by('name_key', 'id').values_list('id', 'name')[:limit]
+
+        return [{'id': obj_id, 'name': name} for obj_id, name in rows]
+
+    matches = []
+    for normalized, obj_id, name in entries[bisect_left(entries, (prefix,)):]:
+        if len(matches) == limit or not normalized.startswith(prefix):
+            break
+        matches.append({'id': obj_id, 'name': name})
+
+    return matches
@@ -0,0 +1,209 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.bulk import bulk_create_with_pks
+from core.versions import bump_collection_version, deferred_version_bumps
+
+
+class BulkModelMixin:
+    """
+    Add a `bulk/` endpoint to a viewset that takes a list payload.
+
+    POST creates every item, PATCH updates every item (each needs an
+    `id`) and DELETE removes the listed ids. All items are validated
+    before anything is written and the writes happen in one
+    transaction, so either every item is saved or none is. The response
+    holds one result per item, in payload order.
+    """
+    bulk_serializer_class = None
+
+    @action(detail=False, methods=['post', 'patch', 'delete'],
+            url_path='bulk')
+    def bulk(self, request):
+        """Dispatch a bulk request to the handler for its method."""
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError('Expected a list of items.')
+
+        if len(items) > settings.API_MAX_BULK_ITEMS:
+            raise ValidationError(
+                f'At most {settings.API_MAX_BULK_ITEMS} items are allowed.')
+
+        handler = {
+            'POST': self.bulk_create,
+            'PATCH': self.bulk_update,
+            'DELETE': self.bulk_destroy,
+        }[request.method]
+
+        return handler(items)
+
+    def bulk_create(self, items):
+        """Validate and create every item."""
+        serializer = self.get_bulk_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return bulk_error_response(serializer.errors)
+
+        errors = [{} for _ in items]
+        validated = self.validate_bulk_related(
+            serializer.validated_data, errors)
+        if any(errors):
+            return bulk_error_response(errors)
+
+        with transaction.atomic(), deferred_version_bumps():
+            instances = self.perform_bulk_create(validated)
+            bump_collection_version(self.request.user.id)
+
+        return bulk_response(
+            self.bulk_representation(instances), status.HTTP_201_CREATED)
+
+    def bulk_update(self, items):
+        """Validate and update every item, leaving missing fields as is."""
+        ids, errors = self.get_bulk_ids(
+            [item.get('id') if isinstance(item, dict) else None
+             for item in items]
+        )
+        instances = self.get_bulk_instances(ids)
+
+        serializer = self.get_bulk_serializer(
+            data=[{key: value for key, value in item.items() if key != 'id'}
+                  if isinstance(item, dict) else item
+                  for item in items],
+            many=True,
+            partial=True
+        )
+        if not serializer.is_valid():
+            for index, item_errors in enumerate(serializer.errors):
+                errors[index].update(item_errors)
+
+        for index, pk in enumerate(ids):
+            if pk is not None and pk not in instances:
+                errors[index]['id'] = ['Not found.']
+
+        if any(errors):
+            return bulk_error_response(errors)
+
+        validated = self.validate_bulk_related(
+            serializer.validated_data, errors)
+        if any(errors):
+            return bulk_error_response(errors)
+
+        pairs = [(instances[pk], data) for pk, data in zip(ids, validated)]
+        self.validate_bulk_update(pairs, errors)
+        if any(errors):
+            return bulk_error_response(errors)
+
+        with transaction.atomic(), deferred_version_bumps():
+            updated = self.perform_bulk_update(pairs)
+            bump_collection_version(self.request.user.id)
+
+        return bulk_response(
+            self.bulk_representation(updated), status.HTTP_200_OK)
+
+    def bulk_destroy(self, items):
+        """Delete every listed id."""
+        ids, errors = self.get_bulk_ids(items)
+        instances = self.get_bulk_instances(ids)
+
+        for index, pk in enumerate(ids):
+            if pk is not None and pk not in instances:
+                errors[index]['id'] = ['Not found.']
+
+        if any(errors):
+            return bulk_error_response(errors)
+
+        with transaction.atomic(), deferred_version_bumps():
+            self.get_queryset().filter(id__in=ids).delete()
+
+        return bulk_response([{'id': pk} for pk in ids], status.HTTP_200_OK)
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        """Return the serializer used to validate bulk payloads."""
+        serializer_class = (self.bulk_serializer_class or
+                            self.get_serializer_class())
+        kwargs['context'] = self.get_serializer_context()
+        return serializer_class(*args, **kwargs)
+
+    def get_bulk_ids(self, values):
+        """Convert the submitted ids to ints, collecting per item errors."""
+        ids, errors = [], []
+        for value in values:
+            try:
+                ids.append(int(value))
+                errors.append({})
+            except (TypeError, ValueError):
+                ids.append(None)
+                errors.append({'id': ['A valid integer is required.']})
+
+        return ids, errors
+
+    def get_bulk_instances(self, ids):
+        """Return the user's objects with the given ids, keyed by id."""
+        return self.get_queryset().filter(
+            id__in=[pk for pk in ids if pk is not None]
+        ).in_bulk()
+
+    def validate_bulk_related(self, validated, errors):
+        """
+        Hook to validate the related objects of every item at once,
+        adding to errors in place. Returns the validated items.
+        """
+        return validated
+
+    def validate_bulk_update(self, pairs, errors):
+        """
+        Hook to validate the (instance, data) pairs of an update against
+        each other and the database, adding to errors in place.
+        """
+
+    def perform_bulk_create(self, validated):
+        """Create and return the objects for the validated items."""
+        model = self.get_queryset().model
+        objs = [model(user=self.request.user, **data) for data in validated]
+        return bulk_create_with_pks(
+            model, objs, batch_size=settings.BULK_BATCH_SIZE)
+
+    def perform_bulk_update(self, pairs):
+        """Apply the validated (instance, data) pairs and return them."""
+        # bulk_update doesn't apply auto_now, so stamp the rows here.
+        now = timezone.now()
+        instances, fields = [], {'updated_at'}
+        for instance, data in pairs:
+            instance.updated_at = now
+            for name, value in data.items():
+                setattr(instance, name, value)
+                fields.add(name)
+            instances.append(instance)
+
+        self.get_queryset().model.objects.bulk_update(
+            instances, fields, batch_size=settings.BULK_BATCH_SIZE)
+
+        return instances
+
+    def bulk_representation(self, instances):
+        """Return the serialized representation of the given objects."""
+        return self.get_serializer(instances, many=True).data
+
+
+def bulk_response(data, status_code):
+    """Return one result per item, in payload order."""
+    return Response(
+        {'results': [{'index': index, 'data': item}
+                     for index, item in enumerate(data)]},
+        status=status_code
+    )
+
+
+def bulk_error_response(errors):
+    """Return the errors of the invalid items of a rejected payload."""
+    return Response(
+        {'results': [{'index': index, 'errors': item_errors}
+                     for index, item_errors in enumerate(errors)
+                     if item_errors]},
+        status=status.HTTP_400_BAD_REQUEST
+    )
@@ -0,0 +1,98 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+
+from rest_framework.renderers import JSONRenderer
+
+
+class DetailCacheStats:
+    """Thread-safe hit and miss counters of the recipe detail cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+stats = DetailCacheStats()
+
+
+def get_detail_cache():
+    return caches[settings.RECIPE_DETAIL_CACHE['ALIAS']]
+
+
+def detail_cache_key(recipe_id):
+    return f'recipe-detail:{recipe_id}'
+
+
+def invalidate_recipe_details(recipe_ids):
+    """Drop the cached detail payloads of the given recipes."""
+    get_detail_cache().delete_many(
+        [detail_cache_key(recipe_id) for recipe_id in recipe_ids])
+
+
+class CachedRetrieveMixin:
+    """
+    Serve recipe details from a cache of rendered JSON bytes.
+
+    Entries are stored under the recipe id together with the recipe's
+    updated_at, so a cached payload is only used while the recipe is
+    unchanged. Each entry holds one body per accepted media type, as
+    its parameters (e.g. indent) change the rendering. The signal
+    handlers in recipe_app.signals also drop the entries of recipes
+    whose tags or ingredients change.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        if not isinstance(request.accepted_renderer, JSONRenderer):
+            return super().retrieve(request, *args, **kwargs)
+
+        # Fetch only what is needed to check the cache, the full recipe
+        # with its relations is only loaded on a miss.
+        queryset = self.get_queryset().select_related(None) \
+            .prefetch_related(None).only('id', 'updated_at')
+        recipe = get_object_or_404(
+            queryset, pk=kwargs[self.lookup_url_kwarg or self.lookup_field])
+        self.check_object_permissions(request, recipe)
+
+        cache = get_detail_cache()
+        key = detail_cache_key(recipe.id)
+        version = recipe.updated_at.isoformat()
+        media_type = request.accepted_media_type
+        content_type = media_type
+        if request.accepted_renderer.charset:
+            content_type += f'; charset={request.accepted_renderer.charset}'
+
+        cached = cache.get(key)
+        if cached is None or cached[0] != version:
+            cached = (version, {})
+        body = cached[1].get(media_type)
+        if body is not None:
+            stats.record(hit=True)
+            return HttpResponse(body, content_type=content_type)
+
+        stats.record(hit=False)
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+
+        body = request.accepted_renderer.render(
+            response.data, media_type, self.get_renderer_context())
+        cached[1][media_type] = body
+        cache.set(key, cached, settings.RECIPE_DETAIL_CACHE['TIMEOUT'])
+
+        return HttpResponse(body, content_type=content_type)
@@ -0,0 +1,56 @@
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response, patch_vary_headers, quote_etag
+)
+
+from core.versions import get_collection_version
+
+
+class ConditionalListMixin:
+    """
+    Answer list requests with an ETag derived from the user's collection
+    version.
+
+    A matching If-None-Match gets a 304 before the queryset is built or
+    anything is serialized. There is no Last-Modified: its one second
+    resolution would answer If-Modified-Since with a 304 after a change
+    made within the same second.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Return a 304 if the client is up to date, else call handler."""
+        version = get_collection_version(request.user)
+        # The representation also depends on the query string (filters,
+        # cursor) and on the negotiated format.
+        etag = quote_etag(hashlib.md5(':'.join((
+            str(request.user.pk),
+            str(version.version),
+            request.get_full_path(),
+            request.accepted_media_type,
+        )).encode()).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization',))
+
+        return response
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """
+    ConditionalListMixin for viewsets that also retrieve single objects,
+    answering retrieve requests the same way.
+    """
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
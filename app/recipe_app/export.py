@@ -0,0 +1,79 @@
+import csv
+import json
+from itertools import islice
+
+from core.importer import CSV_NAME_SEPARATOR
+from core.models import Recipe
+
+EXPORT_FIELDS = (
+    'id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients'
+)
+
+EXPORT_RELATIONS = (
+    ('tags', Recipe.tags.through, 'tag__name'),
+    ('ingredients', Recipe.ingredients.through, 'ingredient__name'),
+)
+
+
+def iter_recipe_rows(queryset, chunk_size):
+    """
+    Yield every recipe of queryset as a dict with its tag and ingredient
+    names.
+
+    Recipes are read through a server side cursor and their names are
+    fetched one chunk at a time, so memory use doesn't depend on the
+    number of recipes exported.
+    """
+    rows = queryset.order_by('id').values(
+        'id', 'title', 'time_minutes', 'price', 'link'
+    ).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        recipe_ids = [row['id'] for row in chunk]
+        names = {}
+        for field, through, name_field in EXPORT_RELATIONS:
+            names[field] = {recipe_id: [] for recipe_id in recipe_ids}
+            related = through.objects.filter(
+                recipe_id__in=recipe_ids
+            ).order_by(name_field).values_list('recipe_id', name_field)
+            for recipe_id, name in related:
+                names[field][recipe_id].append(name)
+
+        for row in chunk:
+            row['price'] = str(row['price'])
+            for field, _, _ in EXPORT_RELATIONS:
+                row[field] = names[field][row['id']]
+            yield row
+
+
+def iter_ndjson(rows):
+    """Yield one JSON document per line for each row."""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """File-like object that returns what is written instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    """Yield a header line followed by one CSV line for each row."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        for field, _, _ in EXPORT_RELATIONS:
+            row[field] = CSV_NAME_SEPARATOR.join(row[field])
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', iter_ndjson),
+    'csv': ('text/csv', iter_csv),
+}
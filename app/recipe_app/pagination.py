@@ -0,0 +1,27 @@
+from django.conf import settings
+
+from rest_framework.pagination import CursorPagination
+
+
+class BaseCursorPagination(CursorPagination):
+    """
+    Keyset pagination shared by the recipe API list endpoints.
+
+    Clients may ask for a smaller or larger page with `?page_size=`,
+    but never more than `API_MAX_PAGE_SIZE` items.
+    """
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.API_MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(BaseCursorPagination):
+    """Paginate recipes newest first."""
+    ordering = '-id'
+
+
+class NameCursorPagination(BaseCursorPagination):
+    """Paginate tags and ingredients by name, using the id as tiebreaker."""
+    ordering = ('-name', 'id')
@@ -0,0 +1,39 @@
+from django.conf import settings
+
+from rest_framework.permissions import SAFE_METHODS
+
+from core.routers import (
+    choose_replica, is_pinned_to_primary, pin_to_primary, replica_reads
+)
+
+
+class ReplicaReadMixin:
+    """
+    Serve list and retrieve requests from a read replica, unless the
+    user wrote something within the pin window. All reads of a request
+    go to the same replica, so the collection version behind its ETag
+    is never newer than its body. Successful writes pin
+    the user to the primary database.
+    """
+    replica_actions = ('list', 'retrieve')
+    replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if (settings.DATABASE_REPLICAS and
+                request.method in SAFE_METHODS and
+                self.action in self.replica_actions and
+                not is_pinned_to_primary(request.user.id)):
+            self.replica_token = replica_reads.set(choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.replica_token is not None:
+            replica_reads.reset(self.replica_token)
+            self.replica_token = None
+        elif (request.method not in SAFE_METHODS and
+                response.status_code < 400 and
+                request.user.is_authenticated):
+            pin_to_primary(request.user.id)
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,47 +1,266 @@
+from collections import OrderedDict
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from core.images import image_url
+from core.metrics import TimedListSerializer, TimedSerializerMixin
+from core.models import Tag, Ingredient, Recipe, RecipeImage
+
+
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """
+    Many related field that looks up every submitted primary key with
+    one query instead of one query per item.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                if child.pk_field is not None:
+                    item = child.pk_field.to_internal_value(item)
+                pks.append(queryset.model._meta.pk.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(pks)
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+
+        return [objects[pk] for pk in pks]
+
+
+class UserPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that only accepts objects owned by the requesting
+    user. With many=True the ids are resolved in a single query.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
 
-from core.models import Tag, Ingredient, Recipe
+        return BatchedManyRelatedField(**list_kwargs)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
 
-class TagSerializer(serializers.ModelSerializer):
+        return queryset.filter(user=request.user)
+
+
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer of Tag model."""
 
     class Meta:
         model = Tag
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'name')
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Ingredient model."""
 
     class Meta:
         model = Ingredient
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'name')
         read_only_fields = ('id',)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Serializer mixin taking the `fields` to render, all of them when
+    None, and the relations to `expand` into nested objects using the
+    serializers in expandable_fields. Expanded relations are rendered
+    whether or not they are listed in fields.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+
+        for name in expand:
+            self.fields[name] = self.expandable_fields[name](
+                many=True, read_only=True)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields) - set(expand):
+                self.fields.pop(name)
+
+
+class RecipeSerializer(SparseFieldsMixin,
+                       TimedSerializerMixin,
+                       serializers.ModelSerializer):
     """Serializer for Recipe model."""
 
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
 
     class Meta:
         model = Recipe
+        list_serializer_class = TimedListSerializer
         fields = ('id', 'title', 'time_minutes', 'price', 'link',
                   'ingredients', 'tags')
         read_only_fields = ('id',)
 
+    expandable_fields = {
+        'ingredients': IngredientSerializer,
+        'tags': TagSerializer,
+    }
+
+
+class RecipeRowsSerializer(TimedSerializerMixin, serializers.BaseSerializer):
+    """
+    Read-only serializer rendering the rows of a recipe values() queryset
+    exactly like RecipeSerializer(many=True, ...) renders the recipes,
+    without its per field and per object machinery. Use row_fields() to
+    select the values. Related ids, or objects when expanded, are read
+    with one query per relation.
+    """
+
+    def __init__(self, instance=None, fields=None, expand=(), **kwargs):
+        super().__init__(instance, **kwargs)
+        # The reference serializer only provides the field order and the
+        # formatting of the recipe's own columns.
+        self.render_fields = RecipeSerializer(
+            fields=fields, expand=expand).fields
+        self.expand = expand
+
+    @staticmethod
+    def row_fields(fields):
+        """Return the names of the values needed to render fields."""
+        return ['id', *(name for name in fields
+                        if not Recipe._meta.get_field(name).many_to_many)]
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        if not rows:
+            return []
+
+        recipe_ids = [row['id'] for row in rows]
+        related = {
+            name: related_by_recipe(
+                Recipe._meta.get_field(name), recipe_ids,
+                name in self.expand)
+            for name in self.render_fields
+            if Recipe._meta.get_field(name).many_to_many
+        }
+
+        data = []
+        for row in rows:
+            item = OrderedDict()
+            for name, field in self.render_fields.items():
+                if name in related:
+                    item[name] = related[name].get(row['id'], [])
+                elif row[name] is None:
+                    item[name] = None
+                else:
+                    item[name] = field.to_representation(row[name])
+            data.append(item)
+
+        return data
+
+
+def related_by_recipe(field, recipe_ids, expand):
+    """
+    Return the ids of the objects related to each recipe through the M2M
+    field, ordered by id, or their id and name when expanded.
+    """
+    target = field.m2m_reverse_field_name()
+    target_id = f'{target}_id'
+    through = field.remote_field.through.objects.filter(
+        recipe_id__in=recipe_ids).order_by(target_id)
+
+    if expand:
+        rows = through.values_list('recipe_id', target_id, f'{target}__name')
+        grouped = {}
+        for recipe_id, pk, name in rows:
+            grouped.setdefault(recipe_id, []).append(
+                OrderedDict([('id', pk), ('name', name)]))
+        return grouped
+
+    if connections[through.db].vendor == 'postgresql':
+        return dict(through.order_by().values('recipe_id').annotate(
+            ids=ArrayAgg(target_id, ordering=target_id)
+        ).values_list('recipe_id', 'ids'))
+
+    grouped = {}
+    for recipe_id, pk in through.values_list('recipe_id', target_id):
+        grouped.setdefault(recipe_id, []).append(pk)
+    return grouped
+
+
+class RecipeImageSerializer(serializers.ModelSerializer):
+    """Serializer of an uploaded recipe image with the URL of each size."""
+
+    urls = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecipeImage
+        fields = ('sha256', 'format', 'width', 'height', 'size',
+                  'thumbnails_ready', 'thumbnails_failed', 'urls')
+        read_only_fields = fields
+
+    def get_urls(self, image):
+        return OrderedDict(
+            (size, image_url(image, size))
+            for size in ('original', *settings.RECIPE_IMAGES['SIZES'])
+        )
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer to return Recipe Details."""
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    image = RecipeImageSerializer(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image',)
+
+
+class BulkRecipeSerializer(RecipeSerializer):
+    """
+    Serializer validating recipes in bulk payloads.
+
+    Related ids are only type checked here, the view then resolves the
+    ids of every item with one query per field.
+    """
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
+
+    tags = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False
+    )
@@ -0,0 +1,59 @@
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import Tag, Ingredient, Recipe
+from recipe_app.autocomplete import get_name_cache
+from recipe_app.caching import invalidate_recipe_details
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe(sender, instance, **kwargs):
+    """Drop the cached detail of a saved or deleted recipe."""
+    invalidate_recipe_details([instance.id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_recipes_on_relation_change(sender, instance, action, reverse,
+                                          pk_set, **kwargs):
+    """Drop the cached details of recipes whose relations changed."""
+    if not reverse and action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_recipe_details([instance.id])
+    elif reverse and action in ('post_add', 'post_remove'):
+        invalidate_recipe_details(pk_set)
+    elif reverse and action == 'pre_clear':
+        invalidate_recipe_details(
+            instance.recipe_set.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def invalidate_recipes_using(sender, instance, **kwargs):
+    """
+    Drop the cached details of every recipe showing a renamed or deleted
+    tag or ingredient. The recipes are touched too, so a payload
+    rendered concurrently with the old name is never served again.
+    """
+    if kwargs.get('created'):
+        return
+
+    recipe_ids = list(instance.recipe_set.values_list('id', flat=True))
+    if recipe_ids:
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            updated_at=timezone.now())
+        invalidate_recipe_details(recipe_ids)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_autocomplete_names(sender, instance, **kwargs):
+    """Drop the cached sorted names of the owner of a changed object."""
+    get_name_cache().invalidate(sender, instance.user_id)
@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.metrics import registry
+from core.models import Recipe, Tag
+from recipe_app.views import RecipeViewSet
+
+RECIPES_URL = reverse('recipe_app:recipe-list')
+ASYNC_RECIPES_URL = reverse('recipe_app:async-recipe-list')
+
+
+def async_detail_url(recipe_id):
+    """Return async recipe detail url."""
+    return reverse('recipe_app:async-recipe-detail', args=[recipe_id])
+
+
+# The views run on pool threads with their own database connections, so
+# the test data has to be committed.
+class AsyncRecipeAPITests(TransactionTestCase):
+    """Test the async recipe endpoints."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Curry',
+            time_minutes=30,
+            price=12.50
+        )
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Hot'))
+
+    def test_async_list_matches_sync_list(self):
+        """Test that the async list returns the same recipes."""
+        res = self.client.get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.json()['results'],
+            self.client.get(RECIPES_URL).json()['results']
+        )
+
+    def test_async_retrieve(self):
+        """Test retrieving a recipe with its tags."""
+        res = self.client.get(async_detail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['tags'][0]['name'], 'Hot')
+
+    def test_async_list_requires_login(self):
+        """Test that the async endpoints authenticate like the sync ones."""
+        res = APIClient().get(ASYNC_RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_list_only_allows_get(self):
+        """Test that the async list can't create recipes."""
+        res = self.client.post(ASYNC_RECIPES_URL, {'title': 'Soup'})
+
+        self.assertEqual(res.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    def test_pool_thread_queries_are_measured(self):
+        """Test queries run on the pool threads count in the metrics."""
+        registry.clear()
+
+        self.client.get(ASYNC_RECIPES_URL)
+
+        histograms = registry.histograms[
+            ('recipe_app:async-recipe-list', 'GET')]
+        self.assertGreater(histograms['db_queries'].sum, 0)
+        registry.clear()
+
+
+class AsgiConcurrencyTests(TransactionTestCase):
+    """Test the async endpoints serve requests concurrently under ASGI."""
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.token = Token.objects.create(user=user)
+        registry.clear()
+
+    def get(self, client, url):
+        return client.get(url, authorization=f'Token {self.token.key}')
+
+    async def test_requests_are_not_serialized(self):
+        """Test the views of concurrent requests overlap."""
+        views = 4
+        lock = threading.Lock()
+        running = []
+        overlap = []
+        list_recipes = RecipeViewSet.list
+
+        def track_overlap(viewset, request, *args, **kwargs):
+            with lock:
+                running.append(request)
+                overlap.append(len(running))
+            try:
+                time.sleep(0.2)
+                return list_recipes(viewset, request, *args, **kwargs)
+            finally:
+                with lock:
+                    running.remove(request)
+
+        client = AsyncClient()
+        with patch.object(RecipeViewSet, 'list', track_overlap):
+            responses = await asyncio.gather(*(
+                self.get(client, ASYNC_RECIPES_URL) for _ in range(views)))
+
+        self.assertEqual([res.status_code for res in responses],
+                         [status.HTTP_200_OK] * views)
+        self.assertGreater(max(overlap), 1)
+        histograms = registry.histograms[
+            ('recipe_app:async-recipe-list', 'GET')]
+        self.assertEqual(histograms['duration_seconds'].count, views)
+        self.assertGreater(histograms['db_queries'].sum, 0)
@@ -0,0 +1,189 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+RECIPES_BULK_URL = reverse('recipe_app:recipe-bulk')
+TAGS_BULK_URL = reverse('recipe_app:tag-bulk')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+def sample_recipe_payload(**params):
+    """Return a payload for a sample recipe"""
+    payload = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': '5.00'
+    }
+    payload.update(params)
+
+    return payload
+
+
+class PrivateBulkAPITests(TestCase):
+    """Test the bulk endpoints for authenticated users."""
+
+    def setUp(self):
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_tags(self):
+        """Test creating several tags in one request."""
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        names = [result['data']['name'] for result in res.data['results']]
+        self.assertEqual(names, ['Vegan', 'Dessert'])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_recipes_with_relations(self):
+        """Test creating recipes together with their tags and ingredients."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Kale')
+        payload = [
+            sample_recipe_payload(title='Salad', tags=[tag.id],
+                                  ingredients=[ingredient.id]),
+            sample_recipe_payload(title='Soup', tags=[tag.id]),
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        salad = Recipe.objects.get(id=res.data['results'][0]['data']['id'])
+        self.assertEqual(salad.title, 'Salad')
+        self.assertEqual(list(salad.tags.all()), [tag])
+        self.assertEqual(list(salad.ingredients.all()), [ingredient])
+        self.assertEqual(res.data['results'][1]['data']['tags'], [tag.id])
+
+    def test_bulk_create_validates_related_ids_in_one_query(self):
+        """Test related ids are checked with one query per field."""
+        tags = [Tag.objects.create(user=self.user, name=f'Tag {i}')
+                for i in range(5)]
+        payload = [sample_recipe_payload(tags=[tag.id for tag in tags])
+                   for _ in range(10)]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        tag_lookups = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT "core_tag"."id" FROM')
+        ]
+        self.assertEqual(len(tag_lookups), 1)
+        self.assertEqual(
+            Recipe.tags.through.objects.filter(
+                recipe__user=self.user).count(),
+            50
+        )
+
+    def test_bulk_create_is_all_or_nothing(self):
+        """Test that one invalid item rejects the whole payload."""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        other_tag = Tag.objects.create(user=user2, name='Private')
+        payload = [
+            sample_recipe_payload(title='Valid'),
+            sample_recipe_payload(title='Invalid', tags=[other_tag.id]),
+            sample_recipe_payload(title=''),
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [result['index'] for result in res.data['results']], [2])
+        self.assertFalse(Recipe.objects.exists())
+
+        res = self.client.post(RECIPES_BULK_URL, payload[:2], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['results'][0]['index'], 1)
+        self.assertIn('tags', res.data['results'][0]['errors'])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_bulk_update_recipes(self):
+        """Test updating several recipes and replacing their tags."""
+        recipe1 = Recipe.objects.create(
+            user=self.user, title='Old 1', time_minutes=5, price=5)
+        recipe2 = Recipe.objects.create(
+            user=self.user, title='Old 2', time_minutes=5, price=5)
+        old_tag = Tag.objects.create(user=self.user, name='Old')
+        new_tag = Tag.objects.create(user=self.user, name='New')
+        recipe1.tags.add(old_tag)
+        recipe2.tags.add(old_tag)
+
+        payload = [
+            {'id': recipe1.id, 'title': 'New 1', 'tags': [new_tag.id]},
+            {'id': recipe2.id, 'time_minutes': 20},
+        ]
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.title, 'New 1')
+        self.assertEqual(list(recipe1.tags.all()), [new_tag])
+        self.assertEqual(recipe2.time_minutes, 20)
+        self.assertEqual(list(recipe2.tags.all()), [old_tag])
+
+    def test_bulk_update_other_users_recipe_fails(self):
+        """Test that recipes of other users can't be updated."""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        recipe = Recipe.objects.create(
+            user=user2, title='Theirs', time_minutes=5, price=5)
+
+        res = self.client.patch(
+            RECIPES_BULK_URL,
+            [{'id': recipe.id, 'title': 'Mine'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, 'Theirs')
+
+    def test_bulk_delete_tags(self):
+        """Test deleting several tags in one request."""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Dessert')
+        tag3 = Tag.objects.create(user=self.user, name='Keep')
+
+        res = self.client.delete(
+            TAGS_BULK_URL, [tag1.id, tag2.id], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Tag.objects.all()), [tag3])
+
+    def test_bulk_payload_must_be_a_list(self):
+        """Test that a non list payload is rejected."""
+        res = self.client.post(
+            TAGS_BULK_URL, {'name': 'Vegan'}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
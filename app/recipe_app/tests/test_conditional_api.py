@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe_app:recipe-list')
+TAGS_URL = reverse('recipe_app:tag-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail url."""
+    return reverse('recipe_app:recipe-detail', args=[recipe_id])
+
+
+def create_sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class ConditionalGetAPITests(TestCase):
+    """Test ETag handling of the recipe API."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_returns_validators(self):
+        """Test that list responses carry an ETag only."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', res)
+        self.assertNotIn('Last-Modified', res)
+
+    def test_change_within_a_second_is_not_missed(self):
+        """Test If-Modified-Since can't hide a change made right after."""
+        self.client.get(RECIPES_URL)
+        since = http_date()
+        create_sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_matching_etag_returns_not_modified(self):
+        """Test a matching If-None-Match is answered without the list."""
+        create_sample_recipe(user=self.user)
+        etag = self.client.get(RECIPES_URL)['ETag']
+
+        # Only the version lookup may run.
+        with self.assertNumQueries(1):
+            res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+
+    def test_etag_depends_on_query_string(self):
+        """Test that a different page or filter gets a different ETag."""
+        first = self.client.get(RECIPES_URL)['ETag']
+        filtered = self.client.get(RECIPES_URL, {'tags': '1'})['ETag']
+
+        self.assertNotEqual(first, filtered)
+
+    def test_creating_recipe_changes_etag(self):
+        """Test that creating a recipe invalidates the list ETag."""
+        etag = self.client.get(RECIPES_URL)['ETag']
+        create_sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_adding_tag_to_recipe_changes_detail_etag(self):
+        """Test that changing a recipe's tags invalidates its detail."""
+        recipe = create_sample_recipe(user=self.user)
+        etag = self.client.get(detail_url(recipe.id))['ETag']
+
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        res = self.client.get(detail_url(recipe.id), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.json()['tags']), 1)
+
+    def test_bulk_create_changes_etag(self):
+        """Test that the bulk endpoints also invalidate the ETag."""
+        etag = self.client.get(TAGS_URL)['ETag']
+        self.client.post(
+            reverse('recipe_app:tag-bulk'),
+            [{'name': 'Vegan'}],
+            format='json'
+        )
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_other_users_changes_keep_etag(self):
+        """Test that changes by another user don't invalidate the ETag."""
+        user2 = get_user_model().objects.create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        etag = self.client.get(RECIPES_URL)['ETag']
+        create_sample_recipe(user=user2)
+
+        res = self.client.get(RECIPES_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_tag_and_ingredient_details_are_not_routed(self):
+        """Test only lists are served for tags and ingredients."""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        for prefix in ('tags', 'ingredients'):
+            res = self.client.get(f'/api/recipe/{prefix}/{tag.id}/')
+
+            self.assertIn(res.status_code, (
+                status.HTTP_404_NOT_FOUND,
+                status.HTTP_405_METHOD_NOT_ALLOWED
+            ))
@@ -0,0 +1,137 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.renderers import FastJSONRenderer
+from recipe_app import caching
+from recipe_app.views import RecipeViewSet
+
+CACHE_STATS_URL = reverse('recipe_app:cache-stats')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail url."""
+    return reverse('recipe_app:recipe-detail', args=[recipe_id])
+
+
+class RecipeDetailCacheTests(TestCase):
+    """Test caching of rendered recipe details."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Curry',
+            time_minutes=30,
+            price=12.50
+        )
+        self.tag = Tag.objects.create(user=self.user, name='Spicy')
+        self.recipe.tags.add(self.tag)
+
+    def test_second_retrieve_is_served_from_cache(self):
+        """Test that a cached detail skips loading the relations."""
+        before = caching.stats.as_dict()
+        first = self.client.get(detail_url(self.recipe.id))
+
+        with self.assertNumQueries(2):
+            second = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.json(), first.json())
+        after = caching.stats.as_dict()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['hits'] - before['hits'], 1)
+
+    def test_renaming_tag_invalidates_recipe(self):
+        """Test that renaming a tag refreshes the recipes showing it."""
+        self.client.get(detail_url(self.recipe.id))
+        self.tag.name = 'Mild'
+        self.tag.save()
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.json()['tags'][0]['name'], 'Mild')
+
+    def test_deleting_tag_invalidates_recipe(self):
+        """Test that deleting a tag refreshes the recipes showing it."""
+        self.client.get(detail_url(self.recipe.id))
+        self.tag.delete()
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.json()['tags'], [])
+
+    def test_adding_tag_invalidates_recipe(self):
+        """Test that assigning a tag refreshes the recipe."""
+        self.client.get(detail_url(self.recipe.id))
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name='Hot'))
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(len(res.json()['tags']), 2)
+
+    def test_updating_recipe_invalidates_cache(self):
+        """Test that updating a recipe through the API refreshes it."""
+        self.client.get(detail_url(self.recipe.id))
+        self.client.patch(detail_url(self.recipe.id), {'title': 'Korma'})
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.json()['title'], 'Korma')
+
+    def test_media_type_parameters_are_cached_apart(self):
+        """Test an indented body is never served to other clients."""
+        indented = self.client.get(detail_url(self.recipe.id),
+                                   HTTP_ACCEPT='application/json; indent=4')
+        compact = self.client.get(detail_url(self.recipe.id))
+
+        self.assertIn(b'\n    ', indented.content)
+        self.assertNotIn(b'\n', compact.content)
+        self.assertEqual(indented.json(), compact.json())
+
+    def test_miss_renders_body_once(self):
+        """Test the body cached on a miss is the one returned."""
+        with patch.object(FastJSONRenderer, 'render', autospec=True,
+                          side_effect=FastJSONRenderer.render) as render:
+            res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        render.assert_called_once()
+
+    def test_lookup_goes_through_get_queryset(self):
+        """Test the cache check applies the view's own scoping."""
+        self.client.get(detail_url(self.recipe.id))
+
+        with patch.object(RecipeViewSet, 'get_queryset',
+                          return_value=Recipe.objects.none()):
+            res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats_require_admin(self):
+        """Test that only staff can read the cache statistics."""
+        res = self.client.get(CACHE_STATS_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(CACHE_STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', res.data)
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+EXPORT_URL = reverse('recipe_app:recipe-export')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class RecipeExportAPITests(TestCase):
+    """Test streaming exports of a user's recipes."""
+
+    def setUp(self):
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Curry',
+            time_minutes=30,
+            price=12.50
+        )
+        self.recipe.tags.add(
+            Tag.objects.create(user=self.user, name='Spicy'),
+            Tag.objects.create(user=self.user, name='Dinner')
+        )
+        self.recipe.ingredients.add(
+            Ingredient.objects.create(user=self.user, name='Rice'))
+
+    @override_settings(EXPORT_CHUNK_SIZE=1)
+    def test_export_ndjson(self):
+        """Test exporting recipes as newline delimited JSON."""
+        Recipe.objects.create(
+            user=self.user, title='Toast', time_minutes=2, price=1)
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(rows[0], {
+            'id': self.recipe.id,
+            'title': 'Curry',
+            'time_minutes': 30,
+            'price': '12.50',
+            'link': '',
+            'tags': ['Dinner', 'Spicy'],
+            'ingredients': ['Rice'],
+        })
+        self.assertEqual(rows[1]['tags'], [])
+
+    def test_export_csv(self):
+        """Test exporting recipes as CSV."""
+        res = self.client.get(EXPORT_URL, {'file_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Curry')
+        self.assertEqual(rows[0]['tags'], 'Dinner|Spicy')
+
+    def test_export_is_limited_to_user(self):
+        """Test that only the user's own recipes are exported."""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        Recipe.objects.create(user=user2, title='Theirs', time_minutes=1,
+                              price=1)
+
+        res = self.client.get(EXPORT_URL)
+
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+
+    def test_export_unknown_format_fails(self):
+        """Test that unsupported export formats are rejected."""
+        res = self.client.get(EXPORT_URL, {'file_format': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,229 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from PIL import Image
+
+from core.images import generate_thumbnails, original_name, thumbnail_name
+from core.models import Recipe, RecipeImage
+
+
+def image_url(recipe_id):
+    """Return the image url of a recipe."""
+    return reverse('recipe_app:recipe-image', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    """Return the detail url of a recipe."""
+    return reverse('recipe_app:recipe-detail', args=[recipe_id])
+
+
+def create_user(email='test@gmail.com'):
+    return get_user_model().objects.create_user(
+        email=email, password='testpass', fname='Test', lname='User')
+
+
+def create_recipe(user, **params):
+    defaults = {'title': 'Sample Recipe', 'time_minutes': 10, 'price': 5}
+    defaults.update(params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def image_file(name='photo.jpg', size=(640, 480), image_format='JPEG',
+               color='red'):
+    """Return an uploadable image file."""
+    content = BytesIO()
+    Image.new('RGB', size, color).save(content, image_format)
+    return SimpleUploadedFile(name, content.getvalue())
+
+
+def run_on_commit(func):
+    func()
+
+
+class RecipeImageApiTests(TestCase):
+    """Test uploading and serving recipe images."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        enqueue = patch('core.images.enqueue_thumbnails')
+        self.enqueue = enqueue.start()
+        self.addCleanup(enqueue.stop)
+        on_commit = patch('core.images.transaction.on_commit', run_on_commit)
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.recipe = create_recipe(self.user)
+
+    def upload(self, recipe, upload):
+        return self.client.post(
+            image_url(recipe.id), {'image': upload}, format='multipart')
+
+    def test_upload_image(self):
+        """Test uploading stores the image and enqueues its thumbnails."""
+        res = self.upload(self.recipe, image_file())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        image = RecipeImage.objects.get()
+        self.assertEqual(res.data['sha256'], image.sha256)
+        self.assertEqual((image.format, image.width, image.height),
+                         ('JPEG', 640, 480))
+        self.assertFalse(res.data['thumbnails_ready'])
+        self.assertTrue(default_storage.exists(original_name(image)))
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.image, image)
+        self.enqueue.assert_called_once_with(image.id)
+
+    def test_identical_uploads_are_stored_once(self):
+        """Test the same content uploaded again reuses the stored image."""
+        other = create_recipe(self.user, title='Other')
+
+        first = self.upload(self.recipe, image_file('a.jpg'))
+        second = self.upload(other, image_file('b.jpg'))
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data['sha256'], second.data['sha256'])
+        image = RecipeImage.objects.get()
+        self.assertEqual(image.recipes.count(), 2)
+        directory = os.path.dirname(original_name(image))
+        self.assertEqual(len(default_storage.listdir(directory)[1]), 1)
+        self.enqueue.assert_called_once_with(image.id)
+
+    def test_identical_uploads_of_users_are_separate(self):
+        """Test content another user uploaded reveals nothing about it."""
+        self.upload(self.recipe, image_file())
+        RecipeImage.objects.update(thumbnails_failed=True)
+        other = create_user('other@gmail.com')
+        self.client.force_authenticate(user=other)
+
+        res = self.upload(create_recipe(other), image_file())
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(res.data['thumbnails_failed'])
+        first, second = RecipeImage.objects.order_by('id')
+        self.assertEqual(second.user, other)
+        self.assertNotEqual(original_name(first), original_name(second))
+        self.assertTrue(default_storage.exists(original_name(second)))
+        self.enqueue.assert_called_with(second.id)
+
+    def test_invalid_image_fails(self):
+        """Test files that aren't images are rejected."""
+        res = self.upload(
+            self.recipe, SimpleUploadedFile('photo.jpg', b'not an image'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RecipeImage.objects.exists())
+
+    def test_truncated_image_fails(self):
+        """Test images whose data is cut short are rejected."""
+        content = image_file(size=(800, 600)).read()
+        upload = SimpleUploadedFile('photo.jpg', content[:len(content) // 2])
+
+        res = self.upload(self.recipe, upload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RecipeImage.objects.exists())
+
+    def test_unsupported_format_fails(self):
+        """Test images of other formats are rejected."""
+        res = self.upload(
+            self.recipe, image_file('photo.bmp', image_format='BMP'))
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_over_limit_fails(self):
+        """Test uploads over MAX_BYTES are rejected while streaming."""
+        upload = image_file(size=(400, 400))
+        limits = {'MAX_BYTES': upload.size - 1, 'MAX_PIXELS': 40000000,
+                  'FORMATS': ('JPEG',), 'SIZES': {'small': 160},
+                  'THREADS': 1}
+
+        with override_settings(RECIPE_IMAGES=limits):
+            res = self.upload(self.recipe, upload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('limited', res.data['image'])
+        self.assertFalse(RecipeImage.objects.exists())
+
+    def test_upload_without_file_fails(self):
+        res = self.client.post(image_url(self.recipe.id), {},
+                               format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_redirect_to_sizes(self):
+        """Test sizes redirect to the original until thumbnails exist."""
+        self.upload(self.recipe, image_file(size=(800, 600)))
+        image = RecipeImage.objects.get()
+
+        res = self.client.get(image_url(self.recipe.id), {'size': 'small'})
+
+        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res['Location'],
+                         default_storage.url(original_name(image)))
+
+        generate_thumbnails(image.id)
+        res = self.client.get(image_url(self.recipe.id), {'size': 'small'})
+
+        self.assertEqual(res['Location'],
+                         default_storage.url(thumbnail_name(image, 'small')))
+
+    def test_recipe_detail_shows_image(self):
+        """Test details link the image, then its thumbnails once ready."""
+        self.assertIsNone(
+            self.client.get(detail_url(self.recipe.id)).json()['image'])
+        self.upload(self.recipe, image_file(size=(800, 600)))
+        image = RecipeImage.objects.get()
+
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertEqual(res.json()['image']['sha256'], image.sha256)
+        self.assertEqual(res.json()['image']['urls']['small'],
+                         default_storage.url(original_name(image)))
+
+        generate_thumbnails(image.id)
+        res = self.client.get(detail_url(self.recipe.id))
+
+        self.assertTrue(res.json()['image']['thumbnails_ready'])
+        self.assertEqual(res.json()['image']['urls']['small'],
+                         default_storage.url(thumbnail_name(image, 'small')))
+
+    def test_unknown_size_fails(self):
+        self.upload(self.recipe, image_file())
+
+        res = self.client.get(image_url(self.recipe.id), {'size': 'huge'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recipe_without_image_not_found(self):
+        res = self.client.get(image_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_other_users_recipe_not_found(self):
+        """Test images can't be uploaded to recipes of other users."""
+        recipe = create_recipe(create_user('other@gmail.com'))
+
+        res = self.upload(recipe, image_file())
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(RecipeImage.objects.exists())
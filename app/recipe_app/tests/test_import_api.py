@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+EXPORT_URL = reverse('recipe_app:recipe-export')
+IMPORT_URL = reverse('recipe_app:recipe-import-recipes')
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class RecipeImportAPITests(TestCase):
+    """Test importing recipe files through the API."""
+
+    def setUp(self):
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_exported_recipes_can_be_imported(self):
+        """Test that an export imports into another account unchanged."""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price=12.50)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Spicy'))
+        for file_format in ('ndjson', 'csv'):
+            res = self.client.get(EXPORT_URL, {'file_format': file_format})
+            exported = b''.join(res.streaming_content)
+
+            user2 = create_user(
+                fname='Test2',
+                lname='User2',
+                email=f'{file_format}@gmail.com',
+                password='testpass2'
+            )
+            client = APIClient()
+            client.force_authenticate(user=user2)
+            upload = SimpleUploadedFile(f'recipes.{file_format}', exported)
+
+            res = client.post(IMPORT_URL, {'file': upload})
+
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            self.assertEqual(res.data['recipes'], 1)
+            imported = Recipe.objects.get(user=user2)
+            self.assertEqual(imported.title, 'Curry')
+            self.assertEqual(imported.price, recipe.price)
+            self.assertEqual(imported.tags.get().name, 'Spicy')
+
+    def test_import_without_file_fails(self):
+        """Test that an upload is required."""
+        res = self.client.post(IMPORT_URL, {})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_unknown_format_fails(self):
+        """Test that files in other formats are rejected."""
+        upload = SimpleUploadedFile('recipes.xml', b'<recipes/>')
+
+        res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_invalid_utf8_fails_before_importing(self):
+        """Test a file with bytes that aren't UTF-8 imports nothing."""
+        lines = ['title,time_minutes,price,link,tags,ingredients']
+        lines += [f'Recipe {index},10,5.00,,,' for index in range(5)]
+        lines.append('Crème brûlée,45,8.00,,Dessert,')
+        upload = SimpleUploadedFile(
+            'recipes.csv', '\n'.join(lines).encode('latin-1'))
+
+        with self.settings(BULK_BATCH_SIZE=2):
+            res = self.client.post(IMPORT_URL, {'file': upload})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 7', res.data['file'])
+        self.assertFalse(Recipe.objects.exists())
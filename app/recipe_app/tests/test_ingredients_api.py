@@ -5,11 +5,12 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Ingredient
+from core.models import Ingredient, Recipe
 
 from recipe_app.serializers import IngredientSerializer
 
 INGREDIENTS_URL = reverse('recipe_app:ingredient-list')
+AUTOCOMPLETE_URL = reverse('recipe_app:ingredient-autocomplete')
 
 
 def create_user(**params):
@@ -55,7 +56,7 @@ class PrivateIngredientsAPITests(TestCase):
         serializer = IngredientSerializer(ingredients, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrieved_ingredients_limited_to_user(self):
         """Tests that only the user's ingredients are retrieved"""
@@ -73,8 +74,43 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.get(INGREDIENTS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], ingredient.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], ingredient.name)
+
+    def test_retrieve_ingredients_assigned_to_recipes(self):
+        """Test filtering ingredients by those assigned to recipes."""
+        assigned = Ingredient.objects.create(user=self.user, name='Salt')
+        Ingredient.objects.create(user=self.user, name='Pepper')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Eggs on toast',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.ingredients.add(assigned)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']],
+            [assigned.id]
+        )
+
+    def test_assigned_ingredients_are_unique(self):
+        """Test filtering ingredients by assigned returns unique items."""
+        assigned = Ingredient.objects.create(user=self.user, name='Salt')
+        for title in ('Eggs', 'Chips'):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=10,
+                price=5.00
+            )
+            recipe.ingredients.add(assigned)
+
+        res = self.client.get(INGREDIENTS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
 
     def test_create_ingredient_is_successful(self):
         """Test that creating a new ingredient is successful."""
@@ -102,3 +138,16 @@ class PrivateIngredientsAPITests(TestCase):
         res = self.client.post(INGREDIENTS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_autocomplete_ingredients(self):
+        """Test suggesting ingredients, including newly created ones"""
+        Ingredient.objects.create(user=self.user, name='Salt')
+        for _ in range(10):
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 's'})
+        self.assertEqual([item['name'] for item in res.data], ['Salt'])
+
+        Ingredient.objects.create(user=self.user, name='Sage')
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 's'})
+
+        self.assertEqual(
+            [item['name'] for item in res.data], ['Sage', 'Salt'])
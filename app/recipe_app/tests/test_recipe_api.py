@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
@@ -85,7 +87,7 @@ class PrivateRecipesAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_retrieved_recipes_is_for_user(self):
         """Test that only the user's recipes are retrieved."""
@@ -109,7 +111,223 @@ class PrivateRecipesAPITests(TestCase):
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_listing_recipes_uses_constant_number_of_queries(self):
+        """Test the list query count doesn't grow with the recipe count."""
+
+        def add_recipes(start, stop):
+            for i in range(start, stop):
+                recipe = create_sample_recipe(user=self.user)
+                recipe.tags.add(
+                    create_sample_tag(user=self.user, name=f'Tag {i}'))
+                recipe.ingredients.add(
+                    create_sample_ingredients(user=self.user, name=f'Ing {i}'))
+
+        add_recipes(0, 2)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(RECIPES_URL)
+
+        add_recipes(2, 12)
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 12)
+        self.assertEqual(len(few), len(many))
+
+    def test_recipes_are_paginated_with_cursor(self):
+        """Test following the cursor walks every recipe exactly once."""
+        recipes = [create_sample_recipe(user=self.user) for _ in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(len(ids), 2)
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(recipe['id'] for recipe in res.data['results'])
+
+        self.assertEqual(ids, sorted((r.id for r in recipes), reverse=True))
+
+    @override_settings(API_MAX_PAGE_SIZE=2)
+    def test_page_size_is_capped(self):
+        """Test that clients can't request pages above the maximum size."""
+        for _ in range(3):
+            create_sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL, {'page_size': 50})
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_list_selected_fields_only(self):
+        """Test ?fields= renders and loads only the listed fields."""
+        recipe = create_sample_recipe(user=self.user, title='Curry')
+        recipe.tags.add(create_sample_tag(user=self.user))
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(RECIPES_URL, {'fields': 'id,title'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'],
+                         [{'id': recipe.id, 'title': 'Curry'}])
+        recipe_queries = [query['sql'] for query in queries.captured_queries
+                          if 'core_recipe' in query['sql']]
+        self.assertEqual(len(recipe_queries), 1)
+        self.assertNotIn('search_document', recipe_queries[0])
+
+    def test_list_expands_relations(self):
+        """Test ?expand= renders related objects instead of ids."""
+        recipe = create_sample_recipe(user=self.user)
+        tag = create_sample_tag(user=self.user, name='Vegan')
+        recipe.tags.add(tag)
+        recipe.ingredients.add(create_sample_ingredients(user=self.user))
+
+        res = self.client.get(
+            RECIPES_URL, {'fields': 'id', 'expand': 'tags'})
+
+        self.assertEqual(res.data['results'], [
+            {'id': recipe.id, 'tags': [{'id': tag.id, 'name': 'Vegan'}]}])
+
+    def test_list_without_fields_is_unchanged(self):
+        """Test recipes render every field by default."""
+        recipe = create_sample_recipe(user=self.user)
+        recipe.tags.add(create_sample_tag(user=self.user))
+
+        res = self.client.get(RECIPES_URL)
+
+        serializer = RecipeSerializer(Recipe.objects.all(), many=True)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def test_list_unknown_fields_fail(self):
+        """Test unknown ?fields= and ?expand= names are rejected."""
+        for params in ({'fields': 'id,user'}, {'expand': 'price'}):
+            res = self.client.get(RECIPES_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_recipes_by_tags(self):
+        """Test returning recipes with any of the given tags."""
+        recipe1 = create_sample_recipe(user=self.user, title='Curry')
+        recipe2 = create_sample_recipe(user=self.user, title='Tahini')
+        recipe3 = create_sample_recipe(user=self.user, title='Fish')
+        tag1 = create_sample_tag(user=self.user, name='Vegan')
+        tag2 = create_sample_tag(user=self.user, name='Vegetarian')
+        recipe1.tags.add(tag1)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe2.id, recipe1.id])
+        self.assertNotIn(recipe3.id, ids)
+
+    def test_filter_recipes_matching_all_tags(self):
+        """Test that match=all only returns recipes with every tag."""
+        recipe1 = create_sample_recipe(user=self.user, title='Curry')
+        recipe2 = create_sample_recipe(user=self.user, title='Tahini')
+        tag1 = create_sample_tag(user=self.user, name='Vegan')
+        tag2 = create_sample_tag(user=self.user, name='Vegetarian')
+        recipe1.tags.add(tag1, tag2)
+        recipe2.tags.add(tag2)
+
+        res = self.client.get(RECIPES_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'match': 'all'
+        })
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+
+    def test_filter_recipes_by_ingredients(self):
+        """Test returning recipes with specific ingredients."""
+        recipe1 = create_sample_recipe(user=self.user, title='Beans')
+        recipe2 = create_sample_recipe(user=self.user, title='Rice')
+        ingredient = create_sample_ingredients(user=self.user, name='Beans')
+        recipe1.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPES_URL, {'ingredients': ingredient.id})
+
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [recipe1.id])
+        self.assertNotIn(recipe2.id, ids)
+
+    def test_filter_recipes_with_invalid_ids_fails(self):
+        """Test that non numeric filter ids are rejected."""
+        res = self.client.get(RECIPES_URL, {'tags': '1,abc'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_recipes_by_title_and_ingredient(self):
+        """Test searching ranks recipes matching more terms first."""
+        rice = create_sample_ingredients(user=self.user, name='Rice')
+        jollof = create_sample_recipe(user=self.user, title='Jollof Rice')
+        jollof.ingredients.add(rice)
+        fried = create_sample_recipe(user=self.user, title='Fried Plantain')
+        fried.ingredients.add(rice)
+        create_sample_recipe(user=self.user, title='Pancakes')
+
+        res = self.client.get(RECIPES_URL, {'search': 'rice'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(ids, [jollof.id, fried.id])
+        self.assertIsNone(res.data['next'])
+
+    def test_search_pages_continue_with_offset(self):
+        """Test every match is reachable through the next links."""
+        recipes = [create_sample_recipe(user=self.user, title=f'Rice {i}')
+                   for i in range(5)]
+
+        res = self.client.get(RECIPES_URL, {'search': 'rice', 'page_size': 2})
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertIsNone(res.data['previous'])
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids += [recipe['id'] for recipe in res.data['results']]
+
+        self.assertEqual(ids, [recipe.id for recipe in reversed(recipes)])
+        self.assertIsNotNone(res.data['previous'])
+
+    def test_search_with_invalid_offset_fails(self):
+        for offset in ('abc', '-1'):
+            res = self.client.get(
+                RECIPES_URL, {'search': 'rice', 'offset': offset})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_is_limited_to_user(self):
+        """Test that other users' recipes are never found."""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='test2pass'
+        )
+        create_sample_recipe(user=user2, title='Jollof Rice')
+
+        res = self.client.get(RECIPES_URL, {'search': 'jollof'})
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_viewing_recipe_detail_uses_constant_number_of_queries(self):
+        """Test the detail query count doesn't grow with related objects."""
+        recipe = create_sample_recipe(user=self.user)
+        recipe.tags.add(create_sample_tag(user=self.user))
+
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(detail_url(recipe.id))
+
+        for i in range(5):
+            recipe.tags.add(create_sample_tag(user=self.user, name=f'T{i}'))
+            recipe.ingredients.add(
+                create_sample_ingredients(user=self.user, name=f'I{i}'))
+
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(detail_url(recipe.id))
+
+        self.assertEqual(len(res.json()['tags']), 6)
+        self.assertEqual(len(few), len(many))
 
     def test_viewing_recipe_detail_is_successful(self):
         """Test viewing a recipe's detail is successful."""
@@ -122,7 +340,7 @@ class PrivateRecipesAPITests(TestCase):
         res = self.client.get(url)
 
         serializer = RecipeDetailSerializer(recipe)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.json(), serializer.data)
 
     def test_create_basic_recipe(self):
         """Test creating recipe."""
@@ -186,6 +404,50 @@ class PrivateRecipesAPITests(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_with_other_users_tag_fails(self):
+        """Test that tags owned by another user are rejected."""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='test2pass'
+        )
+        tag = create_sample_tag(user=user2)
+
+        payload = {
+            'title': 'Chocolate Cake',
+            'time_minutes': 5,
+            'price': 10.00,
+            'tags': [tag.id]
+        }
+        res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_validates_tags_in_one_query(self):
+        """Test that all submitted tags are looked up together."""
+        tags = [create_sample_tag(user=self.user, name=f'Tag {i}')
+                for i in range(10)]
+
+        payload = {
+            'title': 'Chocolate Cake',
+            'time_minutes': 5,
+            'price': 10.00,
+            'tags': [tag.id for tag in tags]
+        }
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPES_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        tag_lookups = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and
+            '"core_tag"."id" IN' in query['sql']
+        ]
+        self.assertEqual(len(tag_lookups), 1)
+        self.assertEqual(res.data['tags'], [tag.id for tag in tags])
+
     def test_partial_update_recipe(self):
         """Test partially updating the recipe."""
         recipe = create_sample_recipe(user=self.user)
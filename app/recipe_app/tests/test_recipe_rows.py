@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.renderers import FastJSONRenderer
+from recipe_app.serializers import RecipeRowsSerializer, RecipeSerializer
+
+RECIPES_URL = reverse('recipe_app:recipe-list')
+
+# Combinations of ?fields= and ?expand= the parity tests render.
+REPRESENTATIONS = (
+    (None, ()),
+    (None, ('tags',)),
+    (None, ('ingredients', 'tags')),
+    (('id', 'title'), ()),
+    (('price', 'id'), ()),
+    (('tags', 'title', 'link'), ()),
+    (('id',), ('ingredients',)),
+    (('time_minutes', 'ingredients'), ('tags',)),
+)
+
+
+def create_user(email):
+    return get_user_model().objects.create_user(
+        email=email, password='testpass', fname='Test', lname='User')
+
+
+class RecipeRowsSerializerTests(TestCase):
+    """Test rendering recipe rows matches RecipeSerializer."""
+
+    def setUp(self):
+        self.user = create_user('test@gmail.com')
+        other = create_user('other@gmail.com')
+
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan', 'Dessert', 'Quick')]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Kale')
+        ]
+        Recipe.objects.create(
+            user=self.user, title='Plain', time_minutes=0, price=0)
+        curry = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=25,
+            price=Decimal('7.5'), link='https://example.com/curry')
+        curry.tags.add(tags[2], tags[0])
+        curry.ingredients.add(ingredients[1], ingredients[0])
+        cake = Recipe.objects.create(
+            user=self.user, title='Café   cake', time_minutes=90,
+            price=Decimal('12.99'))
+        cake.tags.add(tags[1])
+
+        shared = Recipe.objects.create(
+            user=other, title='Other', time_minutes=5, price=1)
+        shared.tags.add(tags[0])
+
+    def render_both(self, fields, expand):
+        """Return the data of both serializers for the user's recipes."""
+        names = fields or RecipeSerializer.Meta.fields
+        recipes = Recipe.objects.filter(user=self.user).order_by('-id')
+        expected = RecipeSerializer(
+            recipes.prefetch_related('tags', 'ingredients'), many=True,
+            fields=fields, expand=expand).data
+        rows = RecipeRowsSerializer(
+            recipes.values(*RecipeRowsSerializer.row_fields(names)),
+            fields=fields, expand=expand).data
+
+        return expected, rows
+
+    def test_data_matches_recipe_serializer(self):
+        """Test every representation renders the same data."""
+        for fields, expand in REPRESENTATIONS:
+            with self.subTest(fields=fields, expand=expand):
+                expected, rows = self.render_both(fields, expand)
+
+                self.assertEqual(rows, expected)
+                self.assertEqual(
+                    [list(row) for row in rows],
+                    [list(item) for item in expected])
+
+    def test_json_is_byte_identical(self):
+        """Test both renderers produce the same bytes for the rows."""
+        for fields, expand in REPRESENTATIONS:
+            for renderer in (JSONRenderer(), FastJSONRenderer()):
+                with self.subTest(fields=fields, expand=expand,
+                                  renderer=type(renderer).__name__):
+                    expected, rows = self.render_both(fields, expand)
+
+                    self.assertEqual(
+                        renderer.render(rows), renderer.render(expected))
+
+    def test_relations_read_with_one_query_each(self):
+        """Test the query count doesn't grow with the recipes."""
+        recipes = Recipe.objects.filter(user=self.user).values(
+            *RecipeRowsSerializer.row_fields(RecipeSerializer.Meta.fields))
+        rows = list(recipes)
+
+        with CaptureQueriesContext(connection) as queries:
+            RecipeRowsSerializer(rows, expand=('tags',)).data
+
+        self.assertEqual(len(queries), 2)
+
+    def test_empty_rows_make_no_queries(self):
+        """Test an empty page is rendered without queries."""
+        with self.assertNumQueries(0):
+            data = RecipeRowsSerializer([]).data
+
+        self.assertEqual(data, [])
+
+
+class RecipeListParityTests(TestCase):
+    """Test the recipe list renders like RecipeSerializer."""
+
+    def setUp(self):
+        self.user = create_user('test@gmail.com')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        for index in range(3):
+            recipe = Recipe.objects.create(
+                user=self.user, title=f'Recipe {index}', time_minutes=index,
+                price=Decimal(f'{index}.25'))
+            recipe.tags.add(tag)
+
+    def test_list_response_matches_recipe_serializer(self):
+        """Test the response body is what RecipeSerializer renders."""
+        recipes = Recipe.objects.order_by('-id')
+        cases = (
+            ({}, None, ()),
+            ({'expand': 'tags,ingredients'}, None, ('tags', 'ingredients')),
+            ({'fields': 'title,id,tags'}, ('title', 'id', 'tags'), ()),
+            ({'search': 'recipe', 'fields': 'id,price'}, ('id', 'price'), ()),
+        )
+        for query, fields, expand in cases:
+            with self.subTest(query=query):
+                expected = RecipeSerializer(
+                    recipes, many=True, fields=fields, expand=expand).data
+
+                res = self.client.get(RECIPES_URL, query)
+
+                self.assertEqual(
+                    FastJSONRenderer().render(res.data['results']),
+                    FastJSONRenderer().render(expected))
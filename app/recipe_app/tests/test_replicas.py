@@ -0,0 +1,106 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import CollectionVersion, Recipe
+from core.routers import ReplicaRouter
+
+RECIPES_URL = reverse('recipe_app:recipe-list')
+TAGS_URL = reverse('recipe_app:tag-list')
+
+
+def create_sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample Recipe',
+        'time_minutes': 10,
+        'price': 5.00
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+# The test database stands in for the replica, choose_replica is spied
+# on to see which reads were routed to it.
+@override_settings(DATABASE_REPLICAS=['default'])
+@patch('recipe_app.replicas.choose_replica', return_value='default')
+class ReplicaRoutingAPITests(TestCase):
+    """Test which requests are served from read replicas."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_list_reads_from_replica(self, choose_replica):
+        """Test that listing recipes reads from a replica."""
+        create_sample_recipe(user=self.user)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(choose_replica.called)
+
+    def test_write_reads_from_primary(self, choose_replica):
+        """Test that creating a tag doesn't read from a replica."""
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(choose_replica.called)
+
+    def test_user_pinned_to_primary_after_write(self, choose_replica):
+        """Test that a user's reads stick to the primary after a write."""
+        self.client.post(
+            RECIPES_URL,
+            {'title': 'Curry', 'time_minutes': 30, 'price': 10}
+        )
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertFalse(choose_replica.called)
+
+    def test_other_users_not_pinned(self, choose_replica):
+        """Test that a write only pins its author."""
+        self.client.post(TAGS_URL, {'name': 'Vegan'})
+        user2 = get_user_model().objects.create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        self.client.force_authenticate(user=user2)
+
+        self.client.get(TAGS_URL)
+
+        self.assertTrue(choose_replica.called)
+
+    def test_version_read_from_replica(self, choose_replica):
+        """Test the ETag version is read where the body is read from."""
+        CollectionVersion.objects.get_or_create(user=self.user)
+        db_for_read = ReplicaRouter.db_for_read
+        reads = []
+
+        def record_read(router, model, **hints):
+            reads.append(model)
+            return db_for_read(router, model, **hints)
+
+        with patch.object(ReplicaRouter, 'db_for_read', record_read):
+            res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(CollectionVersion, reads)
+        choose_replica.assert_called_once()
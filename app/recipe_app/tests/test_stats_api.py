@@ -0,0 +1,193 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Recipe, RecipeStats, Tag
+
+STATS_URL = reverse('recipe_app:recipe-stats')
+RECIPES_URL = reverse('recipe_app:recipe-list')
+RECIPES_BULK_URL = reverse('recipe_app:recipe-bulk')
+IMPORT_URL = reverse('recipe_app:recipe-import-recipes')
+
+
+def detail_url(recipe_id):
+    return reverse('recipe_app:recipe-detail', args=[recipe_id])
+
+
+def create_user(**params):
+    return get_user_model().objects.create_user(**params)
+
+
+class PublicRecipeStatsAPITests(TestCase):
+    """Test the publicly available recipe stats API"""
+
+    def test_login_required(self):
+        """Test that authentication is required for recipe stats"""
+        res = APIClient().get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PrivateRecipeStatsAPITests(TestCase):
+    """Test the recipe stats API and its rollups"""
+
+    def setUp(self):
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.spicy = Tag.objects.create(user=self.user, name='Spicy')
+        self.kale = Ingredient.objects.create(user=self.user, name='Kale')
+
+    def assertRollupsCurrent(self):
+        """Assert the rollups match the ones rebuilt from scratch."""
+        def snapshot():
+            stats = RecipeStats.objects.filter(user=self.user).values()
+            counts = [
+                list(model.objects.order_by('id').values_list(
+                    'id', 'recipe_count'))
+                for model in (Tag, Ingredient)
+            ]
+            return list(stats), counts
+
+        incremental = snapshot()
+        call_command('rebuild_recipe_stats', stdout=StringIO())
+        self.assertEqual(incremental, snapshot())
+
+    def test_stats_of_user_without_recipes(self):
+        """Test stats are empty for users without recipes"""
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 0)
+        self.assertIsNone(res.data['average_price'])
+        self.assertEqual(res.data['top_tags'], [])
+
+    def test_stats_summarize_recipes(self):
+        """Test counts, averages, price buckets and top tags"""
+        for title, minutes, price, tags in (
+                ('Curry', 30, '4.50', [self.vegan, self.spicy]),
+                ('Chili', 60, '12.00', [self.spicy]),
+                ('Salad', 15, '60.00', [])):
+            self.client.post(RECIPES_URL, {
+                'title': title, 'time_minutes': minutes, 'price': price,
+                'tags': [tag.id for tag in tags],
+                'ingredients': [self.kale.id],
+            })
+
+        res = self.client.get(STATS_URL, {'top': 1})
+
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(res.data['average_time_minutes'], 35.0)
+        self.assertEqual(res.data['average_price'], '25.50')
+        self.assertEqual(
+            [bucket['count'] for bucket in res.data['price_distribution']],
+            [1, 0, 1, 0, 1])
+        self.assertEqual(res.data['price_distribution'][-1],
+                         {'min': '50.00', 'max': None, 'count': 1})
+        self.assertEqual(res.data['top_tags'], [
+            {'id': self.spicy.id, 'name': 'Spicy', 'recipe_count': 2}])
+        self.assertEqual(res.data['top_ingredients'][0]['recipe_count'], 3)
+        self.assertRollupsCurrent()
+
+    def test_updates_and_deletes_are_rolled_up(self):
+        """Test edits and deletes through the API update the rollups"""
+        recipe = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price=4.50)
+        recipe.tags.add(self.vegan)
+
+        self.client.patch(detail_url(recipe.id), {
+            'price': '15.00', 'tags': [self.spicy.id]})
+        self.assertRollupsCurrent()
+        self.assertEqual(Tag.objects.get(id=self.spicy.id).recipe_count, 1)
+
+        self.client.delete(detail_url(recipe.id))
+        self.assertRollupsCurrent()
+        self.assertEqual(RecipeStats.objects.get(
+            user=self.user).recipe_count, 0)
+
+    def test_relation_changes_from_both_sides(self):
+        """Test adds, removes and clears keep recipe counts exact"""
+        first = Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price=5)
+        second = Recipe.objects.create(
+            user=self.user, title='Chili', time_minutes=30, price=5)
+
+        self.vegan.recipe_set.add(first, second)
+        self.vegan.recipe_set.add(first)
+        first.tags.remove(self.vegan, self.spicy)
+        self.assertRollupsCurrent()
+
+        first.tags.add(self.vegan, self.spicy)
+        self.vegan.recipe_set.clear()
+        first.tags.clear()
+        self.assertRollupsCurrent()
+
+    def test_bulk_and_import_writes_are_rolled_up(self):
+        """Test the paths bypassing signals maintain the rollups"""
+        res = self.client.post(RECIPES_BULK_URL, [
+            {'title': 'Curry', 'time_minutes': 30, 'price': '4.50',
+             'tags': [self.vegan.id]},
+            {'title': 'Chili', 'time_minutes': 60, 'price': '25.00',
+             'tags': [self.vegan.id, self.spicy.id]},
+        ], format='json')
+        ids = [result['data']['id'] for result in res.data['results']]
+        self.assertRollupsCurrent()
+
+        self.client.patch(RECIPES_BULK_URL, [
+            {'id': ids[0], 'price': '75.00', 'tags': [self.spicy.id]},
+        ], format='json')
+        self.assertRollupsCurrent()
+
+        self.client.delete(RECIPES_BULK_URL, [ids[1]], format='json')
+        self.assertRollupsCurrent()
+
+        upload = SimpleUploadedFile(
+            'recipes.ndjson',
+            b'{"title": "Soup", "time_minutes": 20, "price": "3.00", '
+            b'"tags": ["Vegan", "New"], "ingredients": ["Kale"]}\n'
+        )
+        self.client.post(IMPORT_URL, {'file': upload})
+        self.assertRollupsCurrent()
+        self.assertEqual(Tag.objects.get(id=self.vegan.id).recipe_count, 1)
+
+    def test_stats_support_conditional_requests(self):
+        """Test unchanged stats are answered with 304"""
+        etag = self.client.get(STATS_URL)['ETag']
+
+        res = self.client.get(STATS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price=5)
+        res = self.client.get(STATS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 1)
+
+    def test_missing_rollup_is_rebuilt(self):
+        """Test users without a rollup row get one built on read"""
+        Recipe.objects.create(
+            user=self.user, title='Curry', time_minutes=30, price=5)
+        RecipeStats.objects.filter(user=self.user).delete()
+
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 1)
+
+    def test_invalid_top_rejected(self):
+        """Test ?top= must be an integer"""
+        res = self.client.get(STATS_URL, {'top': 'many'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,15 +1,18 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tag
+from core.models import Tag, Recipe
 
+from recipe_app.autocomplete import get_name_cache
 from recipe_app.serializers import TagSerializer
 
 TAGS_URL = reverse('recipe_app:tag-list')
+AUTOCOMPLETE_URL = reverse('recipe_app:tag-autocomplete')
 
 
 def create_user(**params):
@@ -54,7 +57,7 @@ class PrivateTagsAPITests(TestCase):
         serializer = TagSerializer(tags, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user_tags(self):
         """Test that the tags retrieved are for the authenticated user"""
@@ -72,8 +75,56 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.get(TAGS_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
+
+    def test_tags_are_paginated_stably(self):
+        """Test that following the cursor walks every tag exactly once."""
+        tags = [Tag.objects.create(user=self.user, name=name)
+                for name in ('Vegan Dessert', 'Vegan', 'Spicy', 'Dessert')]
+
+        res = self.client.get(TAGS_URL, {'page_size': 2})
+        ids = [tag['id'] for tag in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(tag['id'] for tag in res.data['results'])
+
+        self.assertEqual(ids, [tag.id for tag in tags])
+
+    def test_retrieve_tags_assigned_to_recipes(self):
+        """Test filtering tags by those assigned to recipes."""
+        assigned = Tag.objects.create(user=self.user, name='Salt')
+        Tag.objects.create(user=self.user, name='Pepper')
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Eggs on toast',
+            time_minutes=10,
+            price=5.00
+        )
+        recipe.tags.add(assigned)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(
+            [item['id'] for item in res.data['results']],
+            [assigned.id]
+        )
+
+    def test_assigned_tags_are_unique(self):
+        """Test filtering tags by assigned returns unique items."""
+        assigned = Tag.objects.create(user=self.user, name='Salt')
+        for title in ('Eggs', 'Chips'):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=title,
+                time_minutes=10,
+                price=5.00
+            )
+            recipe.tags.add(assigned)
+
+        res = self.client.get(TAGS_URL, {'assigned_only': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
 
     def test_create_tag_is_successful(self):
         """Test that creating a new tag is successful"""
@@ -101,3 +152,231 @@ class PrivateTagsAPITests(TestCase):
         res = self.client.post(TAGS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TagAutocompleteAPITests(TestCase):
+    """Test the tag name autocomplete endpoint"""
+
+    def setUp(self):
+        get_name_cache().names.clear()
+        get_name_cache().lookups.clear()
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        for name in ('Garlic', 'garnish', 'Ginger', 'Basil'):
+            Tag.objects.create(user=self.user, name=name)
+
+    def test_autocomplete_matches_prefix_ignoring_case(self):
+        """Test that names starting with q are returned in name order"""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'GAR'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Garlic', 'garnish'])
+
+    def test_autocomplete_respects_limit(self):
+        """Test that at most limit suggestions are returned"""
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'g', 'limit': 2})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Garlic', 'garnish'])
+
+    def test_autocomplete_limited_to_user(self):
+        """Test that other users' tags are never suggested"""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        Tag.objects.create(user=user2, name='Garam Masala')
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'gar'})
+
+        self.assertEqual(len(res.data), 2)
+
+    def test_autocomplete_requires_query(self):
+        """Test that q is required"""
+        res = self.client.get(AUTOCOMPLETE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hot_user_is_served_from_cache(self):
+        """Test that repeated lookups stop hitting the tag table"""
+        for _ in range(get_name_cache().hot_threshold):
+            self.client.get(AUTOCOMPLETE_URL, {'q': 'g'})
+
+        with self.assertNumQueries(0):
+            res = self.client.get(AUTOCOMPLETE_URL, {'q': 'gi'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['Ginger'])
+
+    def test_creating_tag_invalidates_cache(self):
+        """Test that a new tag is suggested by a warm cache"""
+        for _ in range(get_name_cache().hot_threshold):
+            self.client.get(AUTOCOMPLETE_URL, {'q': 'g'})
+        self.client.post(
+            reverse('recipe_app:tag-bulk'),
+            [{'name': 'Gin'}],
+            format='json'
+        )
+
+        res = self.client.get(AUTOCOMPLETE_URL, {'q': 'gi'})
+
+        self.assertEqual(
+            [tag['name'] for tag in res.data], ['Gin', 'Ginger'])
+
+    def test_cached_and_uncached_orders_match(self):
+        """Test that warm and cold lookups order names the same way"""
+        for name in ('Straße', 'STRASSE  Salad', 'strand'):
+            Tag.objects.create(user=self.user, name=name)
+
+        cold = self.client.get(AUTOCOMPLETE_URL, {'q': 'STRA'})
+        for _ in range(get_name_cache().hot_threshold):
+            self.client.get(AUTOCOMPLETE_URL, {'q': 'g'})
+        with self.assertNumQueries(0):
+            warm = self.client.get(AUTOCOMPLETE_URL, {'q': 'STRA'})
+
+        names = ['strand', 'Straße', 'STRASSE  Salad']
+        self.assertEqual([tag['name'] for tag in cold.data], names)
+        self.assertEqual([tag['name'] for tag in warm.data], names)
+
+    def test_cache_settings_read_at_runtime(self):
+        """Test that overridden cache settings are honored"""
+        options = dict(settings.AUTOCOMPLETE_CACHE, HOT_THRESHOLD=1)
+        with override_settings(AUTOCOMPLETE_CACHE=options):
+            self.client.get(AUTOCOMPLETE_URL, {'q': 'g'})
+
+            with self.assertNumQueries(0):
+                res = self.client.get(AUTOCOMPLETE_URL, {'q': 'gi'})
+
+        self.assertEqual([tag['name'] for tag in res.data], ['Ginger'])
+        self.assertEqual(get_name_cache().hot_threshold,
+                         settings.AUTOCOMPLETE_CACHE['HOT_THRESHOLD'])
+
+
+class TagNameNormalizationTests(TestCase):
+    """Test that tag names are unique per user once normalized"""
+
+    def setUp(self):
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_creating_existing_name_returns_it(self):
+        """Test that posting a known name returns the existing tag"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': '  VEGAN '})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['id'], tag.id)
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 1)
+
+    def test_same_name_allowed_for_other_users(self):
+        """Test that names are only unique per user"""
+        user2 = create_user(
+            fname='Test2',
+            lname='User2',
+            email='test2@gmail.com',
+            password='testpass2'
+        )
+        Tag.objects.create(user=user2, name='Vegan')
+
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_bulk_create_reuses_names(self):
+        """Test that bulk creation maps equal names to one tag"""
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.post(
+            reverse('recipe_app:tag-bulk'),
+            [{'name': 'vegan'}, {'name': 'Spicy'}, {'name': 'spicy'}],
+            format='json'
+        )
+
+        ids = [item['data']['id'] for item in res.data['results']]
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(ids[0], tag.id)
+        self.assertEqual(ids[1], ids[2])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_rename_to_existing_name_rejected(self):
+        """Test that a rename can't collide with another tag"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        tag = Tag.objects.create(user=self.user, name='Spicy')
+
+        res = self.client.patch(
+            reverse('recipe_app:tag-bulk'),
+            [{'id': tag.id, 'name': 'VEGAN'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data['results'][0]['errors'])
+
+    def test_bulk_rename_chain(self):
+        """Test renaming onto a name another item renames away"""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Spicy')
+
+        res = self.client.patch(
+            reverse('recipe_app:tag-bulk'),
+            [{'id': tag1.id, 'name': 'Spicy'}, {'id': tag2.id, 'name': 'Hot'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            dict(Tag.objects.values_list('id', 'normalized_name')),
+            {tag1.id: 'spicy', tag2.id: 'hot'})
+
+    def test_bulk_rename_swap(self):
+        """Test two tags can swap names in one update"""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Spicy')
+
+        res = self.client.patch(
+            reverse('recipe_app:tag-bulk'),
+            [{'id': tag1.id, 'name': 'Spicy'},
+             {'id': tag2.id, 'name': 'Vegan'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            dict(Tag.objects.values_list('id', 'name')),
+            {tag1.id: 'Spicy', tag2.id: 'Vegan'})
+
+    def test_bulk_rename_onto_claimed_name_rejected(self):
+        """Test a freed name can only be claimed by one item"""
+        tag1 = Tag.objects.create(user=self.user, name='Vegan')
+        tag2 = Tag.objects.create(user=self.user, name='Spicy')
+        tag3 = Tag.objects.create(user=self.user, name='Hot')
+
+        res = self.client.patch(
+            reverse('recipe_app:tag-bulk'),
+            [{'id': tag1.id, 'name': 'Mild'},
+             {'id': tag2.id, 'name': 'Vegan'},
+             {'id': tag3.id, 'name': 'vegan'}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [(result['index'], list(result['errors']))
+             for result in res.data['results']],
+            [(2, ['name'])])
@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
+from core.asyncviews import pooled_async_view
 from recipe_app import views
 
 router = DefaultRouter()
@@ -11,5 +12,15 @@ router.register('recipes', views.RecipeViewSet)
 app_name = 'recipe_app'
 
 urlpatterns = [
+    path('async/recipes/',
+         pooled_async_view(views.RecipeViewSet.as_view({'get': 'list'})),
+         name='async-recipe-list'),
+    path('async/recipes/<int:pk>/',
+         pooled_async_view(
+             views.RecipeViewSet.as_view({'get': 'retrieve'})),
+         name='async-recipe-detail'),
+    path('stats/', views.RecipeStatsView.as_view(), name='recipe-stats'),
+    path('cache-stats/', views.DetailCacheStatsView.as_view(),
+         name='cache-stats'),
     path('', include(router.urls))
 ]
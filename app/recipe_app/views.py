@@ -1,12 +1,78 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
-from rest_framework.permissions import IsAuthenticated
+from collections import Counter, OrderedDict
+from decimal import Decimal
 
-from core.models import Tag, Ingredient, Recipe
-from recipe_app import serializers
+from django.conf import settings
+from django.db.models import (
+    CharField, Count, Exists, OuterRef, Prefetch, Value
+)
+from django.db.models.functions import Cast, Concat
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
 
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
-class CustomBaseViewSet(viewsets.GenericViewSet,
+from core.authentication import CachedTokenAuthentication
+from core.bulk import bulk_create_with_pks
+from core.images import HashingUploadHandler, image_url, store_image
+from core.importer import (
+    IMPORT_FORMATS, RecipeImporter, find_undecodable_line
+)
+from core.models import Tag, Ingredient, Recipe, normalize_name
+from core.names import get_or_create_named
+from core.search import refresh_search_documents, search_recipes
+from core.stats import (
+    PRICE_BUCKETS, adjust_recipe_counts, apply_recipe_changes, count_related,
+    get_recipe_stats, recipe_values
+)
+from core.versions import bump_collection_version
+from recipe_app import caching, export, serializers
+from recipe_app.autocomplete import autocomplete, get_name_cache
+from recipe_app.bulk import BulkModelMixin
+from recipe_app.conditional import ConditionalGetMixin, ConditionalListMixin
+from recipe_app.pagination import NameCursorPagination
+from recipe_app.replicas import ReplicaReadMixin
+
+# Recipe relations along with their through table and related id column.
+RECIPE_RELATIONS = (
+    ('ingredients', Recipe.ingredients.through, 'ingredient_id'),
+    ('tags', Recipe.tags.through, 'tag_id'),
+)
+
+
+def params_to_names(name, value, allowed):
+    """Convert a comma separated query parameter to a list of names."""
+    names = [item.strip() for item in value.split(',') if item.strip()]
+    unknown = [item for item in names if item not in allowed]
+    if unknown:
+        raise ValidationError(
+            {name: f"Unknown {name}: {', '.join(unknown)}."})
+
+    return names
+
+
+def params_to_ints(name, value):
+    """Convert a comma separated query parameter to a list of integers."""
+    try:
+        return [int(str_id) for str_id in value.split(',')]
+    except ValueError:
+        raise ValidationError(
+            {name: 'Must be a comma separated list of ids.'})
+
+
+class CustomBaseViewSet(ReplicaReadMixin,
+                        ConditionalListMixin,
+                        BulkModelMixin,
+                        viewsets.GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.CreateModelMixin):
     """
@@ -14,48 +80,572 @@ class CustomBaseViewSet(viewsets.GenericViewSet,
     had a lot of common code, so it just makes sense to have it all
     in one place so that it can be extended.
     """
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    pagination_class = NameCursorPagination
 
     def get_queryset(self):
         """Return objects for the authenticated user only."""
-        return self.queryset.filter(user=self.request.user).order_by('-name')
+        queryset = self.queryset.filter(user=self.request.user)
 
-    def perform_create(self, serializer):
-        """Create a new object."""
-        return serializer.save(user=self.request.user)
+        if self.request.query_params.get('assigned_only') in ('1', 'true'):
+            # Semi-join against the recipe through table instead of
+            # joining every assignment and de-duplicating the result.
+            assignments = self.recipe_through.objects.filter(
+                **{self.through_field: OuterRef('pk')}
+            )
+            queryset = queryset.filter(Exists(assignments))
+
+        return queryset.order_by('-name', 'id')
+
+    def create(self, request, *args, **kwargs):
+        """
+        Create a new object, or return the existing one whose name only
+        differs in case or whitespace.
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        name = serializer.validated_data['name']
+        objects, created = get_or_create_named(
+            self.queryset.model, request.user, [name])
+        if created:
+            self.named_objects_created()
+
+        return Response(
+            self.get_serializer(objects[normalize_name(name)]).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def named_objects_created(self):
+        """Bookkeeping the post_save signals would do for new objects."""
+        bump_collection_version(self.request.user.id)
+        get_name_cache().invalidate(
+            self.queryset.model, self.request.user.id)
+
+    @action(detail=False, url_path='autocomplete')
+    def autocomplete(self, request):
+        """
+        Return the objects whose name starts with ?q=, ignoring case,
+        in name order. ?limit= caps the number of suggestions.
+        """
+        prefix = request.query_params.get('q', '').strip()
+        if not prefix:
+            raise ValidationError({'q': 'This parameter is required.'})
+
+        try:
+            limit = min(
+                int(request.query_params.get(
+                    'limit', settings.AUTOCOMPLETE_LIMIT)),
+                settings.AUTOCOMPLETE_MAX_LIMIT
+            )
+        except ValueError:
+            raise ValidationError({'limit': 'A valid integer is required.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be at least 1.'})
+
+        return Response(autocomplete(
+            self.queryset, request.user.id, prefix, limit))
+
+    def perform_bulk_create(self, validated):
+        """Get or create an object per item, in payload order."""
+        names = [data['name'] for data in validated]
+        objects, created = get_or_create_named(
+            self.queryset.model, self.request.user, names,
+            batch_size=settings.BULK_BATCH_SIZE
+        )
+        if created:
+            self.named_objects_created()
+
+        return [objects[normalize_name(name)] for name in names]
+
+    def validate_bulk_update(self, pairs, errors):
+        """
+        Reject renames onto a name the user has after the update: one
+        kept by an object that isn't renamed, or claimed by an earlier
+        item. Names of renamed objects are free, allowing chains and
+        swaps, see perform_bulk_update.
+        """
+        renames = {instance.id: normalize_name(data['name'])
+                   for instance, data in pairs if 'name' in data}
+        taken = set(self.get_queryset().filter(
+            normalized_name__in=renames.values()
+        ).exclude(id__in=renames).values_list('normalized_name', flat=True))
+
+        model_name = self.queryset.model._meta.verbose_name
+        for index, (instance, data) in enumerate(pairs):
+            if 'name' not in data:
+                continue
+            name = normalize_name(data['name'])
+            if name in taken:
+                errors[index]['name'] = [
+                    f'{model_name} with this name already exists.']
+            taken.add(name)
+
+    def perform_bulk_update(self, pairs):
+        """Rename the objects, then refresh the recipes showing them."""
+        renamed = {instance.id: instance.normalized_name
+                   for instance, data in pairs if 'name' in data}
+        new_names = {normalize_name(data['name'])
+                     for _, data in pairs if 'name' in data}
+        if new_names & set(renamed.values()):
+            # The unique constraint is checked row by row, so names moving
+            # between the objects are first replaced by placeholders no
+            # normalized name can equal, as they never start with a space.
+            self.queryset.model.objects.filter(id__in=renamed).update(
+                normalized_name=Concat(
+                    Value(' '), Cast('id', output_field=CharField())))
+
+        instances = super().perform_bulk_update(
+            [(instance, dict(data, normalized_name=normalize_name(
+                data['name']))) if 'name' in data else (instance, data)
+             for instance, data in pairs]
+        )
+        get_name_cache().invalidate(
+            self.queryset.model, self.request.user.id)
+
+        recipe_ids = list(self.recipe_through.objects.filter(
+            **{self.through_field + '__in': [obj.id for obj in instances]}
+        ).values_list('recipe_id', flat=True).distinct())
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            updated_at=timezone.now())
+        refresh_search_documents(recipe_ids)
+
+        return instances
 
 
 class TagViewSet(CustomBaseViewSet):
     """Manage Tags in the database."""
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
+    recipe_through = Recipe.tags.through
+    through_field = 'tag_id'
 
 
 class IngredientViewSet(CustomBaseViewSet):
     """Manage Ingredients in the database."""
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
+    recipe_through = Recipe.ingredients.through
+    through_field = 'ingredient_id'
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReplicaReadMixin,
+                    ConditionalGetMixin,
+                    caching.CachedRetrieveMixin,
+                    BulkModelMixin,
+                    viewsets.ModelViewSet):
     """Manage Recipes in the database."""
     queryset = Recipe.objects.all()
     serializer_class = serializers.RecipeSerializer
-    authentication_classes = (TokenAuthentication,)
+    bulk_serializer_class = serializers.BulkRecipeSerializer
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
+    search_page = None
 
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
-        return self.queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+
+        if self.action == 'list':
+            queryset = self._filter_by_related(queryset)
+
+            # Lists are rendered from plain rows of the rendered columns,
+            # see RecipeRowsSerializer.
+            fields, _ = self.get_list_representation()
+            queryset = queryset.values(
+                *serializers.RecipeRowsSerializer.row_fields(fields))
+        elif self.action == 'retrieve':
+            queryset = queryset.select_related('image').prefetch_related(
+                Prefetch('ingredients',
+                         queryset=Ingredient.objects.order_by('id')),
+                Prefetch('tags', queryset=Tag.objects.order_by('id'))
+            )
+        elif self.action == 'image':
+            queryset = queryset.select_related('image')
+
+        return queryset.order_by('-id')
+
+    def _filter_by_related(self, queryset):
+        """
+        Filter recipes by the `tags` and `ingredients` query parameters.
+
+        With `match=all` a recipe must be assigned every given id,
+        otherwise any one of them is enough.
+        """
+        match_all = self.request.query_params.get('match') == 'all'
+
+        for name, through, field in RECIPE_RELATIONS:
+            value = self.request.query_params.get(name)
+            if not value:
+                continue
+
+            ids = set(params_to_ints(name, value))
+            matches = through.objects.filter(**{field + '__in': ids})
+            if match_all:
+                matches = matches.values('recipe_id').annotate(
+                    matched=Count(field)
+                ).filter(matched=len(ids))
+
+            queryset = queryset.filter(id__in=matches.values('recipe_id'))
+
+        return queryset
+
+    def paginate_queryset(self, queryset):
+        """
+        With `?search=`, return a page of the best matching recipes
+        instead of paginating through them by id. Further pages are
+        reached with `?offset=`, linked from next and previous.
+        """
+        query = self.request.query_params.get('search', '').strip()
+        if self.action != 'list' or not query:
+            return super().paginate_queryset(queryset)
+
+        try:
+            offset = int(self.request.query_params.get('offset', 0))
+        except ValueError:
+            raise ValidationError({'offset': 'A valid integer is required.'})
+        if offset < 0:
+            raise ValidationError({'offset': 'Must be at least 0.'})
+
+        page_size = self.paginator.get_page_size(self.request)
+        # One more match than shown tells whether there is a next page.
+        recipes = search_recipes(queryset, query, page_size + 1, offset)
+        self.search_page = (offset, page_size, len(recipes) > page_size)
+
+        return recipes[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.search_page is None:
+            return super().get_paginated_response(data)
+
+        offset, page_size, has_next = self.search_page
+        url = self.request.build_absolute_uri()
+        next_url = previous_url = None
+        if has_next:
+            next_url = replace_query_param(
+                url, 'offset', offset + page_size)
+        if offset:
+            previous_url = replace_query_param(
+                url, 'offset', max(offset - page_size, 0))
+
+        return Response(OrderedDict([
+            ('next', next_url),
+            ('previous', previous_url),
+            ('results', data)
+        ]))
+
+    def get_list_representation(self):
+        """
+        Return the fields to render in lists, from ?fields=, and the
+        relations to expand into objects, from ?expand=.
+        """
+        if not hasattr(self, '_list_representation'):
+            params = self.request.query_params
+            fields = self.serializer_class.Meta.fields
+            if params.get('fields', '').strip():
+                fields = params_to_names('fields', params['fields'], fields)
+            expand = params_to_names(
+                'expand', params.get('expand', ''),
+                self.serializer_class.expandable_fields)
+            self._list_representation = (fields, expand)
+
+        return self._list_representation
+
+    def get_serializer(self, *args, **kwargs):
+        """Render lists with the requested fields and expansions."""
+        if self.action == 'list' and kwargs.pop('many', False):
+            fields, expand = self.get_list_representation()
+            return serializers.RecipeRowsSerializer(
+                *args, fields=fields, expand=expand,
+                context=self.get_serializer_context(), **kwargs)
+
+        return super().get_serializer(*args, **kwargs)
 
     def get_serializer_class(self):
         """Return custom serializers"""
         if self.action == 'retrieve':
             return serializers.RecipeDetailSerializer
+        if self.action == 'image':
+            return serializers.RecipeImageSerializer
 
         return self.serializer_class
 
     def perform_create(self, serializer):
         """Create a new reciper"""
         serializer.save(user=self.request.user)
+
+    @action(detail=False, url_path='export')
+    def export(self, request):
+        """
+        Stream every recipe of the user with its tag and ingredient names,
+        as NDJSON or, with ?file_format=csv, as CSV.
+        """
+        file_format = request.query_params.get('file_format', 'ndjson')
+        if file_format not in export.EXPORT_FORMATS:
+            raise ValidationError({'file_format': 'Must be ndjson or csv.'})
+
+        content_type, render = export.EXPORT_FORMATS[file_format]
+        rows = export.iter_recipe_rows(
+            self.queryset.filter(user=request.user),
+            settings.EXPORT_CHUNK_SIZE
+        )
+        response = StreamingHttpResponse(
+            render(rows), content_type=content_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{file_format}"')
+
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_recipes(self, request):
+        """
+        Import an uploaded NDJSON or CSV file, in the export format,
+        creating tags and ingredients that don't exist yet by name.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'No file was submitted.'})
+
+        file_format = request.data.get('file_format') or (
+            upload.name.rsplit('.', 1)[-1].lower())
+        if file_format not in IMPORT_FORMATS:
+            raise ValidationError({'file_format': 'Must be ndjson or csv.'})
+
+        line = find_undecodable_line(upload)
+        if line is not None:
+            raise ValidationError(
+                {'file': f'Line {line} is not valid UTF-8.'})
+
+        importer = RecipeImporter(
+            request.user, batch_size=settings.BULK_BATCH_SIZE)
+        report = importer.run(
+            (line.decode('utf-8') for line in upload), file_format)
+        for model in (Tag, Ingredient):
+            get_name_cache().invalidate(model, request.user.id)
+
+        return Response(report, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get', 'post'], url_path='image',
+            parser_classes=(MultiPartParser,))
+    def image(self, request, pk=None):
+        """
+        Upload the recipe image, streamed to disk and stored once per
+        distinct content of the user, or redirect to it at the ?size=
+        given.
+        """
+        recipe = self.get_object()
+        if request.method == 'GET':
+            return self.redirect_to_image(request, recipe)
+
+        limit = settings.RECIPE_IMAGES['MAX_BYTES']
+        handler = HashingUploadHandler(request, max_bytes=limit)
+        request.upload_handlers = [handler]
+        upload = request.FILES.get('image')
+        if handler.too_large:
+            raise ValidationError(
+                {'image': f'Images are limited to {limit} bytes.'})
+        if upload is None:
+            raise ValidationError({'image': 'No file was submitted.'})
+
+        try:
+            image = store_image(request.user, upload)
+        except DjangoValidationError as exc:
+            raise ValidationError({'image': exc.messages})
+        finally:
+            upload.close()
+
+        Recipe.objects.filter(id=recipe.id).update(
+            image=image, updated_at=timezone.now())
+        bump_collection_version(recipe.user_id)
+
+        return Response(self.get_serializer(image).data,
+                        status=status.HTTP_201_CREATED)
+
+    def redirect_to_image(self, request, recipe):
+        """Redirect to the image, thumbnails fall back to the original."""
+        if recipe.image is None:
+            raise NotFound('The recipe has no image.')
+
+        size = request.query_params.get('size', 'original')
+        sizes = ('original', *settings.RECIPE_IMAGES['SIZES'])
+        if size not in sizes:
+            raise ValidationError(
+                {'size': f"Must be one of: {', '.join(sizes)}."})
+
+        return redirect(image_url(recipe.image, size))
+
+    def validate_bulk_related(self, validated, errors):
+        """Check the related ids of all items with one query per field."""
+        message = PrimaryKeyRelatedField.default_error_messages[
+            'does_not_exist']
+
+        for name, through, field in RECIPE_RELATIONS:
+            model = through._meta.get_field(field).related_model
+            submitted = {pk for item in validated for pk in item.get(name, ())}
+            found = set(model.objects.filter(
+                user=self.request.user,
+                id__in=submitted
+            ).values_list('id', flat=True))
+
+            for index, item in enumerate(validated):
+                missing = [pk for pk in item.get(name, ()) if pk not in found]
+                if missing:
+                    errors[index][name] = [
+                        message.format(pk_value=pk) for pk in missing]
+
+        return validated
+
+    def perform_bulk_create(self, validated):
+        """Insert the recipes, then their through rows, in batches."""
+        recipes = [
+            Recipe(user=self.request.user, **without_relations(data))
+            for data in validated
+        ]
+        bulk_create_with_pks(
+            Recipe, recipes, batch_size=settings.BULK_BATCH_SIZE)
+        self._set_bulk_relations(zip(recipes, validated))
+        refresh_search_documents(recipe.id for recipe in recipes)
+        apply_recipe_changes(
+            self.request.user.id,
+            [(None, recipe_values(recipe)) for recipe in recipes]
+        )
+
+        return recipes
+
+    def perform_bulk_update(self, pairs):
+        """Update the recipe rows, then replace any submitted relations."""
+        pairs = list(pairs)
+        previous = [recipe_values(recipe) for recipe, _ in pairs]
+        recipes = super().perform_bulk_update(
+            [(recipe, without_relations(data)) for recipe, data in pairs])
+        self._set_bulk_relations(pairs, replace=True)
+        refresh_search_documents(recipe.id for recipe in recipes)
+        apply_recipe_changes(
+            self.request.user.id,
+            [(old, recipe_values(recipe))
+             for old, recipe in zip(previous, recipes)]
+        )
+
+        return recipes
+
+    def _set_bulk_relations(self, pairs, replace=False):
+        """
+        Write the through rows of the submitted relations of recipes,
+        and update the recipe counts of the related objects.
+        """
+        pairs = list(pairs)
+
+        for name, through, field in RECIPE_RELATIONS:
+            submitted = [(recipe, data[name]) for recipe, data in pairs
+                         if name in data]
+            recipe_ids = [recipe.id for recipe, _ in submitted]
+            counts = Counter()
+            if replace:
+                counts.subtract(count_related(through, field, recipe_ids))
+                through.objects.filter(recipe_id__in=recipe_ids).delete()
+
+            rows = [through(recipe_id=recipe.id, **{field: pk})
+                    for recipe, ids in submitted
+                    for pk in dict.fromkeys(ids)]
+            through.objects.bulk_create(
+                rows, batch_size=settings.BULK_BATCH_SIZE)
+            counts.update(getattr(row, field) for row in rows)
+            adjust_recipe_counts(
+                through._meta.get_field(field).related_model, counts)
+
+    def bulk_representation(self, recipes):
+        """Serialize the recipes with their related ids prefetched."""
+        fetched = Recipe.objects.prefetch_related(
+            *related_id_prefetches()
+        ).in_bulk([recipe.id for recipe in recipes])
+
+        return self.get_serializer(
+            [fetched[recipe.id] for recipe in recipes], many=True).data
+
+
+class RecipeStatsView(ConditionalListMixin, APIView):
+    """
+    Return statistics of the user's recipes from their rollup, without
+    reading the recipes. ?top= caps the top tags and ingredients.
+    """
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        return self.conditional_response(self.stats, request)
+
+    def stats(self, request):
+        try:
+            top = min(
+                int(request.query_params.get(
+                    'top', settings.RECIPE_STATS_TOP)),
+                settings.RECIPE_STATS_MAX_TOP
+            )
+        except ValueError:
+            raise ValidationError({'top': 'A valid integer is required.'})
+        if top < 0:
+            raise ValidationError({'top': 'Must be at least 0.'})
+
+        rollup = get_recipe_stats(request.user)
+        count = rollup.recipe_count
+
+        return Response({
+            'recipe_count': count,
+            'average_time_minutes': (
+                round(rollup.total_time_minutes / count, 1)
+                if count else None),
+            'average_price': (
+                format_price(rollup.total_price / count) if count else None),
+            'price_distribution': price_distribution(rollup),
+            'top_tags': top_named(Tag, request.user, top),
+            'top_ingredients': top_named(Ingredient, request.user, top),
+        })
+
+
+class DetailCacheStatsView(APIView):
+    """Report the hit and miss counts of the recipe detail cache."""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(caching.stats.as_dict())
+
+
+def related_id_prefetches():
+    """Return prefetches loading only the ids of the recipe relations."""
+    return [Prefetch(name, queryset=model.objects.only('id').order_by('id'))
+            for name, model in (('ingredients', Ingredient), ('tags', Tag))]
+
+
+def without_relations(data):
+    """Return the validated recipe data without its M2M fields."""
+    return {key: value for key, value in data.items()
+            if key not in ('ingredients', 'tags')}
+
+
+def format_price(value):
+    """Format a price like the DecimalField of RecipeSerializer."""
+    return str(Decimal(value).quantize(Decimal('0.01')))
+
+
+def price_distribution(rollup):
+    """Return the recipe count of every price bucket of a rollup."""
+    distribution, low = [], Decimal(0)
+    for field, high in PRICE_BUCKETS:
+        distribution.append({
+            'min': format_price(low),
+            'max': format_price(high) if high is not None else None,
+            'count': getattr(rollup, field),
+        })
+        low = high
+
+    return distribution
+
+
+def top_named(model, user, limit):
+    """Return the user's tags or ingredients used by the most recipes."""
+    return list(model.objects.filter(
+        user=user, recipe_count__gt=0
+    ).order_by('-recipe_count', 'id').values(
+        'id', 'name', 'recipe_count')[:limit])
@@ -3,8 +3,11 @@ from django.utils.translation import ugettext_lazy as _
 
 from rest_framework import serializers
 
+from core.metrics import TimedSerializerMixin
+from core.passwords import hash_password
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for the User model."""
 
     class Meta:
@@ -29,13 +32,12 @@ class UserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         """Update an authenticated user."""
         password = validated_data.pop('password', None)
-        user = super().update(instance, validated_data)
-
         if password:
-            user.set_password(password)
-            user.save()
+            # Hashed on the bounded hashing pool before anything is
+            # saved, see core.passwords.
+            instance.password = hash_password(password)
 
-        return user
+        return super().update(instance, validated_data)
 
 
 class AuthTokenSerializer(serializers.Serializer):
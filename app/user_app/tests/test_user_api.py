@@ -1,13 +1,23 @@
-from django.test import TestCase
+import threading
+from unittest.mock import patch
+
+from django.conf import settings
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core import passwords
 
 CREATE_USER_URL = reverse('user_app:create')
 AUTHENTICATE_URL = reverse('user_app:authenticate')
 MANAGE_URL = reverse('user_app:manage')
+ASYNC_MANAGE_URL = reverse('user_app:async-manage')
 
 
 def create_user(**params):
@@ -72,6 +82,7 @@ class AuthenticateUserAPITests(TestCase):
     """Test authenticating users via an API."""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_token_is_created_for_valid_user(self):
@@ -135,6 +146,130 @@ class AuthenticateUserAPITests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
 
+class LoginThroughputTests(TestCase):
+    """Test password hashing and rate limiting of the login endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testPass'
+        )
+
+    def test_outdated_hash_upgraded_on_login(self):
+        """Test that a PBKDF2 hash is rehashed with argon2 on login."""
+        self.user.password = make_password(
+            'testPass', hasher='pbkdf2_sha256')
+        self.user.save()
+
+        res = self.client.post(
+            AUTHENTICATE_URL,
+            {'email': self.user.email, 'password': 'testPass'}
+        )
+
+        self.user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.user.password.startswith('argon2'))
+
+    @override_settings(LOGIN_RATE_LIMITS={
+        'login_ip': '100/min', 'login_email': '2/min'})
+    def test_email_rate_limited_before_hashing(self):
+        """Test that throttled attempts never reach the hasher."""
+        payload = {'email': 'TEST@gmail.com', 'password': 'wrong'}
+        for _ in range(2):
+            self.client.post(AUTHENTICATE_URL, payload)
+
+        with patch('core.auth_backends.verify_password') as verify:
+            res = self.client.post(AUTHENTICATE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        verify.assert_not_called()
+
+    @override_settings(LOGIN_RATE_LIMITS={
+        'login_ip': '1/min', 'login_email': '100/min'})
+    def test_ip_rate_limited(self):
+        """Test that one client can't try many emails."""
+        self.client.post(
+            AUTHENTICATE_URL, {'email': 'a@gmail.com', 'password': 'x'})
+
+        res = self.client.post(
+            AUTHENTICATE_URL, {'email': 'b@gmail.com', 'password': 'x'})
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(LOGIN_RATE_LIMITS={
+        'login_ip': '1/min', 'login_email': '100/min'})
+    def test_ip_rate_limit_ignores_spoofed_forwarded_for(self):
+        """Test that clients can't pose as other IPs without a proxy."""
+        self.client.post(
+            AUTHENTICATE_URL, {'email': 'a@gmail.com', 'password': 'x'},
+            HTTP_X_FORWARDED_FOR='10.0.0.1')
+
+        res = self.client.post(
+            AUTHENTICATE_URL, {'email': 'b@gmail.com', 'password': 'x'},
+            HTTP_X_FORWARDED_FOR='10.0.0.2')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(LOGIN_RATE_LIMITS={
+        'login_ip': '1/min', 'login_email': '100/min'})
+    def test_ip_rate_limit_behind_proxy(self):
+        """Test that the address added by a trusted proxy is limited."""
+        rest_framework = dict(settings.REST_FRAMEWORK, NUM_PROXIES=1)
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            self.client.post(
+                AUTHENTICATE_URL, {'email': 'a@gmail.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR='10.0.0.9, 10.0.0.1')
+            other = self.client.post(
+                AUTHENTICATE_URL, {'email': 'b@gmail.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR='10.0.0.2')
+            res = self.client.post(
+                AUTHENTICATE_URL, {'email': 'c@gmail.com', 'password': 'x'},
+                HTTP_X_FORWARDED_FOR='10.0.0.8, 10.0.0.1')
+
+        self.assertNotEqual(
+            other.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_full_hashing_pool_rejects_login(self):
+        """Test that logins are turned away when the pool is saturated."""
+        with patch.object(passwords, '_slots', threading.BoundedSemaphore(1)):
+            passwords._slots.acquire()
+            res = self.client.post(
+                AUTHENTICATE_URL,
+                {'email': self.user.email, 'password': 'testPass'}
+            )
+
+        self.assertEqual(
+            res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    def test_full_hashing_pool_rejects_signup(self):
+        """Test that signups are turned away when the pool is saturated."""
+        payload = {'email': 'new@gmail.com', 'password': 'testPass',
+                   'fname': 'New', 'lname': 'User'}
+        with patch.object(passwords, '_slots', threading.BoundedSemaphore(1)):
+            passwords._slots.acquire()
+            res = self.client.post(CREATE_USER_URL, payload)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(
+            get_user_model().objects.filter(email=payload['email']).exists())
+
+    def test_full_hashing_pool_outside_api_raises(self):
+        """Test the model layer raises a plain, non-HTTP exception."""
+        with patch.object(passwords, '_slots', threading.BoundedSemaphore(1)):
+            passwords._slots.acquire()
+            with self.assertRaises(passwords.PasswordHashingBusy) as raised:
+                create_user(fname='New', lname='User',
+                            email='new@gmail.com', password='testPass')
+
+        self.assertNotIsInstance(raised.exception, APIException)
+
+
 class ManageUserWithoutTokenAPITests(TestCase):
     """Test managing - view, update, delete -  via APIs without auth"""
 
@@ -193,3 +328,46 @@ class ManageUserWithTokenAPITests(TestCase):
         self.assertEqual(self.user.lname, payload['lname'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_password_uses_hashing_pool(self):
+        """Test password changes are turned away when the pool is full."""
+        payload = {'fname': 'Testing', 'password': 'panda'}
+        with patch.object(passwords, '_slots', threading.BoundedSemaphore(1)):
+            passwords._slots.acquire()
+            res = self.client.patch(MANAGE_URL, payload)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.fname, 'Test')
+        self.assertFalse(self.user.check_password(payload['password']))
+
+
+class AsyncManageUserAPITests(TransactionTestCase):
+    """Test the async manage endpoint, served from a thread pool"""
+
+    def setUp(self):
+        self.user = create_user(
+            fname='Test',
+            lname='User',
+            email='test@gmail.com',
+            password='testpass'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_retrieve_user_async(self):
+        """Test that the async endpoint matches the sync one."""
+        res = self.client.get(ASYNC_MANAGE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), self.client.get(MANAGE_URL).json())
+
+    def test_update_user_async(self):
+        """Test that users can be updated through the async endpoint."""
+        res = self.client.patch(ASYNC_MANAGE_URL, {'fname': 'New'})
+
+        self.user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.fname, 'New')
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.conf import settings
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """Login throttle with its rate read from LOGIN_RATE_LIMITS."""
+
+    def get_rate(self):
+        return settings.LOGIN_RATE_LIMITS[self.scope]
+
+
+class LoginIPRateThrottle(LoginRateThrottle):
+    """
+    Limit login attempts per client IP, as seen past the
+    REST_FRAMEWORK['NUM_PROXIES'] trusted proxies.
+    """
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class LoginEmailRateThrottle(LoginRateThrottle):
+    """
+    Limit login attempts per email, whatever IPs they come from, to slow
+    down guessing the password of one account.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = (request.data.get('email')
+                 if hasattr(request.data, 'get') else None)
+        if not isinstance(email, str) or not email:
+            return None
+
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': hashlib.sha256(
+                email.strip().lower().encode()).hexdigest()
+        }
@@ -1,5 +1,6 @@
 from django.urls import path
 
+from core.asyncviews import pooled_async_view
 from user_app import views
 
 app_name = 'user_app'
@@ -7,5 +8,7 @@ app_name = 'user_app'
 urlpatterns = [
     path('create', views.CreateUserView.as_view(), name='create'),
     path('authenticate', views.CreateTokenView.as_view(), name='authenticate'),
-    path('manage', views.ManageUserView.as_view(), name='manage')
+    path('manage', views.ManageUserView.as_view(), name='manage'),
+    path('async/manage', pooled_async_view(views.ManageUserView.as_view()),
+         name='async-manage')
 ]
@@ -1,25 +1,47 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions, status
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.exceptions import APIException
 from rest_framework.settings import api_settings
 
+from core.authentication import CachedTokenAuthentication
+from core.passwords import PasswordHashingBusy
 from user_app.serializers import UserSerializer, AuthTokenSerializer
+from user_app.throttling import LoginEmailRateThrottle, LoginIPRateThrottle
 
 
-class CreateUserView(generics.CreateAPIView):
+class PasswordHashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again shortly.'
+    default_code = 'password_hashing_busy'
+
+
+class PasswordHashingMixin:
+    """Answer requests finding the password hashing pool full with 503."""
+
+    def handle_exception(self, exc):
+        if isinstance(exc, PasswordHashingBusy):
+            exc = PasswordHashingUnavailable()
+        return super().handle_exception(exc)
+
+
+class CreateUserView(PasswordHashingMixin, generics.CreateAPIView):
     """Create a new user in the system"""
     serializer_class = UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
+class CreateTokenView(PasswordHashingMixin, ObtainAuthToken):
     """Create a new auth token for user"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # Throttles run before the serializer, so rejected attempts are
+    # never hashed.
+    throttle_classes = (LoginIPRateThrottle, LoginEmailRateThrottle)
 
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+class ManageUserView(PasswordHashingMixin, generics.RetrieveUpdateAPIView):
     """Manage authenticated users."""
     serializer_class = UserSerializer
-    authentication_classes = [authentication.TokenAuthentication, ]
+    authentication_classes = [CachedTokenAuthentication, ]
     permission_classes = [permissions.IsAuthenticated, ]
 
     def get_object(self):